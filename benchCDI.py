@@ -0,0 +1,631 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_Bench_CDI
+#
+#  Medições de desempenho do cálculo de CDB (cdi.py).
+#
+#  Cada medição roda em processos novos quando o objetivo é medir a
+#  inicialização do interpretador, para que módulos já carregados não
+#  mascarem o custo real.
+#
+#  O caso "suite" reúne métricas em que menor é melhor (tempo por chamada,
+#  tempo por cenário, latência de inicialização, pico de memória), que
+#  podem ser salvas em um arquivo JSON de referência e comparadas com ele
+#  em execuções futuras.
+#
+#  @author Luan Bernardo Dias
+#  @since 09/10/2022
+#  @see https://docs.python.org/3/library/timeit.html
+#
+import contextlib
+import getopt
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+
+## Diretório onde estão cdi.py e os demais módulos.
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+## Argumentos de um cálculo típico pela linha de comando.
+ARGS_CLI = ["-c", "1000", "-a", "0.1365", "-s", "0.1375", "-i", "22.5",
+            "-t", "100", "-m", "12"]
+
+## Tamanhos de lote medidos pela suíte.
+TAMANHOS_LOTE = (1000, 10000, 100000)
+
+## Variação relativa acima da qual uma métrica é considerada uma regressão.
+LIMITE_REGRESSAO = 0.10
+
+
+## Executa um comando repetidas vezes e mede o tempo de parede de cada
+# execução.
+#
+# @param comando lista com o comando e seus argumentos.
+# @param repeticoes número de execuções.
+# @return lista com os tempos, em segundos.
+#
+def cronometra(comando: list, repeticoes: int = 10) -> list:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run(comando, cwd=DIRETORIO, check=True,
+                       stdout=subprocess.DEVNULL)
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+## Verifica, em um processo novo, se importar um módulo carrega o Tkinter.
+#
+# @param modulo nome do módulo a ser importado.
+# @return True se o tkinter aparece em sys.modules após a importação.
+#
+def carrega_tkinter(modulo: str = "cdi") -> bool:
+    codigo = "import sys, %s; print('tkinter' in sys.modules)" % modulo
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=DIRETORIO,
+                           check=True, capture_output=True, text=True)
+    return saida.stdout.strip() == "True"
+
+
+## Mede o tempo de inicialização da importação de cdi.py e de uma chamada
+# da linha de comando.
+#
+# @param repeticoes número de execuções de cada caso.
+# @return dicionário caso -> lista de tempos (s).
+#
+def bench_inicializacao(repeticoes: int = 10) -> dict:
+    return {
+        "interpretador": cronometra([sys.executable, "-c", "pass"],
+                                    repeticoes),
+        "import cdi": cronometra([sys.executable, "-c", "import cdi"],
+                                 repeticoes),
+        "cli": cronometra([sys.executable, "cdi.py"] + ARGS_CLI,
+                          repeticoes),
+    }
+
+
+## Gera um CSV de cenários aleatórios (semente fixa) no formato do modo
+# lote de cdi.py.
+#
+# @param n número de cenários.
+# @return texto CSV com cabeçalho.
+#
+def gera_cenarios_csv(n: int) -> str:
+    rng = random.Random(2022)
+    linhas = ["capital,aplicacao,selic,rentabilidade,imposto,meses"]
+    for _ in range(n):
+        linhas.append("%.2f,%.4f,%.4f,%.1f,%s,%d" % (
+            rng.uniform(100, 1e6), rng.uniform(0.02, 0.15),
+            rng.uniform(0.02, 0.15), rng.uniform(80, 130),
+            rng.choice(("0", "15", "17.5", "20", "22.5")),
+            rng.randint(1, 360)))
+    return "\n".join(linhas) + "\n"
+
+
+## Mede a vazão do modo lote com 1..N processos sobre o mesmo arquivo.
+# A linha "0" é o cálculo no próprio processo, sem ProcessPoolExecutor.
+#
+# @param n_cenarios número de cenários do arquivo gerado.
+# @param max_trabalhadores maior número de processos medido.
+# @param tamanho_bloco cenários por bloco.
+# @return dicionário processos -> cenários por segundo.
+#
+def bench_escalabilidade(n_cenarios: int = 200000,
+                         max_trabalhadores: int = None,
+                         tamanho_bloco: int = 10000) -> dict:
+    import cdilote
+    texto = gera_cenarios_csv(n_cenarios)
+    max_trabalhadores = max_trabalhadores or os.cpu_count() or 1
+    vazao = {}
+    for trabalhadores in range(0, max_trabalhadores + 1):
+        inicio = time.perf_counter()
+        cdilote.processa_lote(io.StringIO(texto), io.StringIO(),
+                              trabalhadores=trabalhadores,
+                              tamanho_bloco=tamanho_bloco)
+        vazao[trabalhadores] = n_cenarios / (time.perf_counter() - inicio)
+    return vazao
+
+
+## Mede calcula_cdb com e sem o cache de taxas sobre uma carga em que
+# poucas combinações de CDI/Selic/rentabilidade/IR se repetem com capitais
+# e prazos variados.
+#
+# @param n_chamadas número de chamadas a calcula_cdb.
+# @param n_combinacoes número de combinações distintas de taxas.
+# @return dicionário com os tempos (s) "sem cache" e "com cache" e as
+#         estatísticas do cache após a rodada com cache.
+#
+def bench_cache(n_chamadas: int = 200000, n_combinacoes: int = 50) -> dict:
+    import cdi
+    rng = random.Random(2022)
+    combinacoes = [(rng.choice((0.1365, 0.1315, 0.1065, 0.0765)),
+                    rng.choice((0.1375, 0.1325, 0.0775, 0.065)),
+                    rng.choice((90.0, 100.0, 105.0, 110.0, 120.0)),
+                    rng.choice((0.0, 15.0, 17.5, 20.0, 22.5)))
+                   for _ in range(n_combinacoes)]
+    carga = [(rng.uniform(100, 1e6),) + rng.choice(combinacoes) +
+             (rng.randint(1, 360),) for _ in range(n_chamadas)]
+    tempos = {}
+    for caso, tamanho in (("sem cache", 0),
+                          ("com cache", cdi.TAMANHO_CACHE_TAXAS)):
+        cdi.configura_cache_taxas(tamanho)
+        inicio = time.perf_counter()
+        for argumentos in carga:
+            cdi.calcula_cdb(*argumentos)
+        tempos[caso] = time.perf_counter() - inicio
+    tempos["estatisticas"] = cdi.estatisticas_cache_taxas()
+    return tempos
+
+
+## Compara o prazo mínimo para superar a poupança obtido por
+# cdisolver.meses_minimos com a varredura de calcula_cdb mês a mês.
+#
+# @param n_ofertas número de ofertas.
+# @return dicionário com os tempos (s) "varredura" e "cdisolver".
+#
+def bench_equilibrio(n_ofertas: int = 2000) -> dict:
+    import numpy as np
+    import cdi
+    import cdisolver
+    rng = np.random.default_rng(2022)
+    cdi_, p = rng.uniform(0.02, 0.15, (2, n_ofertas))
+    t = rng.uniform(80, 130, n_ofertas)
+    i = rng.choice([0, 15, 17.5, 20, 22.5], n_ofertas)
+    inicio = time.perf_counter()
+    for k in range(n_ofertas):
+        for m in range(1, 361):
+            if cdi.calcula_cdb(1000, cdi_[k], p[k], t[k], i[k],
+                               m).apl_poup > 0:
+                break
+    tempos = {"varredura": time.perf_counter() - inicio}
+    inicio = time.perf_counter()
+    cdisolver.meses_minimos(cdi_, p, t, i, 360)
+    tempos["cdisolver"] = time.perf_counter() - inicio
+    return tempos
+
+
+## Mede o tempo por chamada das funções escalares de cdi.py, como o menor
+# de várias repetições de timeit.
+#
+# @param repeticoes número de repetições.
+# @param numero chamadas por repetição.
+# @return dicionário função -> segundos por chamada.
+#
+def bench_escalares(repeticoes: int = 5, numero: int = 20000) -> dict:
+    import cdi
+    cdi.limpa_cache_taxas()
+    chamadas = {
+        "jc": lambda: cdi.jc(0.1365, 100),
+        "year2month": lambda: cdi.year2month(13.65),
+        "month2day": lambda: cdi.month2day(1.0718),
+        "jurospoupanca": lambda: cdi.jurospoupanca(0.1375),
+        "valorfuturo": lambda: cdi.valorfuturo(1000, 1.0718, 12),
+        "calcula_cdb": lambda: cdi.calcula_cdb(1000, 0.1365, 0.1375, 100,
+                                               22.5, 12),
+    }
+    tempos = {}
+    for nome, chamada in chamadas.items():
+        tempos[nome] = min(timeit.repeat(chamada, number=numero,
+                                         repeat=repeticoes)) / numero
+    # CDB imprime o relatório: a saída é descartada
+    with contextlib.redirect_stdout(io.StringIO()):
+        tempos["CDB"] = min(timeit.repeat(
+            lambda: cdi.CDB(1000, 0.1365, 0.1375, 100, 22.5, 12),
+            number=numero // 10, repeat=repeticoes)) / (numero // 10)
+    return tempos
+
+
+## Compara a latência de uma cotação pela linha de comando (um processo
+# por cotação) com a do modo coprocesso (cdi.py --serve-stdin), em que
+# um processo já iniciado responde a uma linha por vez pelo pipe.
+#
+# @param repeticoes número de cotações medidas em cada modo.
+# @return dicionário modo -> lista de latências (s).
+#
+def bench_coprocesso(repeticoes: int = 10) -> dict:
+    linha = " ".join(ARGS_CLI) + "\n"
+    processo = subprocess.Popen([sys.executable, "cdi.py", "--serve-stdin"],
+                                cwd=DIRETORIO, stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, text=True,
+                                bufsize=1)
+    try:
+        # a primeira resposta inclui a inicialização e não é medida
+        processo.stdin.write(linha)
+        processo.stdout.readline()
+        tempos = []
+        for _ in range(max(repeticoes, 100)):
+            inicio = time.perf_counter()
+            processo.stdin.write(linha)
+            processo.stdout.readline()
+            tempos.append(time.perf_counter() - inicio)
+    finally:
+        processo.stdin.close()
+        processo.wait()
+    return {
+        "cli": cronometra([sys.executable, "cdi.py"] + ARGS_CLI,
+                          repeticoes),
+        "coprocesso": tempos,
+    }
+
+
+## Menor tempo de várias execuções de uma função sem argumentos.
+#
+# @param funcao função a medir.
+# @param repeticoes número de execuções.
+# @return tempo em segundos.
+#
+def menor_tempo(funcao, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+## Mede o tempo por cenário do modo lote de cdi.py e, se o NumPy estiver
+# instalado, de cdivec.cdb_lote, para cada tamanho de lote. Lotes pequenos
+# são repetidos mais vezes, para que o ruído não domine a medida.
+#
+# @param tamanhos tamanhos de lote.
+# @param repeticoes número máximo de execuções de cada lote.
+# @return dicionário caso -> segundos por cenário.
+#
+def bench_lotes(tamanhos=TAMANHOS_LOTE, repeticoes: int = 10) -> dict:
+    import cdilote
+    tempos = {}
+    for n in tamanhos:
+        texto = gera_cenarios_csv(n)
+        tempos["cdilote %d" % n] = menor_tempo(
+            lambda: cdilote.processa_lote(io.StringIO(texto), io.StringIO()),
+            max(1, min(repeticoes, 100000 // n))) / n
+    try:
+        import numpy as np
+        import cdivec
+    except ImportError:
+        return tempos
+    rng = np.random.default_rng(2022)
+    for n in tamanhos:
+        c = rng.uniform(100, 1e6, n)
+        cdi_, p = rng.uniform(0.02, 0.15, (2, n))
+        t = rng.uniform(80, 130, n)
+        i = rng.choice([0, 15, 17.5, 20, 22.5], n)
+        m = rng.integers(1, 361, n)
+        tempos["cdivec %d" % n] = menor_tempo(
+            lambda: cdivec.cdb_lote(c, cdi_, p, t, i, m), repeticoes) / n
+    return tempos
+
+
+## Mede o pico de memória residente, em kB, de um processo novo que
+# importa cdi.py ou roda a linha de comando, e o pico de memória alocada
+# pelo Python (tracemalloc) durante o modo lote no próprio processo.
+#
+# No Linux o pico vem de VmHWM em /proc/self/status: ru_maxrss sobrevive
+# ao exec e incluiria o pico do processo que chamou o benchmark.
+#
+# @param n_cenarios cenários do modo lote.
+# @return dicionário caso -> kB.
+#
+def bench_memoria(n_cenarios: int = 10000) -> dict:
+    import cdilote
+    picos = {}
+    mede = "import os, resource\n" \
+           "if os.path.exists('/proc/self/status'):\n" \
+           "    print([l for l in open('/proc/self/status')\n" \
+           "           if l.startswith('VmHWM')][0].split()[1])\n" \
+           "else:\n" \
+           "    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+    for caso, codigo in (("rss import cdi", "import cdi\n" + mede),
+                         ("rss cli", "import runpy, sys\nsys.argv = "
+                          "['cdi.py'] + %r\nrunpy.run_path('cdi.py', "
+                          "run_name='__main__')\n%s" % (ARGS_CLI, mede))):
+        saida = subprocess.run([sys.executable, "-c", codigo], cwd=DIRETORIO,
+                               check=True, capture_output=True, text=True)
+        picos[caso] = float(saida.stdout.split()[-1])
+    texto = gera_cenarios_csv(n_cenarios)
+    tracemalloc.start()
+    cdilote.processa_lote(io.StringIO(texto), io.StringIO())
+    picos["pico cdilote %d" % n_cenarios] = \
+        tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    return picos
+
+
+## Executa a suíte completa.
+#
+# @param repeticoes repetições das medições de inicialização e escalares.
+# @return dicionário métrica -> valor; menor é melhor em todas. As
+#         unidades fazem parte do nome da métrica.
+#
+def suite(repeticoes: int = 10) -> dict:
+    metricas = {}
+    for caso, tempos in bench_inicializacao(repeticoes).items():
+        metricas["inicializacao %s (ms)" % caso] = 1000 * min(tempos)
+    for caso, tempo in bench_escalares(max(1, repeticoes // 2)).items():
+        metricas["escalar %s (us)" % caso] = 1e6 * tempo
+    for caso, tempo in bench_lotes(repeticoes=repeticoes).items():
+        metricas["lote %s (us/cenario)" % caso] = 1e6 * tempo
+    for caso, pico in bench_memoria().items():
+        metricas["memoria %s (kB)" % caso] = pico
+    return metricas
+
+
+## Compara métricas com uma referência.
+#
+# @param metricas métricas atuais.
+# @param base métricas de referência.
+# @param limite variação relativa tolerada.
+# @return lista de tuplas (métrica, referência, atual, variação) das
+#         métricas que pioraram além do limite.
+#
+def regressoes(metricas: dict, base: dict,
+               limite: float = LIMITE_REGRESSAO) -> list:
+    piores = []
+    for nome, atual in metricas.items():
+        referencia = base.get(nome)
+        if not referencia:
+            continue
+        variacao = atual / referencia - 1
+        if variacao > limite:
+            piores.append((nome, referencia, atual, variacao))
+    return piores
+
+
+## Imprime as métricas da suíte, com a variação em relação à referência.
+#
+# @param metricas métricas atuais.
+# @param base métricas de referência (ou vazio).
+#
+def relatorio_suite(metricas: dict, base: dict):
+    print("%-40s %12s %12s %8s" % ("métrica", "referência", "atual",
+                                    "var."))
+    for nome, atual in metricas.items():
+        if base.get(nome):
+            print("%-40s %12.2f %12.2f %+7.1f%%" % (
+                nome, base[nome], atual, 100 * (atual / base[nome] - 1)))
+        else:
+            print("%-40s %12s %12.2f" % (nome, "-", atual))
+
+
+## Compara a varredura de uma grade rentabilidade × meses × IR × Selic por
+# laços de calcula_cdb com cdivarredura.varredura.
+#
+# @return dicionário com os tempos (s) "laços" e "cdivarredura" e o número
+#         de cenários.
+#
+def bench_varredura() -> dict:
+    import cdi
+    import cdivarredura
+    eixos = (1000, 0.1365, [0.02 + 0.0065 * k for k in range(20)],
+             list(range(80, 131)), [0, 15, 17.5, 20, 22.5],
+             list(range(1, 121)))
+    cdi.configura_cache_taxas(0)
+    inicio = time.perf_counter()
+    for p in eixos[2]:
+        for t in eixos[3]:
+            for i in eixos[4]:
+                for m in eixos[5]:
+                    cdi.calcula_cdb(eixos[0], eixos[1], p, t, i, m)
+    tempos = {"laços": time.perf_counter() - inicio}
+    cdi.configura_cache_taxas()
+    inicio = time.perf_counter()
+    cdivarredura.varredura(*eixos)
+    tempos["cdivarredura"] = time.perf_counter() - inicio
+    tempos["cenarios"] = 20 * 51 * 5 * 120
+    return tempos
+
+
+## Compara o ranking das k melhores ofertas de um catálogo calculado com
+# calcula_cdb e ordenação completa com cdiranking.Catalogo.melhores.
+#
+# @param n_ofertas número de ofertas do catálogo.
+# @param k número de ofertas do ranking.
+# @param repeticoes execuções das versões vetorizadas (vale a menor).
+# @return dicionário com os tempos (s) "laço", "ordenação completa" e
+#         "cdiranking".
+#
+def bench_ranking(n_ofertas: int = 50000, k: int = 10,
+                  repeticoes: int = 10) -> dict:
+    import numpy as np
+    import cdi
+    import cdiranking
+    rng = np.random.default_rng(2022)
+    catalogo = cdiranking.Catalogo(
+        ["E%d" % j for j in range(n_ofertas)],
+        rng.uniform(80, 130, n_ofertas), rng.integers(1, 121, n_ofertas),
+        rng.random(n_ofertas) < 0.3)
+    horizonte = 36
+    inicio = time.perf_counter()
+    notas = []
+    for j in range(len(catalogo)):
+        prazo = int(catalogo.prazos[j])
+        if prazo > horizonte:
+            continue
+        resultado = cdi.calcula_cdb(1000, 0.1365, 0.1375,
+                                    catalogo.rentabilidades[j],
+                                    catalogo.aliquotas[j], prazo)
+        notas.append((resultado.apl_poup, j))
+    sorted(notas, reverse=True)[:k]
+    tempos = {"laço": time.perf_counter() - inicio}
+
+    def ordenacao_completa():
+        _, valores = catalogo.avalia(1000, 0.1365, 0.1375, horizonte)
+        np.argsort(-valores["diferenca"])[:k]
+
+    tempos["ordenação completa"] = menor_tempo(ordenacao_completa,
+                                               repeticoes)
+    tempos["cdiranking"] = menor_tempo(
+        lambda: catalogo.melhores(1000, 0.1365, 0.1375, horizonte, k),
+        repeticoes)
+    return tempos
+
+
+## Simula o uso interativo (só os meses mudam, de 1 a 360, para cada
+# rentabilidade) e compara calcula_cdb, sem e com o cache de taxas, com
+# cdicenario.Cenario.calcula.
+#
+# @param rentabilidades rentabilidades percorridas.
+# @param repeticoes execuções de cada versão (vale a menor).
+# @return dicionário com os tempos (s) de cada versão, o número de
+#         consultas, o de grupos de Cenario e os contadores do cenário.
+#
+def bench_cenario(rentabilidades=(90, 100, 110, 120),
+                  repeticoes: int = 10) -> dict:
+    import cdi
+    import cdicenario
+    consultas = [(1000, 0.1365, 0.1375, t, None, m)
+                 for t in rentabilidades for m in range(1, 361)]
+
+    def direto():
+        for argumentos in consultas:
+            cdi.calcula_cdb(*argumentos)
+
+    def incremental():
+        cenario = cdicenario.Cenario(*consultas[0])
+        for argumentos in consultas:
+            cenario.calcula(*argumentos)
+        return cenario
+
+    cdi.configura_cache_taxas(0)
+    tempos = {"calcula_cdb sem cache": menor_tempo(direto, repeticoes)}
+    cdi.configura_cache_taxas()
+    tempos["calcula_cdb"] = menor_tempo(direto, repeticoes)
+    tempos["Cenario"] = menor_tempo(incremental, repeticoes)
+    tempos["consultas"] = len(consultas)
+    tempos["grupos"] = len(cdicenario.DERIVADOS)
+    tempos["estatisticas"] = incremental().estatisticas()
+    return tempos
+
+
+## Imprime uma tabela com mínimo e média de cada caso medido.
+#
+# @param resultados dicionário caso -> lista de tempos (s).
+#
+def relatorio(resultados: dict):
+    print("%-16s %10s %10s" % ("caso", "mín (ms)", "média (ms)"))
+    for caso, tempos in resultados.items():
+        print("%-16s %10.2f %10.2f" % (caso, 1000 * min(tempos),
+                                       1000 * sum(tempos) / len(tempos)))
+
+
+## Função principal: executa os benchmarks selecionados.
+#   @param n número de repetições.
+#   @param c número de cenários do benchmark de escalabilidade.
+#   @param w maior número de processos do benchmark de escalabilidade.
+#   @param b cenários por bloco.
+#   @param s arquivo JSON onde salvar as métricas da suíte.
+#   @param r arquivo JSON de referência para comparar a suíte.
+#   @param l variação tolerada, em %, antes de acusar uma regressão.
+#   @param args casos a executar: inicializacao, escala, cache,
+#               equilibrio, coprocesso, varredura, ranking, cenario,
+#               suite.
+#
+def main():
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "n:c:w:b:s:r:l:h",
+                                   ["repeticoes=", "cenarios=",
+                                    "processos=", "bloco=", "salva=",
+                                    "referencia=", "limite=", "help"])
+    except getopt.GetoptError as err:
+        print(err)
+        sys.exit(2)
+    repeticoes = 10
+    cenarios = 200000
+    processos = None
+    bloco = 10000
+    salva = None
+    referencia = None
+    limite = LIMITE_REGRESSAO
+    for o, a in opts:
+        if o in ("-n", "--repeticoes"):
+            repeticoes = int(a)
+        elif o in ("-c", "--cenarios"):
+            cenarios = int(a)
+        elif o in ("-w", "--processos"):
+            processos = int(a)
+        elif o in ("-b", "--bloco"):
+            bloco = int(a)
+        elif o in ("-s", "--salva"):
+            salva = a
+        elif o in ("-r", "--referencia"):
+            referencia = a
+        elif o in ("-l", "--limite"):
+            limite = float(a) / 100
+        elif o in ("-h", "--help"):
+            print("Usage: %s -n [repetições] -c [cenários] -w [processos] "
+                  "-b [bloco] [inicializacao] [escala] [cache] [equilibrio] "
+                  "[coprocesso] [varredura] [ranking] [cenario]"
+                  % sys.argv[0])
+            print("       %s -n [repetições] -s [saida.json] "
+                  "-r [referencia.json] -l [limite %%] suite" % sys.argv[0])
+            sys.exit()
+    casos = args or ["inicializacao"]
+    if "inicializacao" in casos:
+        relatorio(bench_inicializacao(repeticoes))
+        print("\nimport cdi carrega tkinter: %s" % carrega_tkinter("cdi"))
+    if "escala" in casos:
+        print("\n%-10s %16s" % ("processos", "cenários/s"))
+        for trabalhadores, vazao in bench_escalabilidade(
+                cenarios, processos, bloco).items():
+            print("%-10d %16.0f" % (trabalhadores, vazao))
+    if "cache" in casos:
+        tempos = bench_cache(cenarios)
+        print("\nsem cache: %.3f s\ncom cache: %.3f s (%.2fx)\n%s" % (
+            tempos["sem cache"], tempos["com cache"],
+            tempos["sem cache"] / tempos["com cache"],
+            tempos["estatisticas"]))
+    if "equilibrio" in casos:
+        tempos = bench_equilibrio()
+        print("\nvarredura: %.3f s\ncdisolver: %.4f s (%.0fx)" % (
+            tempos["varredura"], tempos["cdisolver"],
+            tempos["varredura"] / tempos["cdisolver"]))
+    if "coprocesso" in casos:
+        print()
+        relatorio(bench_coprocesso(repeticoes))
+    if "varredura" in casos:
+        tempos = bench_varredura()
+        print("\n%d cenários\nlaços: %.3f s\ncdivarredura: %.4f s (%.0fx)" % (
+            tempos["cenarios"], tempos["laços"], tempos["cdivarredura"],
+            tempos["laços"] / tempos["cdivarredura"]))
+    if "ranking" in casos:
+        print()
+        for caso, segundos in bench_ranking(repeticoes=repeticoes).items():
+            print("%-20s %10.2f ms" % (caso, 1000 * segundos))
+    if "cenario" in casos:
+        tempos = bench_cenario(repeticoes=repeticoes)
+        consultas = tempos.pop("consultas")
+        grupos = tempos.pop("grupos")
+        estatisticas = tempos.pop("estatisticas")
+        print("\n%d consultas" % consultas)
+        for caso, segundos in tempos.items():
+            print("%-22s %10.2f ms" % (caso, 1000 * segundos))
+        print("grupos de valores: %d calculados, %d preservados "
+              "(calcula_cdb: %d)" % (
+                  estatisticas["calculados"], estatisticas["preservados"],
+                  consultas * grupos))
+    if "suite" in casos:
+        metricas = suite(repeticoes)
+        base = {}
+        if referencia:
+            with open(referencia, encoding="utf-8") as arquivo:
+                base = json.load(arquivo)
+        relatorio_suite(metricas, base)
+        if salva:
+            with open(salva, "w", encoding="utf-8") as arquivo:
+                json.dump(metricas, arquivo, indent=2, ensure_ascii=False)
+        piores = regressoes(metricas, base, limite)
+        for nome, anterior, atual, variacao in piores:
+            print("regressão: %s %.2f -> %.2f (%+.1f%%)" % (
+                nome, anterior, atual, 100 * variacao), file=sys.stderr)
+        if piores:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_Carga_CDI
+#
+#  Gerador de carga para o servidor de cdi.py (--servidor).
+#
+#  Abre várias conexões simultâneas, cada uma enviando requisições
+#  POST /cdb em sequência, e mede a latência de cada requisição e a vazão
+#  total. Ao final imprime também os contadores do servidor
+#  (GET /estatisticas).
+#
+#  @author Luan Bernardo Dias
+#  @since 09/10/2022
+#  @see https://docs.python.org/3/library/asyncio-stream.html
+#
+import asyncio
+import getopt
+import json
+import random
+import sys
+import time
+
+
+## Abre uma conexão com o servidor.
+#
+# @param endereco "host:porta", ":porta" ou "unix:/caminho/do/socket".
+# @return par (StreamReader, StreamWriter).
+#
+async def conecta(endereco: str):
+    if endereco.startswith("unix:"):
+        return await asyncio.open_unix_connection(endereco[5:])
+    host, _, porta = endereco.rpartition(":")
+    return await asyncio.open_connection(host or "127.0.0.1", int(porta))
+
+
+## Envia uma requisição HTTP/1.1 em uma conexão aberta e lê a resposta.
+#
+# @param leitor StreamReader da conexão.
+# @param escritor StreamWriter da conexão.
+# @param metodo "GET" ou "POST".
+# @param caminho caminho pedido.
+# @param corpo objeto enviado como JSON (None para nenhum corpo).
+# @return par (status, objeto JSON da resposta).
+#
+async def requisicao(leitor, escritor, metodo: str, caminho: str,
+                     corpo=None):
+    dados = b"" if corpo is None else json.dumps(corpo).encode()
+    escritor.write(b"%s %s HTTP/1.1\r\nHost: cdi\r\nContent-Type: "
+                   b"application/json\r\nContent-Length: %d\r\n\r\n%s" % (
+                       metodo.encode(), caminho.encode(), len(dados), dados))
+    await escritor.drain()
+    status = int((await leitor.readline()).split()[1])
+    tamanho = 0
+    while True:
+        linha = await leitor.readline()
+        if linha in (b"\r\n", b"\n", b""):
+            break
+        nome, _, valor = linha.decode("latin-1").partition(":")
+        if nome.strip().lower() == "content-length":
+            tamanho = int(valor)
+    return status, json.loads(await leitor.readexactly(tamanho))
+
+
+## Sorteia um cenário no formato do corpo de POST /cdb.
+#
+# @param rng gerador de números aleatórios.
+# @return dicionário com os campos do cenário.
+#
+def cenario(rng: random.Random) -> dict:
+    return {"capital": round(rng.uniform(100, 1e6), 2),
+            "aplicacao": round(rng.uniform(0.02, 0.15), 4),
+            "selic": round(rng.uniform(0.02, 0.15), 4),
+            "rentabilidade": round(rng.uniform(80, 130), 1),
+            "imposto": rng.choice((0, 15, 17.5, 20, 22.5, "auto")),
+            "meses": rng.randint(1, 360)}
+
+
+## Uma conexão enviando requisições em sequência.
+#
+# @param endereco endereço do servidor.
+# @param n número de requisições.
+# @param semente semente do sorteio dos cenários.
+# @return lista de latências, em segundos.
+#
+async def cliente(endereco: str, n: int, semente: int) -> list:
+    rng = random.Random(semente)
+    leitor, escritor = await conecta(endereco)
+    latencias = []
+    for _ in range(n):
+        inicio = time.perf_counter()
+        status, _ = await requisicao(leitor, escritor, "POST", "/cdb",
+                                     cenario(rng))
+        latencias.append(time.perf_counter() - inicio)
+        if status != 200:
+            raise RuntimeError("status %d" % status)
+    escritor.close()
+    return latencias
+
+
+## Roda a carga e coleta as estatísticas do servidor.
+#
+# @param endereco endereço do servidor.
+# @param conexoes número de conexões simultâneas.
+# @param requisicoes requisições por conexão.
+# @return tupla (latências, segundos, estatísticas do servidor).
+#
+async def carga(endereco: str, conexoes: int, requisicoes: int) -> tuple:
+    inicio = time.perf_counter()
+    listas = await asyncio.gather(*(cliente(endereco, requisicoes, k)
+                                    for k in range(conexoes)))
+    decorrido = time.perf_counter() - inicio
+    leitor, escritor = await conecta(endereco)
+    _, estatisticas = await requisicao(leitor, escritor, "GET",
+                                       "/estatisticas")
+    escritor.close()
+    return [t for lista in listas for t in lista], decorrido, estatisticas
+
+
+## Função principal.
+#   @param e endereço do servidor (padrão :8022).
+#   @param n conexões simultâneas.
+#   @param r requisições por conexão.
+#
+def main():
+    try:
+        opts, _ = getopt.getopt(sys.argv[1:], "e:n:r:h",
+                                ["endereco=", "conexoes=", "requisicoes=",
+                                 "help"])
+    except getopt.GetoptError as err:
+        print(err)
+        sys.exit(2)
+    endereco = ":8022"
+    conexoes = 50
+    requisicoes = 200
+    for o, a in opts:
+        if o in ("-e", "--endereco"):
+            endereco = a
+        elif o in ("-n", "--conexoes"):
+            conexoes = int(a)
+        elif o in ("-r", "--requisicoes"):
+            requisicoes = int(a)
+        elif o in ("-h", "--help"):
+            print("Usage: %s -e [host:porta|unix:/caminho] -n [conexões] "
+                  "-r [requisições por conexão]" % sys.argv[0])
+            sys.exit()
+    latencias, decorrido, estatisticas = asyncio.run(
+        carga(endereco, conexoes, requisicoes))
+    latencias.sort()
+    print("requisições: %d em %.2f s = %.0f/s" % (
+        len(latencias), decorrido, len(latencias) / decorrido))
+    print("latência (ms): p50 %.2f  p99 %.2f  máx %.2f" % (
+        1000 * latencias[len(latencias) // 2],
+        1000 * latencias[min(len(latencias) - 1,
+                             int(0.99 * len(latencias)))],
+        1000 * latencias[-1]))
+    print("servidor: %s" % json.dumps(estatisticas, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -12,14 +12,13 @@
 # @since 09/10/2022
 # @see https://luandiasrj.github.io/dev/
 # 
+import functools
 import getopt
+import itertools
 import math
+import os
 import sys
-
-if sys.version_info[0] == 3:
-    import tkinter as tk
-else:
-    import Tkinter as tk
+from typing import NamedTuple
 
 
 ## Juros compostos.
@@ -136,6 +135,44 @@ def imposto(fv: float, capital: float, taxa: float) -> float:
     return (fv - capital) * taxa / 100
 
 
+## Dias corridos considerados por mês de aplicação ao derivar a alíquota
+# do prazo (6 meses = 180 dias, como nas faixas da tabela regressiva).
+DIAS_POR_MES = 30
+
+## Tabela regressiva do IR: (último dia da faixa, alíquota %); a última
+# faixa não tem limite.
+FAIXAS_IR = ((180, 22.5), (360, 20.0), (720, 17.5), (None, 15.0))
+
+## Alíquota de IR para cada prazo em dias, de 0 a 721 (o último valor vale
+# para qualquer prazo maior).
+TABELA_IR = tuple(next(aliquota for limite, aliquota in FAIXAS_IR
+                       if limite is None or dias <= limite)
+                  for dias in range(722))
+
+## Alíquota regressiva do IOF (% do rendimento) para resgates com 0 a 29
+# dias corridos; a partir de 30 dias o IOF é zero.
+TABELA_IOF = (100, 96, 93, 90, 86, 83, 80, 76, 73, 70, 66, 63, 60, 56, 53,
+              50, 46, 43, 40, 36, 33, 30, 26, 23, 20, 16, 13, 10, 6, 3)
+
+
+## Alíquota de IR pela tabela regressiva.
+#
+# @param dias prazo da aplicação em dias corridos.
+# @return alíquota do imposto de renda (%).
+#
+def aliquota_ir(dias: int) -> float:
+    return TABELA_IR[min(dias, len(TABELA_IR) - 1)]
+
+
+## Alíquota do IOF sobre o rendimento pela tabela regressiva.
+#
+# @param dias prazo da aplicação em dias corridos.
+# @return alíquota do IOF (%).
+#
+def aliquota_iof(dias: int) -> float:
+    return TABELA_IOF[dias] if dias < len(TABELA_IOF) else 0.0
+
+
 ## Calcula o valor da futuro da aplicação.
 #
 # @param capital capital inicial.
@@ -147,8 +184,192 @@ def aplicacao(capital: float, taxa: float, periodo: int) -> float:
     return capital * (1 + taxa) ** periodo
 
 
+## Resultado de um cálculo de CDB, com os 16 valores nomeados.
+# Por ser uma tupla, também pode ser desempacotado na ordem antiga.
+#
+class ResultadoCDB(NamedTuple):
+    cdi_ao_mes: float
+    cdi_ao_dia: float
+    poupanca_ao_ano: float
+    poupanca_ao_mes: float
+    rentabilidade_ao_ano: float
+    cdi_com_impostos: float
+    rent_com_imp: float
+    aplicacaocomimposto: float
+    poupanca: float
+    apl_poup: float
+    imposto_val: float
+    rendimento_total_perc: float
+    rendimentocomimposto: float
+    apl_equal_poup: float
+    tempo_poup: float
+    tempo_aplic: float
+
+
+## Nomes dos 16 valores retornados por CDB, na ordem da tupla.
+CAMPOS_CDB = ResultadoCDB._fields
+
+
+## Taxas derivadas de um cenário, que só dependem das taxas de entrada
+# (e não do capital nem do prazo).
+#
+class TaxasCDB(NamedTuple):
+    cdi_ao_mes: float
+    cdi_ao_dia: float
+    poupanca_ao_ano: float
+    poupanca_ao_mes: float
+    rentabilidade_ao_ano: float
+    cdi_com_impostos: float
+    rent_com_imp: float
+    taxa_mensal_aplicacao: float
+    taxa_mensal_poupanca: float
+    apl_equal_poup: float
+    tempo_poup: float
+    tempo_aplic: float
+
+
+## Número máximo de combinações de taxas mantidas no cache.
+TAMANHO_CACHE_TAXAS = 1024
+
+
+## Calcula as taxas derivadas de um cenário, sem cache.
+#
+# @param cdi taxa cdi anual
+# @param p taxa poupança anual = 0.70 * selic
+# @param t rentabilidade da aplicação em função do CDI
+# @param i alíquota do imposto de renda
+# @return TaxasCDB.
+#
+def calcula_taxas(cdi: float, p: float, t: float, i: float) -> TaxasCDB:
+    cdi_calculado = t * cdi
+    cdi_com_impostos = t - (t * i / 100)
+    cdi_com_impostos_cem_porcento = (1 - (
+            1 * i / 100)) * cdi  # Fórmula para gerar número mágico "Apl =
+    # Poup ="
+    poupanca = jurospoupanca(p)
+    poupanca_ao_mes = year2month(poupanca)
+    rent_com_imp = cdi_com_impostos * cdi
+    return TaxasCDB(year2month(cdi), month2day(cdi), poupanca * 100,
+                    poupanca_ao_mes, cdi_calculado, cdi_com_impostos,
+                    rent_com_imp, year2month(cdi_calculado / 100) / 100,
+                    poupanca_ao_mes / 100,
+                    poupanca * 100 / cdi_com_impostos_cem_porcento,
+                    doublePrincipal(poupanca),
+                    doublePrincipal(rent_com_imp / 100))
+
+
+## Versão de calcula_taxas com cache LRU, usada por calcula_cdb.
+taxas_cdb = functools.lru_cache(maxsize=TAMANHO_CACHE_TAXAS)(calcula_taxas)
+
+
+## Recria o cache de taxas com um novo limite de tamanho, descartando o
+# conteúdo atual.
+#
+# @param tamanho número máximo de combinações; 0 desativa o cache e None
+#                o deixa sem limite.
+#
+def configura_cache_taxas(tamanho: int = TAMANHO_CACHE_TAXAS):
+    global taxas_cdb
+    taxas_cdb = functools.lru_cache(maxsize=tamanho)(calcula_taxas)
+
+
+## Estatísticas do cache de taxas.
+#
+# @return tupla (hits, misses, maxsize, currsize) de functools.
+#
+def estatisticas_cache_taxas():
+    return taxas_cdb.cache_info()
+
+
+## Esvazia o cache de taxas e zera as estatísticas. Deve ser chamada se
+# jurospoupanca ou as conversões de taxa forem alteradas.
+#
+def limpa_cache_taxas():
+    taxas_cdb.cache_clear()
+
+
 ## Calcula o montante final , imposto , rendimento e
-# rentabilidade equivalente.
+# rentabilidade equivalente, sem imprimir nada.
+#
+# As taxas derivadas vêm de taxas_cdb, que guarda em cache as combinações
+# de taxas já vistas; só as potências do prazo são calculadas a cada
+# chamada.
+#
+# @param c capital
+# @param cdi taxa cdi anual
+# @param p taxa poupança anual = 0.70 * selic
+# @param t rentabilidade da aplicação em função do CDI
+# @param i alíquota do imposto de renda; None usa a tabela regressiva
+#          para o prazo de m meses.
+# @param m meses
+# @return ResultadoCDB com os valores calculados.
+#
+def calcula_cdb(c: float, cdi: float, p: float, t: float, i: float,
+                m: int = 1) -> ResultadoCDB:
+    if i is None:
+        i = aliquota_ir(DIAS_POR_MES * m)
+    taxas = taxas_cdb(cdi, p, t, i)
+    valor_aplicacao = valorfuturo(c, taxas.taxa_mensal_aplicacao, m)
+    imposto_val = imposto(valor_aplicacao, c, i)
+    aplicacaocomimposto = valor_aplicacao - imposto_val
+    poupanca = valorfuturo(c, taxas.taxa_mensal_poupanca, m)
+    apl_poup = aplicacaocomimposto - poupanca
+    rendimentocomimposto = apl_poup / c * 100
+    rendimento_total_perc = ((aplicacaocomimposto - c) / c * 100)
+
+    return ResultadoCDB(taxas.cdi_ao_mes, taxas.cdi_ao_dia,
+                        taxas.poupanca_ao_ano, taxas.poupanca_ao_mes,
+                        taxas.rentabilidade_ao_ano, taxas.cdi_com_impostos,
+                        taxas.rent_com_imp, aplicacaocomimposto, poupanca,
+                        apl_poup, imposto_val, rendimento_total_perc,
+                        rendimentocomimposto, taxas.apl_equal_poup,
+                        taxas.tempo_poup, taxas.tempo_aplic)
+
+
+## Monta o relatório de texto de um cálculo de CDB, o mesmo impresso por
+# CDB e pela linha de comando.
+#
+# @param c capital
+# @param cdi taxa cdi anual
+# @param p taxa poupança anual = 0.70 * selic
+# @param t rentabilidade da aplicação em função do CDI
+# @param i alíquota do imposto de renda
+# @param m meses
+# @param r ResultadoCDB retornado por calcula_cdb.
+# @return texto do relatório.
+#
+def relatorio_cdb(c: float, cdi: float, p: float, t: float, i: float,
+                  m: int, r: ResultadoCDB) -> str:
+    linhas = [
+        "\nCapital = $%.2f" % c,
+        "Taxa Selic = %.2f%%" % to_percent(p),
+        "CDI = %.2f%% ao ano = %.4f%% ao mês = %.6f%% ao dia" % (
+            to_percent(cdi), r.cdi_ao_mes, r.cdi_ao_dia),
+        "Taxa Poup = %.2f%% ao ano = %.4f%% ao mês" % (
+            r.poupanca_ao_ano, r.poupanca_ao_mes),
+        "\nIR = %.1f%%" % i,
+        "\nRentabilidade = %.1f%% CDI = %.2f%%" % (
+            t, r.rentabilidade_ao_ano),
+        "Com impostos = %.2f%% CDI = %.2f%%" % (
+            r.cdi_com_impostos, r.rent_com_imp),
+        "\nMeses = %d" % m,
+        "\nMontante Aplicação = $ %.2f" % r.aplicacaocomimposto,
+        "Montante Poupança = $%.2f" % r.poupanca,
+        "Apl - Poup (%d meses) = $%.2f" % (m, r.apl_poup),
+        "Imposto = $%.4f" % r.imposto_val,
+        "Rendimento em %d meses = %.4f%%" % (m, r.rendimento_total_perc),
+        "\nApl - Poup (%d meses) = %.4f%%" % (m, r.rendimentocomimposto),
+        "Apl = Poup = %.2f%% CDI" % r.apl_equal_poup,
+        "Tempo 2 x Poupança = %.2f anos = %.2f meses" % (
+            r.tempo_poup, r.tempo_poup * 12),
+        "Tempo 2 x Aplicação = %.2f anos = %.2f meses" % (
+            r.tempo_aplic, r.tempo_aplic * 12),
+    ]
+    return "\n".join(linhas)
+
+
+## Calcula o montante final , imposto , rendimento e
+# rentabilidade equivalente, e imprime o relatório.
 #
 # @param c capital
 # @param cdi taxa cdi anual
@@ -166,414 +387,192 @@ def aplicacao(capital: float, taxa: float, periodo: int) -> float:
 #       - rentabilidade para igualar poupança (%) CDI
 #
 def CDB(c: float, cdi: float, p: float, t: float, i: float,
-        m: int = 1) -> float:
-    # ... Essa deve ser implementada por você ...
-    cdi_calculado = t * cdi
-    cdi_com_impostos = t - (t * i / 100)
-    cdi_com_impostos_cem_porcento = (1 - (
-            1 * i / 100)) * cdi  # Fórmula para gerar número mágico "Apl =
-    # Poup ="
-    taxamensal = year2month(cdi_calculado / 100) / 100
-    valor_aplicacao = valorfuturo(c, taxamensal, m)
-    aplicacaocomimposto = valor_aplicacao - imposto(valor_aplicacao, c, i)
-    poupanca = valorfuturo(c, year2month(jurospoupanca(p)) / 100, m)
-    rendimentocomimposto = (aplicacaocomimposto - poupanca) / c * 100
-
-    cdi_ao_mes = year2month(cdi)
-    cdi_ao_dia = month2day(cdi)
-    poupanca_ao_ano = jurospoupanca(p) * 100
-    poupanca_ao_mes = year2month(jurospoupanca(p))
-    rentabilidade_ao_ano = cdi_calculado
-    rent_com_imp = cdi_com_impostos * cdi
+        m: int = 1) -> ResultadoCDB:
+    resultados = calcula_cdb(c, cdi, p, t, i, m)
+    print(relatorio_cdb(c, cdi, p, t, i, m, resultados))
+    return resultados
 
-    apl_poup = aplicacaocomimposto - poupanca
-    imposto_val = imposto(valor_aplicacao, c, i)
-    rendimento_total_perc = ((aplicacaocomimposto - c) / c * 100)
-    apl_equal_poup = (jurospoupanca(p) * 100 / cdi_com_impostos_cem_porcento)
-
-    tempo_poup = (doublePrincipal(jurospoupanca(p)),
-                  doublePrincipal(jurospoupanca(p)) * 12)
-    tempo_aplic = (doublePrincipal(rent_com_imp / 100),
-                   doublePrincipal(rent_com_imp / 100) * 12)
-
-    print("\nCapital = $%.2f" % c * 1)
-    print("Taxa Selic = %.2f%%" % to_percent(p))
-    print("CDI = %.2f%% ao ano = %.4f%% ao mês = %.6f%% ao dia" % (
-        to_percent(cdi), year2month(cdi), month2day(cdi)))
-    print("Taxa Poup = %.2f%% ao ano = %.4f%% ao mês" % (
-        jurospoupanca(p) * 100, year2month(jurospoupanca(p))))
-
-    print("\nIR = %.1f%%" % i)
-
-    print("\nRentabilidade = %.1f%% CDI = %.2f%%" % (t, cdi_calculado))
-    print("Com impostos = %.2f%% CDI = %.2f%%" % (
-        cdi_com_impostos, rent_com_imp))
-
-    print("\nMeses = %d" % m)
-
-    print("\nMontante Aplicação = $ %.2f" % aplicacaocomimposto)
-    print("Montante Poupança = $%.2f" % poupanca)
-    print("Apl - Poup (%d meses) = $%.2f" %
-          (m, apl_poup))
-    print("Imposto = $%.4f" % imposto_val)
-    print("Rendimento em %d meses = %.4f%%" % (
-        m, rendimento_total_perc))
-
-    print("\nApl - Poup (%d meses) = %.4f%%" % (m, rendimentocomimposto))
-    print("Apl = Poup = %.2f%% CDI" % apl_equal_poup)
-    print("Tempo 2 x Poupança = %.2f anos = %.2f meses" % tempo_poup)
-    print("Tempo 2 x Aplicação = %.2f anos = %.2f meses" % tempo_aplic)
-
-    # Retorna os valores calculados
-    resultados = (cdi_ao_mes, cdi_ao_dia, poupanca_ao_ano, poupanca_ao_mes,
-                  rentabilidade_ao_ano, cdi_com_impostos, rent_com_imp,
-                  aplicacaocomimposto, poupanca, apl_poup, imposto_val,
-                  rendimento_total_perc, rendimentocomimposto, apl_equal_poup,
-                  tempo_poup[0], tempo_aplic[0])
 
-    return resultados
+## Saldo de um mês da evolução de um CDB.
+#
+class MesCDB(NamedTuple):
+    mes: int
+    aplicacao: float
+    poupanca: float
+    imposto: float
+    diferenca: float
 
 
-## Classe construtora da janela com os campos de entrada Capital, Taxa Selic,
-# Taxa CDI etc.
-#
-class Application(tk.Frame):
-    ##
-    # Método construtor da classe Tkinter
-    #
-    def __init__(self, master=None):
-        super().__init__(master)
-        self.pack()
-        self.create_widgets()
-
-    ##
-    # Função que desenha a janela principal e seus widgets
-    #
-    def create_widgets(self):
-        espace = 5
-        bgclr = 'antiquewhite'
-        self.master.title("Cálculo de CDB - AD2 - 2022.2")
-
-        # Criação dos campos de entrada
-        texto_titulo = "CDBs, LCIs e LCAs indexadas por\nCertificados de " \
-                       "Depósitos Interbancários "
-        fonte_titulo = ("Arial", 12, "bold")
-
-        # Make a fieldset with a legend and button inside
-        self.fieldset = tk.LabelFrame(self, text=texto_titulo, bg="#CABAA8",
-                                      font=fonte_titulo, labelanchor="n")
-        self.fieldset.pack(padx=10, pady=10)
-
-        # Make a label for title and pack it into the fieldset frame, top,
-        # backgroud color orange and font size and bold
-        self.title = tk.Label(self.master, text=texto_titulo,
-                              bg="#ff6347", font=fonte_titulo,
-                              highlightbackground='lightblue',
-                              highlightthickness=5)
-        # place the label in the top and center of the fieldset
-        self.title.place(relx=0.5, y=30, anchor="center")
-
-        self.title_dummie = tk.Label(self.fieldset, width=50,
-                                     background="#CABAA8")
-        self.title_dummie.pack(padx=10)
-
-        # Make a frame to hold the fields
-        self.fields = tk.Frame(self.fieldset, padx=espace, pady=espace,
-                               highlightbackground='lightblue',
-                               highlightthickness=5)
-        self.fields.pack()
-
-        # Make a frame to hold the radio buttons
-        self.radio = tk.Frame(self.fields)
-        self.radio.pack(fill=tk.X, side=tk.BOTTOM)
-        self.radio['bg'] = bgclr
-
-        # Make a frame to hold the labels
-        self.labels = tk.Frame(self.fields)
-        self.labels.pack(side=tk.LEFT, padx=espace, pady=espace)
-
-        # Make a frame to hold the spinboxes
-        self.spinboxes = tk.Frame(self.fields)
-        # Pack the spinboxes to the right of the labels
-        self.spinboxes.pack(side=tk.LEFT)
-
-        # Make the row of spinboxes and labels
-        self.row1 = tk.Frame(self.spinboxes)
-        self.row2 = tk.Frame(self.spinboxes)
-        self.row3 = tk.Frame(self.spinboxes)
-        self.row4 = tk.Frame(self.spinboxes)
-        self.row5 = tk.Frame(self.spinboxes)
-        self.row1.pack(fill=tk.X, padx=espace, pady=espace)
-        self.row2.pack(fill=tk.X, padx=espace, pady=espace)
-        self.row3.pack(fill=tk.X, padx=espace, pady=espace)
-        self.row4.pack(fill=tk.X, padx=espace, pady=espace)
-        self.row5.pack(fill=tk.X, padx=espace, pady=espace)
-
-        # Make the labels
-        self.label1 = tk.Label(self.labels, text="Capital:", anchor='w')
-        self.label2 = tk.Label(self.labels, text="Taxa Selic:", anchor='w')
-        self.label3 = tk.Label(self.labels, text="Taxa CDI:", anchor='w')
-        self.label4 = tk.Label(self.labels, text="Rentabilidade:", anchor='w')
-        self.label5 = tk.Label(self.labels, text="Meses:", anchor='w')
-        self.label6 = tk.Label(self.label1, text="$", anchor='w')
-        self.label7 = tk.Label(self.row2, text="% ano")
-        self.label8 = tk.Label(self.row3, text="% ano")
-        self.label9 = tk.Label(self.row4, text="% CDI")
-
-        # Default values for the spinboxes
-        capital = tk.StringVar()
-        capital.set("1000")
-        taxa_selic = tk.StringVar()
-        taxa_selic.set("13.75")
-        taxa_cdi = tk.StringVar()
-        taxa_cdi.set("13.65")
-        rentabilidade = tk.StringVar()
-        rentabilidade.set("100")
-        meses = tk.StringVar()
-        meses.set("1")
-
-        # Make the spinboxes with default values
-        self.spinbox1 = tk.Spinbox(
-            self.row1, from_=0, to=1000000000, increment=0.01,
-            textvariable=capital, width=12)
-        self.spinbox2 = tk.Spinbox(
-            self.row2, from_=0, to=1000, increment=0.01,
-            textvariable=taxa_selic, width=8)
-        self.spinbox3 = tk.Spinbox(
-            self.row3, from_=0, to=1000, increment=0.01, textvariable=taxa_cdi,
-            width=8)
-        self.spinbox4 = tk.Spinbox(
-            self.row4, from_=0, to=1000, increment=0.01,
-            textvariable=rentabilidade, width=6)
-        self.spinbox5 = tk.Spinbox(
-            self.row5, from_=0, to=1000, increment=1, textvariable=meses,
-            width=6)
-
-        # pack the labels
-        self.label1.pack(fill=tk.X, padx=espace, pady=espace)
-        self.label2.pack(fill=tk.X, padx=espace, pady=espace)
-        self.label3.pack(fill=tk.X, padx=espace, pady=espace)
-        self.label4.pack(fill=tk.X, padx=espace, pady=espace)
-        self.label5.pack(fill=tk.X, padx=espace, pady=espace)
-        self.label6.pack(side=tk.RIGHT)  # $
-
-        # pack the spinboxes
-        self.spinbox1.pack(side=tk.LEFT)
-        self.spinbox2.pack(side=tk.LEFT)
-        self.spinbox3.pack(side=tk.LEFT)
-        self.spinbox4.pack(side=tk.LEFT)
-        self.spinbox5.pack(side=tk.LEFT)
-        self.label7.pack(side=tk.LEFT)  # % ano
-        self.label8.pack(side=tk.LEFT)  # % ano
-        self.label9.pack(side=tk.LEFT)  # % CDI
-
-        # Make a fieldset with a legend and radio buttons inside
-        self.fieldset2 = tk.LabelFrame(self.radio, text="Alíquota IR:")
-        self.fieldset2.pack(side=tk.LEFT, padx=espace, pady=espace)
-
-        # Format the fieldset without border and transparent background
-        self.fieldset2['bd'] = 0
-
-        # Make a frame to hold the radio buttons
-        self.radio = tk.Frame(self.fieldset2)
-        self.radio.pack(side=tk.BOTTOM)
-
-        # variables for radio buttons
-        self.ir = tk.DoubleVar()
-        self.ir.set(0)
-
-        # Make a fieldset with a legend and radio buttons inside
-
-        self.radio1 = tk.Radiobutton(
-            self.radio, text="0.0 (LCA ou LCI)", variable=self.ir, value=0,
-            anchor='w')
-        self.radio2 = tk.Radiobutton(
-            self.radio, text="15.0 (acima de 721 dias)", variable=self.ir,
-            value=15.0, anchor='w')
-        self.radio3 = tk.Radiobutton(
-            self.radio, text="17.5 (de 361 até 720 dias)", variable=self.ir,
-            value=17.5, anchor='w')
-        self.radio4 = tk.Radiobutton(
-            self.radio, text="20.0 (de 181 até 360 dias)", variable=self.ir,
-            value=20.0, anchor='w')
-        self.radio5 = tk.Radiobutton(
-            self.radio, text="22.5 (até 180 dias)", variable=self.ir,
-            value=22.5, anchor='w')
-
-        # pack the radio buttons
-
-        self.radio1.pack(fill=tk.X, padx=10, pady=espace)
-        self.radio2.pack(fill=tk.X, padx=10, pady=espace)
-        self.radio3.pack(fill=tk.X, padx=10, pady=espace)
-        self.radio4.pack(fill=tk.X, padx=10, pady=espace)
-        self.radio5.pack(fill=tk.X, padx=10, pady=espace)
-
-        # Make a button to calculate the results, red text,
-        # background #f8fad7, hover color #fadad7
-        self.button = tk.Button(
-            self.fieldset, text="Calcular", command=self.calculate,
-            bg="#f8fad7")
-        self.button.pack(side=tk.BOTTOM, padx=espace, pady=espace)
-
-        # Make the button text red
-        self.button["fg"] = "red"
-
-        # Make the button groove
-        self.button["relief"] = "groove"
-        self.button["borderwidth"] = 2
-
-        # Make the button change color when the mouse is over it
-        self.button.bind("<Enter>", self.on_enter)
-        self.button.bind("<Leave>", self.on_leave)
-
-        # Format all background colors of the window
-        self.fields['bg'] = bgclr
-        self.fieldset2['bg'] = bgclr
-        self.spinboxes['bg'] = bgclr
-        self.radio['bg'] = bgclr
-        self.labels['bg'] = bgclr
-        self.row1['bg'] = bgclr
-        self.row2['bg'] = bgclr
-        self.row3['bg'] = bgclr
-        self.row4['bg'] = bgclr
-        self.row5['bg'] = bgclr
-        self.label1['bg'] = bgclr
-        self.label2['bg'] = bgclr
-        self.label3['bg'] = bgclr
-        self.label4['bg'] = bgclr
-        self.label5['bg'] = bgclr
-        self.label6['bg'] = bgclr
-        self.label7['bg'] = bgclr
-        self.label8['bg'] = bgclr
-        self.label9['bg'] = bgclr
-        self.radio1['bg'] = bgclr
-        self.radio2['bg'] = bgclr
-        self.radio3['bg'] = bgclr
-        self.radio4['bg'] = bgclr
-        self.radio5['bg'] = bgclr
-        self.fieldset2['bg'] = bgclr
-
-    ## Muda a cor do botão quando o mouse está em cima dele
-    #
-    def on_enter(self, event):
-        self.button["bg"] = "#fadad7"
-
-    ## Muda a cor do botão quando o mouse sai de cima dele
-    #
-    def on_leave(self, event):
-        self.button["bg"] = "#f8fad7"
-
-    ## Essa função tem como objetivo criar uma nova janela com o resultado
-    # dos cálculos de juros solicitados
-    #
-    def calculate(self):
-        font = ("Times", "12", "bold")
-        padding_ = 10
-        border = 8
-
-        # Minimize the main window
-        self.master.withdraw()
-
-        # Get the values from the spinboxes
-        valor_investido = float(self.spinbox1.get())
-        taxa_selic = float(self.spinbox2.get())
-        taxa_cdi = float(self.spinbox3.get())
-        rentabilidade = float(self.spinbox4.get())
-        meses = int(self.spinbox5.get())
-
-        # Get the value from the radio buttons
-        ir = self.ir.get()
-
-        # Calculate the results
-        # capital, aplicacao_opt, selic, rentabilidade, imposto_opt, meses
-        cdi_ao_mes, cdi_ao_dia, poupanca_ao_ano, poup_ao_mes, rent_ao_ano, \
-        rent_com_IR, rent_com_impostos, aplc_com_imp, poup, apl_poup, imp_val, \
-        rend_total_perc, rend_com_imp, apl_eq_poup, temp_poup, temp_apli = CDB(
-            valor_investido, taxa_cdi * 0.01, taxa_selic * 0.01, rentabilidade,
-            ir, meses)
-
-        # Create a new window to show the results
-        self.results = tk.Toplevel(self)
-        self.results.title("Resultado")
-
-        # Creat 3 containers to hold the results
-        cointeiner1 = tk.Frame(self.results, padx=padding_, pady=padding_)
-        cointeiner1.pack()
-        cointeiner2 = tk.Frame(cointeiner1)
-        cointeiner2.pack()
-        cointeiner3 = tk.Frame(self.results, padx=padding_, pady=padding_,
-                               highlightthickness=border,
-                               highlightbackground="red")
-        cointeiner3.pack()
-
-        lbl = tk.Label(cointeiner2, text="Capital: $%.2f\nTaxa Selic: %.2f%% "
-                                         "ao ano\nCDI: %.2f%% ao ano = %.4f%% "
-                                         "ao mês = %.6f%% ao dia\nTaxa "
-                                         "Poupança: %.2f%% ao ano = %.4f%% ao "
-                                         "mês\n\nIR: %.2f%%\n\nRentabilidade: "
-                                         "%.1f%% CDI = %.2f%% ao ano\nCom "
-                                         "impostos: %.2f%% CDI = %.2f%% ao "
-                                         "ano\n\nMeses: %d" % (
-                                             valor_investido, taxa_selic,
-                                             taxa_cdi, cdi_ao_mes, cdi_ao_dia,
-                                             poupanca_ao_ano, poup_ao_mes,
-                                             ir, rentabilidade, rent_ao_ano,
-                                             rent_com_IR, rent_com_impostos,
-                                             meses),
-                       font=font, justify=tk.LEFT)
-        lbl["font"] = font
-        lbl["highlightthickness"] = border
-        lbl["highlightbackground"] = "green"
-        lbl["pady"] = padding_
-        lbl["padx"] = padding_
-
-        # pack the label left
-        lbl.pack(side=tk.LEFT)
-
-        lbl2 = tk.Label(
-            cointeiner2, text="Montante Aplicação = $%.2f\nMontante Poupança "
-                              "= $%.2f\nApl - Poup (%d meses) = "
-                              "$%.2f\nImposto = $%.4f\nRendimento em %d meses "
-                              "= %.4f%%" % (aplc_com_imp, poup, meses,
-                                            apl_poup, imp_val, meses,
-                                            rend_total_perc), font=font,
-            justify=tk.LEFT)
-        lbl2["font"] = font
-        lbl2["highlightthickness"] = border
-        lbl2["highlightbackground"] = "blue"
-        lbl2["pady"] = padding_
-        lbl2["padx"] = padding_
-
-        lbl2.pack(side=tk.LEFT, padx=padding_)
-
-        lbl3 = tk.Label(
-            cointeiner3, text="Apl - Poup (%d meses) = %.4f%%\nApl ≍ Poup = "
-                              "%.2f%% CDI\nTempo 2 × Poupança = %.2f "
-                              "anos\nTempo 2 × Aplicação ≍ %.2f anos" % (
-                                  meses, rend_com_imp, apl_eq_poup, temp_poup,
-                                  temp_apli),
-            font=font, justify=tk.LEFT)
-        lbl3["font"] = font
-        lbl3.pack()
-
-        # Create a button to return to the main window
-        self.button2 = tk.Button(
-            self.results, text="Voltar", command=self.back)
-        self.button2.pack(padx=padding_, pady=padding_)
-
-        # Listen for the close event
-        self.results.protocol("WM_DELETE_WINDOW", self.back)
-
-    ## Função que retorna a janela principal
-    #
-    def back(self):
-        self.results.destroy()
-        self.master.deiconify()
-
-
-app = Application()
-# do not allow resizing the GUI
-app.master.resizable(False, False)
+## Gera a evolução mês a mês de uma aplicação e da poupança.
+#
+# Os fatores de cada mês são obtidos multiplicando o fator do mês anterior
+# pela taxa mensal (produto acumulado), em vez de recalcular as conversões
+# de taxa e a potência para cada mês. O gerador é preguiçoso: com
+# meses=None a sequência é infinita e pode ser consumida aos poucos.
+#
+# @param c capital
+# @param cdi taxa cdi anual
+# @param p taxa poupança anual = 0.70 * selic
+# @param t rentabilidade da aplicação em função do CDI
+# @param i alíquota do imposto de renda; None aplica, em cada mês, a
+#          alíquota da tabela regressiva para aquele prazo.
+# @param meses último mês gerado; None para não parar.
+# @return gerador de MesCDB para os meses 1, 2, ..., meses.
+#
+def evolucao_cdb(c: float, cdi: float, p: float, t: float, i: float,
+                 meses: int = None):
+    automatico = i is None
+    taxas = taxas_cdb(cdi, p, t, 0.0 if automatico else i)
+    taxa_aplicacao = 1 + taxas.taxa_mensal_aplicacao
+    taxa_poupanca = 1 + taxas.taxa_mensal_poupanca
+    fator_aplicacao = fator_poupanca = 1.0
+    contador = itertools.count(1) if meses is None else range(1, meses + 1)
+    for mes in contador:
+        fator_aplicacao *= taxa_aplicacao
+        fator_poupanca *= taxa_poupanca
+        valor_aplicacao = c * fator_aplicacao
+        if automatico:
+            i = aliquota_ir(DIAS_POR_MES * mes)
+        imposto_val = imposto(valor_aplicacao, c, i)
+        aplicacao_liquida = valor_aplicacao - imposto_val
+        poupanca = c * fator_poupanca
+        yield MesCDB(mes, aplicacao_liquida, poupanca, imposto_val,
+                     aplicacao_liquida - poupanca)
+
+
+## Resultado de uma aplicação com aportes (ou resgates) mensais constantes.
+#
+class ResultadoAportes(NamedTuple):
+    aplicado: float
+    montante: float
+    imposto: float
+    aplicacao: float
+    poupanca: float
+    diferenca: float
+
+
+## Faixas da tabela regressiva do IR em meses de aplicação (DIAS_POR_MES
+# dias por mês).
+#
+# @return lista de triplas (primeiro mês, último mês ou None, alíquota).
+#
+def faixas_ir_meses() -> list:
+    faixas, inicio = [], 0
+    for limite, aliquota in FAIXAS_IR:
+        fim = None if limite is None else limite // DIAS_POR_MES
+        faixas.append((inicio, fim, aliquota))
+        inicio = None if fim is None else fim + 1
+    return faixas
+
+
+## Soma da progressão geométrica q^inicio + ... + q^fim.
+#
+# @param q razão.
+# @param inicio primeiro expoente.
+# @param fim último expoente.
+# @return soma (0 se fim < inicio).
+#
+def soma_geometrica(q: float, inicio: int, fim: int) -> float:
+    if fim < inicio:
+        return 0.0
+    if q == 1:
+        return float(fim - inicio + 1)
+    return (q ** (fim + 1) - q ** inicio) / (q - 1)
+
+
+## Valor futuro de um capital inicial mais aportes mensais constantes,
+# feitos ao final de cada mês, pela fórmula fechada da série geométrica.
+# Um aporte negativo representa resgates mensais.
+#
+# @param capital capital inicial.
+# @param aporte valor aportado ao final de cada mês.
+# @param taxa taxa de juros mensal.
+# @param periodo número de meses.
+# @return valor futuro.
+#
+def valorfuturo_aportes(capital: float, aporte: float, taxa: float,
+                        periodo: int) -> float:
+    return (valorfuturo(capital, taxa, periodo)
+            + aporte * soma_geometrica(1 + taxa, 0, periodo - 1))
+
+
+## Imposto de renda sobre um capital inicial mais aportes mensais
+# constantes, calculado lote a lote.
+#
+# Com alíquota fixa, o imposto é a alíquota sobre o rendimento total. Com
+# i=None, cada aporte paga a alíquota do seu próprio prazo; os aportes de
+# uma mesma faixa da tabela regressiva somam uma série geométrica, então o
+# custo não depende do número de meses. Resgates (aporte negativo) são
+# lotes negativos: deixam de render, e de ser tributados, a partir do mês
+# do resgate.
+#
+# @param capital capital inicial.
+# @param aporte valor aportado ao final de cada mês.
+# @param taxa taxa de juros mensal.
+# @param periodo número de meses.
+# @param i alíquota do imposto de renda ou None.
+# @return valor em R$ dos impostos a pagar.
+#
+def imposto_aportes(capital: float, aporte: float, taxa: float,
+                    periodo: int, i: float = None) -> float:
+    if i is not None:
+        return imposto(valorfuturo_aportes(capital, aporte, taxa, periodo),
+                       capital + aporte * periodo, i)
+    total = imposto(valorfuturo(capital, taxa, periodo), capital,
+                    aliquota_ir(DIAS_POR_MES * periodo))
+    # o aporte do mês k tem periodo - k meses, k = 1, ..., periodo
+    for inicio, fim, aliquota in faixas_ir_meses():
+        fim = periodo - 1 if fim is None else min(fim, periodo - 1)
+        if fim < inicio:
+            continue
+        ganho = aporte * (soma_geometrica(1 + taxa, inicio, fim)
+                          - (fim - inicio + 1))
+        total += ganho * aliquota / 100
+    return total
+
+
+## Calcula uma aplicação com aportes (ou resgates) mensais constantes e a
+# poupança com os mesmos aportes.
+#
+# @param c capital inicial
+# @param aporte valor aportado ao final de cada mês (negativo = resgate)
+# @param cdi taxa cdi anual
+# @param p taxa poupança anual = 0.70 * selic
+# @param t rentabilidade da aplicação em função do CDI
+# @param i alíquota do imposto de renda; None tributa cada aporte pela
+#          tabela regressiva do seu prazo.
+# @param m meses
+# @return ResultadoAportes.
+#
+def cdb_aportes(c: float, aporte: float, cdi: float, p: float, t: float,
+                i: float, m: int = 1) -> ResultadoAportes:
+    taxas = taxas_cdb(cdi, p, t, 0.0 if i is None else i)
+    montante = valorfuturo_aportes(c, aporte, taxas.taxa_mensal_aplicacao, m)
+    imposto_val = imposto_aportes(c, aporte, taxas.taxa_mensal_aplicacao, m,
+                                  i)
+    poupanca = valorfuturo_aportes(c, aporte, taxas.taxa_mensal_poupanca, m)
+    aplicacao_liquida = montante - imposto_val
+    return ResultadoAportes(c + aporte * m, montante, imposto_val,
+                            aplicacao_liquida, poupanca,
+                            aplicacao_liquida - poupanca)
+
+
+## Monta o relatório de texto de uma aplicação com aportes mensais.
+#
+# @param aporte valor aportado ao final de cada mês.
+# @param m meses
+# @param r ResultadoAportes retornado por cdb_aportes.
+# @return texto do relatório.
+#
+def relatorio_aportes(aporte: float, m: int, r: ResultadoAportes) -> str:
+    return "\n".join([
+        "\nAporte mensal = $%.2f" % aporte,
+        "Total aplicado = $%.2f" % r.aplicado,
+        "Montante Aplicação com aportes = $ %.2f" % r.aplicacao,
+        "Montante Poupança com aportes = $%.2f" % r.poupanca,
+        "Imposto com aportes = $%.4f" % r.imposto,
+        "Apl - Poup com aportes (%d meses) = $%.2f" % (m, r.diferenca),
+    ])
 
 
 ## Função principal que recebe os parâmetros e chama a função CDB e imprime
@@ -582,15 +581,24 @@ app.master.resizable(False, False)
 #   @param cdi taxa cdi anual.
 #   @param p taxa poupança anual = 0.70 * selic.
 #   @param t rentabilidade da aplicação em função do CDI.
-#   @param i alíquota do imposto de renda.
+#   @param i alíquota do imposto de renda ou "auto" (tabela regressiva).
 #   @param m meses.
+#   @param aporte aporte mensal (negativo = resgate mensal).
+#   @param l arquivo de cenários (CSV ou JSONL) para o modo lote.
+#   @param o arquivo de resultados do modo lote.
+#   @param f formato dos arquivos do modo lote (csv ou jsonl).
+#   @param p número de processos do modo lote.
+#   @param b cenários por bloco no modo lote com processos.
 #
 def main():
     try:
-        opts, args = getopt.getopt(sys.argv[1:], "c:a:s:i:t:m:h",
+        opts, args = getopt.getopt(sys.argv[1:], "c:a:s:i:t:m:l:o:f:p:b:h",
                                    ["capital=", "aplicacao=", "selic=",
                                     "imposto=", "rentabilidade=", "meses=",
-                                    "help"])
+                                    "lote=", "saida=", "formato=",
+                                    "processos=", "bloco=", "aporte=",
+                                    "perfil=", "servidor=", "cache=",
+                                    "serve-stdin", "help"])
     except getopt.GetoptError as err:
         print(err)
         print("Use --help para obter ajuda.")
@@ -601,6 +609,16 @@ def main():
     imposto_opt = 0
     rentabilidade = 0
     meses = 1
+    lote = None
+    saida = "-"
+    formato = None
+    processos = 0
+    bloco = 10000
+    aporte = 0.0
+    perfil = None
+    servidor = None
+    cache = None
+    coprocesso = False
     for o, a in opts:
         if o in ("-c", "--capital"):
             capital = float(a)
@@ -609,22 +627,79 @@ def main():
         elif o in ("-s", "--selic"):
             selic = float(a)
         elif o in ("-i", "--imposto"):
-            imposto_opt = float(a)
+            imposto_opt = None if a == "auto" else float(a)
         elif o in ("-t", "--rentabilidade"):
             rentabilidade = float(a)
         elif o in ("-m", "--meses"):
             meses = int(a)
+        elif o in ("-l", "--lote"):
+            lote = a
+        elif o in ("-o", "--saida"):
+            saida = a
+        elif o in ("-f", "--formato"):
+            formato = a
+        elif o in ("-p", "--processos"):
+            processos = int(a)
+        elif o in ("-b", "--bloco"):
+            bloco = int(a)
+        elif o == "--aporte":
+            aporte = float(a)
+        elif o == "--perfil":
+            perfil = a
+        elif o == "--servidor":
+            servidor = a
+        elif o == "--cache":
+            cache = a
+        elif o == "--serve-stdin":
+            coprocesso = True
         elif o in ("-h", "--help"):
             usage()
             sys.exit()
         else:
             assert False, "opção inválida: " + o
+    # A instrumentação só é importada quando pedida: desativada, não custa
+    # nada às funções de cálculo.
+    if perfil is not None:
+        import cdiperfil
+        cdiperfil.ativa(perfil, sys.modules[__name__])
+    elif "CDI_PERFIL" in os.environ:
+        import cdiperfil
+        cdiperfil.ativa_pelo_ambiente(sys.modules[__name__])
+    if coprocesso:
+        import cdicoprocesso
+        cdicoprocesso.serve()
+        sys.exit()
+    if servidor is not None:
+        import cdiservidor
+        cdiservidor.executa(servidor)
+        sys.exit()
+    if lote is not None:
+        import cdilote
+        ok, falhas = cdilote.executa(lote, saida, formato, processos, bloco,
+                                     cache)
+        print("%d cenários calculados, %d com erro" % (ok, falhas),
+              file=sys.stderr)
+        sys.exit(1 if falhas else 0)
     if capital != 0 and aplicacao_opt != 0 and selic != 0 and imposto_opt != 0 \
             and rentabilidade != 0:
-        CDB(capital, aplicacao_opt, selic, rentabilidade, imposto_opt, meses)
+        imposto_auto = imposto_opt is None
+        if imposto_auto:
+            imposto_opt = aliquota_ir(DIAS_POR_MES * meses)
+        # o mesmo cálculo da janela e do modo --serve-stdin
+        import cdicenario
+        cenario = cdicenario.Cenario(capital, aplicacao_opt, selic,
+                                     rentabilidade, imposto_opt, meses)
+        print(cenario.relatorio())
+        if aporte:
+            print(relatorio_aportes(aporte, meses, cdb_aportes(
+                capital, aporte, aplicacao_opt, selic, rentabilidade,
+                imposto_opt if not imposto_auto else None, meses)))
     else:
         print("Use --help para obter ajuda.")
-        app.mainloop()
+        # A interface gráfica só é carregada aqui, para que importar este
+        # módulo (testes, lotes, servidores) não dependa do Tkinter.
+        import cdigui
+        cdigui.inicia()
         sys.exit()
 
 
@@ -632,8 +707,21 @@ def main():
 #
 def usage():
     print(
-        "Usage: %s -c [capital] -a [CDI anual] -s [Selic] -i [alíquota IR] -t "
-        "[taxa CDI] -m [meses] -h [help]" % sys.argv[0])
+        "Usage: %s -c [capital] -a [CDI anual] -s [Selic] -i [alíquota IR "
+        "| auto] -t [taxa CDI] -m [meses] --aporte [aporte mensal] "
+        "-h [help]" % sys.argv[0])
+    print(
+        "       %s -l [cenários.csv|.jsonl|-] -o [saída|-] -f [csv|jsonl] "
+        "-p [processos] -b [cenários por bloco] --cache [arquivo.sqlite]"
+        % sys.argv[0])
+    print(
+        "       %s --servidor [host:porta|unix:/caminho]" % sys.argv[0])
+    print(
+        "       %s --serve-stdin (uma linha de opções -c -a -s -i -t -m "
+        "por cenário)" % sys.argv[0])
+    print(
+        "       --perfil [resumo|arquivo.prof] (ou a variável CDI_PERFIL) "
+        "imprime chamadas e tempos ao sair")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,221 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_CDI_Cache
+#
+# Cache persistente (sqlite) dos resultados de cdi.calcula_cdb.
+#
+# Cada resultado é guardado sob a tupla de entrada normalizada (capital,
+# CDI, Selic, rentabilidade, IR, meses) e a versão das tabelas e fórmulas
+# (versao_tabelas). Mudar as tabelas de cdi.py, ou VERSAO_CALCULO quando
+# uma fórmula muda, invalida o cache sem apagar o arquivo: as entradas
+# antigas deixam de ser encontradas e são as primeiras a sair na remoção
+# por tamanho.
+#
+# As consultas e gravações são feitas em blocos (busca, grava), para que
+# o modo lote (cdilote.py) pague uma consulta por bloco de cenários e só
+# calcule os cenários que ainda não estão no cache.
+#
+# Quando o cache passa de max_entradas, saem primeiro as entradas de
+# versões antigas e depois as gravadas há mais tempo. A ordem é a de
+# gravação, e não a de uso, para que uma consulta seja só leitura: o
+# cálculo de um cenário custa poucos microssegundos, e uma escrita por
+# consulta custaria mais que ele.
+#
+# Contar as entradas percorre a tabela inteira. Os processos do modo lote
+# paralelo abrem o cache sem contar (conta=False) e não removem nada; o
+# processo principal conta uma vez, ao final (limita), e soma os acertos e
+# faltas de cada bloco.
+#
+# @author Luan Bernardo Dias
+# @since 09/10/2022
+# @see https://www.sqlite.org/lang_select.html
+#
+import hashlib
+import sqlite3
+import struct
+
+from cdi import (CAMPOS_CDB, DIAS_POR_MES, FAIXAS_IR, TABELA_IOF,
+                 ResultadoCDB, calcula_cdb)
+
+## Versão das fórmulas de cdi.calcula_cdb; incrementar quando uma delas
+# mudar, para invalidar os resultados guardados.
+VERSAO_CALCULO = 1
+
+## Número máximo de resultados guardados.
+MAX_ENTRADAS = 1000000
+
+## Fração de MAX_ENTRADAS mantida depois de uma remoção, para que as
+# remoções não ocorram a cada gravação.
+FRACAO_APOS_REMOCAO = 0.9
+
+## Chaves por SELECT (o sqlite limita o número de parâmetros).
+CHAVES_POR_CONSULTA = 500
+
+## Cenários por bloco consultado no modo lote.
+TAMANHO_BLOCO = 5000
+
+## Formato binário dos campos de ResultadoCDB.
+_VALORES = struct.Struct("<%dd" % len(CAMPOS_CDB))
+
+## Formato binário da chave: cinco taxas e valores e o número de meses.
+_CHAVE = struct.Struct("<5dq")
+
+
+## Versão das tabelas e fórmulas que determinam os resultados.
+#
+# @return texto hexadecimal curto.
+#
+def versao_tabelas() -> str:
+    return hashlib.sha1(repr((VERSAO_CALCULO, DIAS_POR_MES, FAIXAS_IR,
+                              TABELA_IOF)).encode()).hexdigest()[:16]
+
+
+## Chave normalizada de um cenário: os números convertidos para float (e
+# meses para int) e empacotados em binário, de modo que 1000, "1000" e
+# 1000.0 dão a mesma chave.
+#
+# @param argumentos tupla (capital, cdi, selic, rentabilidade, imposto,
+#        meses).
+# @return bytes da chave.
+#
+def chave(argumentos: tuple) -> bytes:
+    c, cdi, p, t, i, m = argumentos
+    # + 0.0 troca -0.0 por 0.0
+    return _CHAVE.pack(float(c) + 0.0, float(cdi) + 0.0, float(p) + 0.0,
+                       float(t) + 0.0, float(i) + 0.0, int(m))
+
+
+## Cache de resultados em um arquivo sqlite.
+#
+class CacheResultados:
+    ##
+    # @param caminho arquivo sqlite (criado se não existir).
+    # @param max_entradas número máximo de resultados guardados.
+    # @param conta se False, as entradas não são contadas (entradas fica
+    #        None) e grava não remove nada; ver limita.
+    #
+    def __init__(self, caminho: str, max_entradas: int = MAX_ENTRADAS,
+                 conta: bool = True):
+        self.conexao = sqlite3.connect(caminho, timeout=60)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute(
+            "CREATE TABLE IF NOT EXISTS resultados (chave BLOB NOT NULL, "
+            "versao TEXT NOT NULL, valores BLOB NOT NULL, gravacao INTEGER "
+            "NOT NULL, PRIMARY KEY (versao, chave)) WITHOUT ROWID")
+        self.conexao.execute("CREATE INDEX IF NOT EXISTS resultados_gravacao "
+                             "ON resultados (gravacao)")
+        self.versao = versao_tabelas()
+        self.max_entradas = max_entradas
+        # MAX usa o índice; COUNT percorre a tabela
+        self.gravacao = self.conexao.execute(
+            "SELECT MAX(gravacao) FROM resultados").fetchone()[0] or 0
+        self.entradas = None
+        if conta:
+            self.conta()
+        self.acertos = self.faltas = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fecha()
+
+    ## Fecha o arquivo.
+    #
+    def fecha(self):
+        self.conexao.close()
+
+    ## Conta as entradas do arquivo, inclusive as gravadas por outros
+    # processos.
+    #
+    # @return número de entradas.
+    #
+    def conta(self) -> int:
+        self.entradas = self.conexao.execute(
+            "SELECT COUNT(*) FROM resultados").fetchone()[0]
+        return self.entradas
+
+    ## Conta as entradas e remove as mais antigas se o cache passar de
+    # max_entradas.
+    #
+    def limita(self):
+        if self.conta() > self.max_entradas:
+            self.remove(self.entradas -
+                        int(self.max_entradas * FRACAO_APOS_REMOCAO))
+
+    ## Procura os resultados de vários cenários.
+    #
+    # @param argumentos lista de tuplas de argumentos de calcula_cdb.
+    # @return lista com um ResultadoCDB ou None para cada cenário.
+    #
+    def busca(self, argumentos: list) -> list:
+        chaves = [chave(a) for a in argumentos]
+        encontrados = {}
+        distintas = list(dict.fromkeys(chaves))
+        for k in range(0, len(distintas), CHAVES_POR_CONSULTA):
+            parte = distintas[k:k + CHAVES_POR_CONSULTA]
+            cursor = self.conexao.execute(
+                "SELECT chave, valores FROM resultados WHERE versao = ? AND "
+                "chave IN (%s)" % ",".join("?" * len(parte)),
+                [self.versao] + parte)
+            for binario, valores in cursor:
+                encontrados[binario] = ResultadoCDB(*_VALORES.unpack(valores))
+        resultados = [encontrados.get(binario) for binario in chaves]
+        self.faltas += resultados.count(None)
+        self.acertos += len(resultados) - resultados.count(None)
+        return resultados
+
+    ## Guarda resultados e remove os mais antigos se o cache passar de
+    # max_entradas (só se as entradas foram contadas).
+    #
+    # @param pares lista de pares (argumentos, ResultadoCDB).
+    #
+    def grava(self, pares: list):
+        if not pares:
+            return
+        self.gravacao += 1
+        antes = self.conexao.total_changes
+        with self.conexao:
+            self.conexao.executemany(
+                "INSERT OR IGNORE INTO resultados VALUES (?, ?, ?, ?)",
+                [(chave(argumentos), self.versao,
+                  _VALORES.pack(*resultado), self.gravacao)
+                 for argumentos, resultado in pares])
+        if self.entradas is None:
+            return
+        self.entradas += self.conexao.total_changes - antes
+        if self.entradas > self.max_entradas:
+            self.remove(self.entradas -
+                        int(self.max_entradas * FRACAO_APOS_REMOCAO))
+
+    ## Remove as entradas de versões antigas e, depois, as gravadas há mais
+    # tempo.
+    #
+    # @param n número de entradas a remover.
+    #
+    def remove(self, n: int):
+        antes = self.conexao.total_changes
+        with self.conexao:
+            self.conexao.execute(
+                "DELETE FROM resultados WHERE (versao, chave) IN (SELECT "
+                "versao, chave FROM resultados ORDER BY versao = ?, "
+                "gravacao LIMIT ?)", (self.versao, n))
+        if self.entradas is not None:
+            self.entradas -= self.conexao.total_changes - antes
+
+    ## Calcula vários cenários, consultando o cache antes e guardando depois
+    # os que faltavam.
+    #
+    # @param argumentos lista de tuplas de argumentos de calcula_cdb.
+    # @return lista de ResultadoCDB.
+    #
+    def calcula(self, argumentos: list) -> list:
+        resultados = self.busca(argumentos)
+        novos = []
+        for k, resultado in enumerate(resultados):
+            if resultado is None:
+                resultados[k] = calcula_cdb(*argumentos[k])
+                novos.append((argumentos[k], resultados[k]))
+        self.grava(novos)
+        return resultados
@@ -0,0 +1,348 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_CDI_Cenario
+#
+# Cenário de CDB com recálculo incremental.
+#
+# calcula_cdb recalcula todos os valores derivados a cada chamada. Um
+# Cenario guarda as entradas (capital, CDI, Selic, rentabilidade, IR e
+# meses) e calcula cada grupo de valores derivados só quando ele é lido,
+# guardando o resultado. Cada grupo declara de que entradas e grupos
+# depende; mudar uma entrada descarta só os grupos que dependem dela,
+# direta ou indiretamente. Mudar os meses, por exemplo, refaz os
+# montantes, mas não as taxas mensais nem os tempos para dobrar o capital.
+#
+# Os grupos, e não cada valor, são os nós do grafo: os cálculos de um
+# valor são poucas operações de ponto flutuante, e controlar cada um
+# custaria mais que refazê-lo. Os campos de ResultadoCDB são lidos
+# diretamente do cenário (cenario.cdi_ao_mes), calculando só o grupo de
+# cada um.
+#
+# A alíquota com IR automático (i=None) depende dos meses, mas só muda na
+# troca de faixa da tabela regressiva: ao mudar os meses, ela é refeita na
+# hora, e os grupos que dependem dela só são descartados se ela mudar.
+#
+# Cenario.calcula recebe os mesmos argumentos de cdi.calcula_cdb: compara
+# cada entrada com a atual e descarta só os grupos das que mudaram, sem
+# montar dicionários, e devolve o ResultadoCDB. A janela (cdigui.py), a
+# linha de comando e o modo --serve-stdin (cdicoprocesso.py) calculam por
+# ele. Os montantes são calculados no próprio grupo do ResultadoCDB, a
+# partir das taxas já em ordem e das bases dos juros compostos (grupo
+# campos_taxas): mudar os meses refaz um grupo só.
+#
+# Os valores são calculados com as mesmas operações de cdi.calcula_taxas e
+# cdi.calcula_cdb, e dão os mesmos resultados. Os contadores calculados e
+# preservados medem o trabalho feito e o evitado.
+#
+# @author Luan Bernardo Dias
+# @since 09/10/2022
+# @see https://docs.python.org/3/library/functools.html
+#
+import functools
+
+from cdi import (DIAS_POR_MES, ResultadoCDB, aliquota_ir, doublePrincipal,
+                 jurospoupanca, month2day, relatorio_cdb, year2month)
+
+## Entradas de um cenário, na ordem dos argumentos de calcula_cdb.
+ENTRADAS = ("c", "cdi", "p", "t", "i", "m")
+
+## Dependências de cada grupo de valores derivados (preenchido por
+# _Derivado).
+DEPENDENCIAS = {}
+
+## Monta um ResultadoCDB a partir de uma tupla com os 16 valores, sem a
+# verificação de tamanho de ResultadoCDB._make.
+_novo_resultado = functools.partial(tuple.__new__, ResultadoCDB)
+
+## Grupo de onde vem cada valor derivado lido pelo nome (preenchido por
+# _Derivado, que cria uma propriedade para cada um; sem __getattr__, a
+# leitura dos atributos do cenário não passa por código Python).
+CAMPOS = {}
+
+
+## Grupo de valores derivados, calculado na primeira leitura e guardado no
+# dicionário da instância, como functools.cached_property: as leituras
+# seguintes não passam por aqui. Cenario.atualiza apaga o valor guardado
+# quando uma dependência muda.
+#
+class _Derivado:
+    ##
+    # @param dependencias entradas e grupos lidos pela função.
+    # @param campos nomes dos valores da tupla retornada, lidos também
+    #        diretamente do cenário; um nome que já vem de outro grupo
+    #        continua sendo lido dele.
+    #
+    def __init__(self, dependencias: tuple, campos: tuple = ()):
+        self.dependencias = dependencias
+        self.campos = campos
+
+    def __call__(self, funcao):
+        self.funcao = funcao
+        self.__doc__ = funcao.__doc__
+        return self
+
+    def __set_name__(self, dono, nome):
+        self.nome = nome
+        DEPENDENCIAS[nome] = self.dependencias
+        for posicao, campo in enumerate(self.campos):
+            if campo not in CAMPOS:
+                CAMPOS[campo] = (nome, posicao)
+                setattr(dono, campo, property(
+                    lambda cenario, nome=nome, posicao=posicao:
+                    getattr(cenario, nome)[posicao]))
+
+    def __get__(self, cenario, dono=None):
+        if cenario is None:
+            return self
+        valores = cenario.__dict__
+        valor = valores[self.nome] = self.funcao(cenario)
+        valores["calculados"][self.nome] += 1
+        return valor
+
+
+## Cenário de CDB com valores derivados calculados sob demanda.
+#
+class Cenario:
+    ##
+    # @param c capital
+    # @param cdi taxa cdi anual
+    # @param p taxa Selic anual
+    # @param t rentabilidade da aplicação em função do CDI
+    # @param i alíquota do imposto de renda; None usa a tabela regressiva
+    #          para o prazo de m meses.
+    # @param m meses
+    #
+    def __init__(self, c: float, cdi: float, p: float, t: float, i: float,
+                 m: int = 1):
+        self.__dict__.update(zip(ENTRADAS, (c, cdi, p, t, i, m)))
+        ## Número de cálculos de cada grupo.
+        self.__dict__["calculados"] = dict.fromkeys(DEPENDENCIAS, 0)
+        ## Grupos calculados mantidos em mudanças de entrada, ou seja,
+        # cálculos evitados se forem lidos de novo.
+        self.__dict__["preservados"] = 0
+
+    def __repr__(self):
+        return "Cenario(%s)" % ", ".join(
+            "%s=%r" % (nome, getattr(self, nome)) for nome in ENTRADAS)
+
+    def __setattr__(self, nome, valor):
+        if nome not in _DESCARTA:
+            raise AttributeError("só as entradas podem ser atribuídas: %s"
+                                 % nome)
+        valores = self.__dict__
+        if valor != valores[nome]:
+            self._muda(nome, valor)
+            valores["preservados"] += len(valores) - _FIXOS
+
+    ## Muda entradas do cenário e descarta os grupos que dependem delas.
+    # Entradas com o mesmo valor de antes não descartam nada.
+    #
+    # @param entradas nome -> novo valor, com os nomes de ENTRADAS.
+    # @return número de grupos descartados.
+    # @exception TypeError se algum nome não for uma entrada.
+    #
+    def atualiza(self, **entradas) -> int:
+        valores = self.__dict__
+        descartados = 0
+        mudou = False
+        for nome, valor in entradas.items():
+            if nome not in _DESCARTA:
+                raise TypeError("entrada desconhecida: %s" % nome)
+            # None == None, mas None != 0
+            if valor != valores[nome]:
+                descartados += self._muda(nome, valor)
+                mudou = True
+        if mudou:
+            valores["preservados"] += len(valores) - _FIXOS
+        return descartados
+
+    ## Calcula um cenário com os argumentos de cdi.calcula_cdb, reaproveitando
+    # os grupos que não dependem das entradas que mudaram desde o último.
+    #
+    # @param c capital
+    # @param cdi taxa cdi anual
+    # @param p taxa Selic anual
+    # @param t rentabilidade da aplicação em função do CDI
+    # @param i alíquota do imposto de renda ou None.
+    # @param m meses
+    # @return ResultadoCDB, igual ao de calcula_cdb.
+    #
+    def calcula(self, c: float, cdi: float, p: float, t: float, i: float,
+                m: int = 1) -> ResultadoCDB:
+        valores = self.__dict__
+        mudou = False
+        # entre duas consultas costumam mudar só os meses: as outras entradas
+        # são comparadas juntas antes de procurar a que mudou
+        if c != valores["c"] or cdi != valores["cdi"] or \
+                p != valores["p"] or t != valores["t"] or i != valores["i"]:
+            for nome, valor in zip(ENTRADAS, (c, cdi, p, t, i)):
+                if valor != valores[nome]:
+                    self._muda(nome, valor)
+            mudou = True
+        if m != valores["m"]:
+            mudou = True
+            if i is None and "aliquota" in valores and \
+                    valores["aliquota"] != aliquota_ir(DIAS_POR_MES * m):
+                self._muda("m", m)
+            else:
+                # sem troca de faixa do IR, só o ResultadoCDB depende dos
+                # meses (_DESCARTA_MESES)
+                valores["m"] = m
+                valores.pop("resultado", None)
+        if mudou:
+            valores["preservados"] += len(valores) - _FIXOS
+        return self.resultado
+
+    # Muda uma entrada e descarta os grupos que dependem dela; devolve o
+    # número de grupos descartados.
+    def _muda(self, nome, valor) -> int:
+        valores = self.__dict__
+        valores[nome] = valor
+        # os dependentes de um grupo só existem se ele existe: sem a
+        # alíquota guardada, ou com a mesma alíquota, os meses só descartam
+        # o que depende deles diretamente
+        if nome == "m" and (valores["i"] is not None
+                            or "aliquota" not in valores
+                            or valores["aliquota"] ==
+                            aliquota_ir(DIAS_POR_MES * valor)):
+            descartar = _DESCARTA_MESES
+        else:
+            descartar = _DESCARTA[nome]
+        descartados = 0
+        for grupo in descartar:
+            if grupo in valores:
+                del valores[grupo]
+                descartados += 1
+        return descartados
+
+    ## Contadores de trabalho.
+    #
+    # @return dicionário com "calculados" (cálculos de grupos),
+    #         "preservados" (grupos mantidos em mudanças de entrada) e
+    #         "guardados" (grupos válidos no momento).
+    #
+    def estatisticas(self) -> dict:
+        return {"calculados": sum(self.calculados.values()),
+                "preservados": self.preservados,
+                "guardados": sum(grupo in self.__dict__
+                                 for grupo in DEPENDENCIAS)}
+
+    ## Monta o relatório de texto, o mesmo de cdi.relatorio_cdb.
+    #
+    # @return texto do relatório.
+    #
+    def relatorio(self) -> str:
+        return relatorio_cdb(self.c, self.cdi, self.p, self.t, self.aliquota,
+                             self.m, self.resultado)
+
+    # As taxas, como em cdi.calcula_taxas.
+
+    @_Derivado(("i", "m"))
+    def aliquota(self):
+        """Alíquota de IR: a informada ou a da tabela pelo prazo."""
+        if self.i is None:
+            return aliquota_ir(DIAS_POR_MES * self.m)
+        return self.i
+
+    @_Derivado(("cdi",), ("cdi_ao_mes", "cdi_ao_dia"))
+    def taxas_cdi(self):
+        return year2month(self.cdi), month2day(self.cdi)
+
+    @_Derivado(("p",), ("juros_poupanca", "poupanca_ao_ano",
+                        "poupanca_ao_mes", "taxa_mensal_poupanca",
+                        "tempo_poup"))
+    def taxas_poupanca(self):
+        poupanca = jurospoupanca(self.p)
+        poupanca_ao_mes = year2month(poupanca)
+        return (poupanca, poupanca * 100, poupanca_ao_mes,
+                poupanca_ao_mes / 100, doublePrincipal(poupanca))
+
+    @_Derivado(("t", "cdi"), ("rentabilidade_ao_ano",
+                              "taxa_mensal_aplicacao"))
+    def taxas_aplicacao(self):
+        cdi_calculado = self.t * self.cdi
+        return cdi_calculado, year2month(cdi_calculado / 100) / 100
+
+    @_Derivado(("t", "cdi", "aliquota", "taxas_poupanca"),
+               ("cdi_com_impostos", "rent_com_imp", "apl_equal_poup",
+                "tempo_aplic"))
+    def taxas_imposto(self):
+        i = self.aliquota
+        cdi_com_impostos = self.t - (self.t * i / 100)
+        cdi_com_impostos_cem_porcento = (1 - (1 * i / 100)) * self.cdi
+        rent_com_imp = cdi_com_impostos * self.cdi
+        return (cdi_com_impostos, rent_com_imp,
+                self.taxas_poupanca[0] * 100 / cdi_com_impostos_cem_porcento,
+                doublePrincipal(rent_com_imp / 100))
+
+    @_Derivado(("taxas_cdi", "taxas_poupanca", "taxas_aplicacao",
+                "taxas_imposto", "aliquota"))
+    def campos_taxas(self):
+        """Campos de ResultadoCDB antes e depois dos montantes e as bases
+        dos montantes."""
+        _, poupanca_ao_ano, poupanca_ao_mes, taxa_mensal_poupanca, \
+            tempo_poup = self.taxas_poupanca
+        cdi_com_impostos, rent_com_imp, apl_equal_poup, tempo_aplic = \
+            self.taxas_imposto
+        rentabilidade_ao_ano, taxa_mensal_aplicacao = self.taxas_aplicacao
+        return (self.taxas_cdi + (poupanca_ao_ano, poupanca_ao_mes,
+                                  rentabilidade_ao_ano, cdi_com_impostos,
+                                  rent_com_imp),
+                (apl_equal_poup, tempo_poup, tempo_aplic),
+                1 + taxa_mensal_aplicacao, 1 + taxa_mensal_poupanca,
+                self.aliquota)
+
+    # Os montantes, como em cdi.calcula_cdb, já no ResultadoCDB: mudar o
+    # capital ou os meses refaz só este grupo.
+
+    @_Derivado(("c", "m", "campos_taxas"), ResultadoCDB._fields)
+    def resultado(self):
+        """ResultadoCDB com os 16 valores, como o de calcula_cdb."""
+        c, m = self.c, self.m
+        antes, depois, base_aplicacao, base_poupanca, aliquota = \
+            self.campos_taxas
+        # as expressões de valorfuturo e imposto, sem as chamadas: este é o
+        # grupo refeito a cada mudança dos meses
+        valor_aplicacao = c * base_aplicacao ** m
+        imposto_val = (valor_aplicacao - c) * aliquota / 100
+        aplicacaocomimposto = valor_aplicacao - imposto_val
+        poupanca = c * base_poupanca ** m
+        apl_poup = aplicacaocomimposto - poupanca
+        return _novo_resultado((
+            *antes, aplicacaocomimposto, poupanca, apl_poup, imposto_val,
+            (aplicacaocomimposto - c) / c * 100, apl_poup / c * 100, *depois))
+
+
+## Grupos de valores derivados de Cenario.
+DERIVADOS = tuple(DEPENDENCIAS)
+
+
+## Grupos que dependem, direta ou indiretamente, de um nome.
+#
+# @param nome entrada ou grupo.
+# @param exceto grupos cujos dependentes não são seguidos.
+# @return conjunto de grupos.
+#
+def dependentes(nome: str, exceto=()) -> set:
+    encontrados = set()
+    pendentes = [nome]
+    while pendentes:
+        atual = pendentes.pop()
+        for grupo, dependencias in DEPENDENCIAS.items():
+            if atual in dependencias and grupo not in encontrados:
+                encontrados.add(grupo)
+                if grupo not in exceto:
+                    pendentes.append(grupo)
+    return encontrados
+
+
+## Grupos descartados pela mudança de cada entrada.
+_DESCARTA = {nome: frozenset(dependentes(nome)) for nome in ENTRADAS}
+
+## Grupos descartados pela mudança dos meses quando a alíquota não muda.
+_DESCARTA_MESES = frozenset(dependentes("m", ("aliquota",)) - {"aliquota"})
+
+## Itens do dicionário de um cenário que não são grupos: as entradas,
+# calculados e preservados.
+_FIXOS = len(ENTRADAS) + 2
@@ -0,0 +1,112 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_CDI_Coprocesso
+#
+# Modo coprocesso de cdi.py (--serve-stdin): um processo só lê um cenário
+# por linha da entrada padrão e escreve uma linha de resultado por cenário
+# na saída padrão, esvaziando o buffer a cada resposta. Quem chama mantém
+# o pipe aberto em vez de iniciar um interpretador por cotação.
+#
+# Cada linha traz as mesmas opções da linha de comando de cdi.py:
+#
+#     -c 1000 -a 0.1365 -s 0.1375 -i auto -t 100 -m 12
+#
+# ou um objeto JSON com os campos do modo lote (cdilote.CAMPOS_CENARIO).
+# A resposta é um objeto JSON em uma linha, com os campos de entrada e os
+# de cdi.CAMPOS_CDB, ou {"erro": "..."}; toda linha lida, mesmo vazia ou
+# inválida, recebe exatamente uma linha de resposta.
+#
+# As linhas são calculadas em um único cdicenario.Cenario: entre duas
+# linhas costuma mudar uma entrada só, e os valores que não dependem dela
+# são reaproveitados.
+#
+# @author Luan Bernardo Dias
+# @since 09/10/2022
+# @see https://docs.python.org/3/library/getopt.html
+#
+import getopt
+import json
+import shlex
+import sys
+
+from cdi import CAMPOS_CDB, calcula_cdb
+from cdicenario import Cenario
+from cdilote import CAMPOS_CENARIO, converte_cenario
+
+## Opções aceitas em cada linha e o campo de cenário de cada uma.
+OPCOES = {"-c": "capital", "--capital": "capital",
+          "-a": "aplicacao", "--aplicacao": "aplicacao",
+          "-s": "selic", "--selic": "selic",
+          "-i": "imposto", "--imposto": "imposto",
+          "-t": "rentabilidade", "--rentabilidade": "rentabilidade",
+          "-m": "meses", "--meses": "meses"}
+
+
+## Converte uma linha de opções (ou de JSON) em um registro de cenário.
+#
+# @param linha texto da linha, sem a quebra de linha.
+# @return dicionário campo -> valor, como os lidos por cdilote.
+# @exception ValueError se a linha não puder ser lida.
+#
+def le_linha(linha: str) -> dict:
+    linha = linha.strip()
+    if not linha:
+        raise ValueError("linha vazia")
+    if linha.startswith("{"):
+        registro = json.loads(linha)
+        if not isinstance(registro, dict):
+            raise ValueError("esperado um objeto JSON")
+        return registro
+    try:
+        opts, resto = getopt.getopt(
+            shlex.split(linha), "c:a:s:i:t:m:",
+            [opcao[2:] + "=" for opcao in OPCOES if opcao.startswith("--")])
+    except getopt.GetoptError as err:
+        raise ValueError(str(err))
+    if resto:
+        raise ValueError("argumento inesperado: %s" % resto[0])
+    return {OPCOES[o]: a for o, a in opts}
+
+
+## Calcula uma linha e monta a linha de resposta.
+#
+# @param linha texto da linha.
+# @param cenario Cenario usado no cálculo, ou None para calcular com
+#        calcula_cdb.
+# @return texto JSON da resposta, sem a quebra de linha.
+#
+def responde(linha: str, cenario: Cenario = None) -> str:
+    try:
+        argumentos = converte_cenario(le_linha(linha))
+        if cenario is None:
+            resultado = calcula_cdb(*argumentos)
+        else:
+            resultado = cenario.calcula(*argumentos)
+        # sem NaN nem infinito, que não são JSON; um resultado complexo
+        # (taxa abaixo de -100%) também não é serializável e cai no
+        # TypeError
+        return json.dumps(dict(zip(CAMPOS_CENARIO + CAMPOS_CDB,
+                                   argumentos + resultado)), allow_nan=False)
+    except (ArithmeticError, TypeError, ValueError) as err:
+        return json.dumps({"erro": str(err) or type(err).__name__})
+
+
+## Atende linhas até o fim da entrada.
+#
+# @param entrada arquivo de texto de onde ler as linhas.
+# @param saida arquivo de texto onde escrever as respostas.
+# @return número de linhas atendidas.
+#
+def serve(entrada=None, saida=None) -> int:
+    entrada = entrada or sys.stdin
+    saida = saida or sys.stdout
+    cenario = Cenario(0.0, 0.0, 0.0, 0.0, 0.0)
+    n = 0
+    # readline, e não a iteração do arquivo, para responder a cada linha
+    # assim que ela chega pelo pipe
+    for linha in iter(entrada.readline, ""):
+        saida.write(responde(linha, cenario) + "\n")
+        saida.flush()
+        n += 1
+    return n
@@ -0,0 +1,765 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_Tkinter_GUI
+#
+# Interface gráfica (Tkinter) do cálculo de CDB. O núcleo de cálculo fica em
+# cdi.py, que não depende do Tkinter; este módulo só é importado quando a
+# janela é de fato aberta.
+#
+# @author Luan Bernardo Dias
+# @since 09/10/2022
+# @see https://luandiasrj.github.io/dev/
+#
+import sys
+
+if sys.version_info[0] == 3:
+    import tkinter as tk
+    from tkinter import ttk
+else:
+    import Tkinter as tk
+    import ttk
+
+from cdi import DIAS_POR_MES, aliquota_ir
+from cdicenario import Cenario
+from cditarefa import (CANCELADO, ERRO, PROGRESSO, RESULTADO, Tarefa,
+                       evolucao_em_blocos)
+
+## Valor do botão de alíquota que deriva o IR do prazo em meses.
+IR_AUTOMATICO = -1.0
+
+## Espera, em milissegundos, entre a última mudança de um campo e o
+# recálculo do painel de resultados ao vivo.
+ATRASO_RECALCULO_MS = 150
+
+## Intervalo, em milissegundos, entre duas consultas à fila de mensagens de
+# uma tarefa em segundo plano.
+INTERVALO_CONSULTA_MS = 50
+
+## Colunas da tabela da evolução mensal e o formato de cada uma.
+COLUNAS_EVOLUCAO = (("Mês", "%d"), ("Aplicação", "%.2f"),
+                    ("Poupança", "%.2f"), ("Imposto", "%.2f"),
+                    ("Apl - Poup", "%.2f"))
+
+
+## Primeira linha visível válida de uma tabela virtual.
+#
+# @param primeira primeira linha pedida (pode estar fora da tabela).
+# @param visiveis número de linhas que cabem na tela.
+# @param total número de linhas da tabela.
+# @return índice entre 0 e total - visiveis.
+#
+def limita_primeira(primeira: int, visiveis: int, total: int) -> int:
+    return max(0, min(primeira, total - visiveis))
+
+
+## Reduz uma série ao número de colunas de pixels do gráfico, guardando o
+# menor e o maior valor de cada coluna para que picos não desapareçam.
+#
+# @param valores sequência de valores.
+# @param colunas número de colunas de pixels.
+# @return lista de pares (mínimo, máximo), com no máximo colunas pares.
+#
+def reduz_serie(valores, colunas: int) -> list:
+    n = len(valores)
+    if n <= colunas:
+        return [(v, v) for v in valores]
+    pares = []
+    for k in range(colunas):
+        trecho = valores[k * n // colunas:(k + 1) * n // colunas]
+        pares.append((min(trecho), max(trecho)))
+    return pares
+
+
+## Tabela que desenha só as linhas visíveis: um ttk.Treeview com um número
+# fixo de itens, cujos valores são trocados ao rolar. O custo de rolar não
+# depende do número de linhas.
+#
+class TabelaVirtual(tk.Frame):
+    ##
+    # @param master widget pai.
+    # @param colunas sequência de pares (título, formato).
+    # @param linhas sequência de tuplas com um valor por coluna.
+    # @param visiveis número de linhas mostradas de cada vez.
+    #
+    def __init__(self, master, colunas, linhas, visiveis=20):
+        super().__init__(master)
+        self.linhas = linhas
+        self.formatos = [formato for _, formato in colunas]
+        self.primeira = 0
+        nomes = ["c%d" % k for k in range(len(colunas))]
+        self.arvore = ttk.Treeview(self, columns=nomes, show="headings",
+                                   height=visiveis, selectmode="none")
+        for nome, (titulo, _) in zip(nomes, colunas):
+            self.arvore.heading(nome, text=titulo)
+            self.arvore.column(nome, width=110, anchor="e")
+        self.barra = tk.Scrollbar(self, orient=tk.VERTICAL,
+                                  command=self.scroll)
+        self.arvore.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.barra.pack(side=tk.RIGHT, fill=tk.Y)
+        self.itens = [self.arvore.insert("", tk.END)
+                      for _ in range(min(visiveis, len(linhas)))]
+        # MouseWheel no Windows e macOS, Button-4/5 no X11
+        self.arvore.bind("<MouseWheel>", self.on_wheel)
+        self.arvore.bind("<Button-4>", self.on_wheel)
+        self.arvore.bind("<Button-5>", self.on_wheel)
+        self.draw()
+
+    ## Comando da barra de rolagem ("moveto" fração ou "scroll" n unidade).
+    #
+    def scroll(self, acao, quantidade, unidade=None):
+        if acao == tk.MOVETO:
+            primeira = round(float(quantidade) * len(self.linhas))
+        else:
+            passo = len(self.itens) if unidade == tk.PAGES else 1
+            primeira = self.primeira + int(quantidade) * passo
+        self.move_to(primeira)
+
+    ## Rola três linhas por passo da roda do mouse.
+    #
+    def on_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.move_to(self.primeira - 3)
+        else:
+            self.move_to(self.primeira + 3)
+        return "break"
+
+    ## Mostra as linhas a partir de primeira.
+    #
+    def move_to(self, primeira):
+        primeira = limita_primeira(primeira, len(self.itens), len(self.linhas))
+        if primeira != self.primeira:
+            self.primeira = primeira
+            self.draw()
+
+    ## Copia as linhas visíveis para os itens do Treeview.
+    #
+    def draw(self):
+        fim = self.primeira + len(self.itens)
+        for item, linha in zip(self.itens, self.linhas[self.primeira:fim]):
+            self.arvore.item(item, values=[
+                formato % valor for formato, valor in zip(self.formatos,
+                                                          linha)])
+        total = len(self.linhas) or 1
+        self.barra.set(self.primeira / total, fim / total)
+
+
+## Gráfico de linhas em um Canvas. Cada série é reduzida à largura em pixels
+# antes de desenhar (ver reduz_serie), então o número de itens do Canvas
+# não depende do tamanho das séries.
+#
+class GraficoLinhas(tk.Canvas):
+    ## Espaço, em pixels, entre as bordas do Canvas e a área do gráfico.
+    MARGEM = 50
+
+    ##
+    # @param master widget pai.
+    # @param series sequência de pares (nome, valores).
+    # @param cores cor de cada série.
+    #
+    def __init__(self, master, series, cores, width=640, height=260):
+        super().__init__(master, width=width, height=height, bg="white")
+        self.series = series
+        self.cores = cores
+        self.bind("<Configure>", self.draw)
+
+    ## Redesenha o gráfico no tamanho atual do Canvas.
+    #
+    def draw(self, event=None):
+        self.delete(tk.ALL)
+        margem = self.MARGEM
+        largura = max(self.winfo_width(), int(self["width"]))
+        altura = max(self.winfo_height(), int(self["height"]))
+        colunas = max(1, largura - 2 * margem)
+        reduzidas = [reduz_serie(valores, colunas)
+                     for _, valores in self.series]
+        if not any(reduzidas):
+            return
+        menor = min(par[0] for pares in reduzidas for par in pares)
+        maior = max(par[1] for pares in reduzidas for par in pares)
+        escala = (altura - 2 * margem) / ((maior - menor) or 1)
+
+        def y(valor):
+            return altura - margem - (valor - menor) * escala
+
+        self.create_line(margem, margem, margem, altura - margem,
+                         largura - margem, altura - margem)
+        self.create_text(margem - 5, y(maior), text="%.0f" % maior,
+                         anchor="e")
+        self.create_text(margem - 5, y(menor), text="%.0f" % menor,
+                         anchor="e")
+        for k, ((nome, _), pares, cor) in enumerate(
+                zip(self.series, reduzidas, self.cores)):
+            passo = colunas / max(1, len(pares) - 1)
+            pontos = []
+            for x, (minimo, maximo) in enumerate(pares):
+                pontos += [margem + x * passo, y(maximo),
+                           margem + x * passo, y(minimo)]
+            if len(pontos) >= 4:
+                self.create_line(*pontos, fill=cor)
+            self.create_text(margem + 10 + 110 * k, margem / 2, text=nome,
+                             fill=cor, anchor="w")
+
+
+## Classe construtora da janela com os campos de entrada Capital, Taxa Selic,
+# Taxa CDI etc.
+#
+class Application(tk.Frame):
+    ##
+    # Método construtor da classe Tkinter
+    #
+    def __init__(self, master=None):
+        super().__init__(master)
+        # Os resultados vêm de um cenário só: entre dois recálculos costuma
+        # mudar um campo, e os valores que não dependem dele são
+        # reaproveitados.
+        self.cenario = Cenario(0.0, 0.0, 0.0, 0.0, 0.0)
+        self.pack()
+        self.create_widgets()
+
+    ##
+    # Função que desenha a janela principal e seus widgets
+    #
+    def create_widgets(self):
+        espace = 5
+        bgclr = 'antiquewhite'
+        self.master.title("Cálculo de CDB - AD2 - 2022.2")
+
+        # Criação dos campos de entrada
+        texto_titulo = "CDBs, LCIs e LCAs indexadas por\nCertificados de " \
+                       "Depósitos Interbancários "
+        fonte_titulo = ("Arial", 12, "bold")
+
+        # Make a fieldset with a legend and button inside
+        self.fieldset = tk.LabelFrame(self, text=texto_titulo, bg="#CABAA8",
+                                      font=fonte_titulo, labelanchor="n")
+        self.fieldset.pack(padx=10, pady=10)
+
+        # Make a label for title and pack it into the fieldset frame, top,
+        # backgroud color orange and font size and bold
+        self.title = tk.Label(self.master, text=texto_titulo,
+                              bg="#ff6347", font=fonte_titulo,
+                              highlightbackground='lightblue',
+                              highlightthickness=5)
+        # place the label in the top and center of the fieldset
+        self.title.place(relx=0.5, y=30, anchor="center")
+
+        self.title_dummie = tk.Label(self.fieldset, width=50,
+                                     background="#CABAA8")
+        self.title_dummie.pack(padx=10)
+
+        # Make a frame to hold the fields
+        self.fields = tk.Frame(self.fieldset, padx=espace, pady=espace,
+                               highlightbackground='lightblue',
+                               highlightthickness=5)
+        self.fields.pack()
+
+        # Make a frame to hold the radio buttons
+        self.radio = tk.Frame(self.fields)
+        self.radio.pack(fill=tk.X, side=tk.BOTTOM)
+        self.radio['bg'] = bgclr
+
+        # Make a frame to hold the labels
+        self.labels = tk.Frame(self.fields)
+        self.labels.pack(side=tk.LEFT, padx=espace, pady=espace)
+
+        # Make a frame to hold the spinboxes
+        self.spinboxes = tk.Frame(self.fields)
+        # Pack the spinboxes to the right of the labels
+        self.spinboxes.pack(side=tk.LEFT)
+
+        # Make the row of spinboxes and labels
+        self.row1 = tk.Frame(self.spinboxes)
+        self.row2 = tk.Frame(self.spinboxes)
+        self.row3 = tk.Frame(self.spinboxes)
+        self.row4 = tk.Frame(self.spinboxes)
+        self.row5 = tk.Frame(self.spinboxes)
+        self.row1.pack(fill=tk.X, padx=espace, pady=espace)
+        self.row2.pack(fill=tk.X, padx=espace, pady=espace)
+        self.row3.pack(fill=tk.X, padx=espace, pady=espace)
+        self.row4.pack(fill=tk.X, padx=espace, pady=espace)
+        self.row5.pack(fill=tk.X, padx=espace, pady=espace)
+
+        # Make the labels
+        self.label1 = tk.Label(self.labels, text="Capital:", anchor='w')
+        self.label2 = tk.Label(self.labels, text="Taxa Selic:", anchor='w')
+        self.label3 = tk.Label(self.labels, text="Taxa CDI:", anchor='w')
+        self.label4 = tk.Label(self.labels, text="Rentabilidade:", anchor='w')
+        self.label5 = tk.Label(self.labels, text="Meses:", anchor='w')
+        self.label6 = tk.Label(self.label1, text="$", anchor='w')
+        self.label7 = tk.Label(self.row2, text="% ano")
+        self.label8 = tk.Label(self.row3, text="% ano")
+        self.label9 = tk.Label(self.row4, text="% CDI")
+
+        # Default values for the spinboxes
+        capital = tk.StringVar()
+        capital.set("1000")
+        taxa_selic = tk.StringVar()
+        taxa_selic.set("13.75")
+        taxa_cdi = tk.StringVar()
+        taxa_cdi.set("13.65")
+        rentabilidade = tk.StringVar()
+        rentabilidade.set("100")
+        meses = tk.StringVar()
+        meses.set("1")
+
+        # Make the spinboxes with default values
+        self.spinbox1 = tk.Spinbox(
+            self.row1, from_=0, to=1000000000, increment=0.01,
+            textvariable=capital, width=12)
+        self.spinbox2 = tk.Spinbox(
+            self.row2, from_=0, to=1000, increment=0.01,
+            textvariable=taxa_selic, width=8)
+        self.spinbox3 = tk.Spinbox(
+            self.row3, from_=0, to=1000, increment=0.01, textvariable=taxa_cdi,
+            width=8)
+        self.spinbox4 = tk.Spinbox(
+            self.row4, from_=0, to=1000, increment=0.01,
+            textvariable=rentabilidade, width=6)
+        self.spinbox5 = tk.Spinbox(
+            self.row5, from_=0, to=1000, increment=1, textvariable=meses,
+            width=6)
+        self.entradas = (capital, taxa_selic, taxa_cdi, rentabilidade, meses)
+
+        # pack the labels
+        self.label1.pack(fill=tk.X, padx=espace, pady=espace)
+        self.label2.pack(fill=tk.X, padx=espace, pady=espace)
+        self.label3.pack(fill=tk.X, padx=espace, pady=espace)
+        self.label4.pack(fill=tk.X, padx=espace, pady=espace)
+        self.label5.pack(fill=tk.X, padx=espace, pady=espace)
+        self.label6.pack(side=tk.RIGHT)  # $
+
+        # pack the spinboxes
+        self.spinbox1.pack(side=tk.LEFT)
+        self.spinbox2.pack(side=tk.LEFT)
+        self.spinbox3.pack(side=tk.LEFT)
+        self.spinbox4.pack(side=tk.LEFT)
+        self.spinbox5.pack(side=tk.LEFT)
+        self.label7.pack(side=tk.LEFT)  # % ano
+        self.label8.pack(side=tk.LEFT)  # % ano
+        self.label9.pack(side=tk.LEFT)  # % CDI
+
+        # Make a fieldset with a legend and radio buttons inside
+        self.fieldset2 = tk.LabelFrame(self.radio, text="Alíquota IR:")
+        self.fieldset2.pack(side=tk.LEFT, padx=espace, pady=espace)
+
+        # Format the fieldset without border and transparent background
+        self.fieldset2['bd'] = 0
+
+        # Make a frame to hold the radio buttons
+        self.radio = tk.Frame(self.fieldset2)
+        self.radio.pack(side=tk.BOTTOM)
+
+        # variables for radio buttons
+        self.ir = tk.DoubleVar()
+        self.ir.set(0)
+
+        # Make a fieldset with a legend and radio buttons inside
+
+        self.radio1 = tk.Radiobutton(
+            self.radio, text="0.0 (LCA ou LCI)", variable=self.ir, value=0,
+            anchor='w')
+        self.radio2 = tk.Radiobutton(
+            self.radio, text="15.0 (acima de 721 dias)", variable=self.ir,
+            value=15.0, anchor='w')
+        self.radio3 = tk.Radiobutton(
+            self.radio, text="17.5 (de 361 até 720 dias)", variable=self.ir,
+            value=17.5, anchor='w')
+        self.radio4 = tk.Radiobutton(
+            self.radio, text="20.0 (de 181 até 360 dias)", variable=self.ir,
+            value=20.0, anchor='w')
+        self.radio5 = tk.Radiobutton(
+            self.radio, text="22.5 (até 180 dias)", variable=self.ir,
+            value=22.5, anchor='w')
+        self.radio6 = tk.Radiobutton(
+            self.radio, text="Automática (pelo prazo)", variable=self.ir,
+            value=IR_AUTOMATICO, anchor='w')
+
+        # pack the radio buttons
+
+        self.radio1.pack(fill=tk.X, padx=10, pady=espace)
+        self.radio2.pack(fill=tk.X, padx=10, pady=espace)
+        self.radio3.pack(fill=tk.X, padx=10, pady=espace)
+        self.radio4.pack(fill=tk.X, padx=10, pady=espace)
+        self.radio5.pack(fill=tk.X, padx=10, pady=espace)
+        self.radio6.pack(fill=tk.X, padx=10, pady=espace)
+
+        # Make a button to calculate the results, red text,
+        # background #f8fad7, hover color #fadad7
+        self.button = tk.Button(
+            self.fieldset, text="Calcular", command=self.calculate,
+            bg="#f8fad7")
+        self.button.pack(side=tk.BOTTOM, padx=espace, pady=espace)
+
+        # Make the button text red
+        self.button["fg"] = "red"
+
+        # Make the button groove
+        self.button["relief"] = "groove"
+        self.button["borderwidth"] = 2
+
+        # Make the button change color when the mouse is over it
+        self.button.bind("<Enter>", self.on_enter)
+        self.button.bind("<Leave>", self.on_leave)
+
+        # Format all background colors of the window
+        self.fields['bg'] = bgclr
+        self.fieldset2['bg'] = bgclr
+        self.spinboxes['bg'] = bgclr
+        self.radio['bg'] = bgclr
+        self.labels['bg'] = bgclr
+        self.row1['bg'] = bgclr
+        self.row2['bg'] = bgclr
+        self.row3['bg'] = bgclr
+        self.row4['bg'] = bgclr
+        self.row5['bg'] = bgclr
+        self.label1['bg'] = bgclr
+        self.label2['bg'] = bgclr
+        self.label3['bg'] = bgclr
+        self.label4['bg'] = bgclr
+        self.label5['bg'] = bgclr
+        self.label6['bg'] = bgclr
+        self.label7['bg'] = bgclr
+        self.label8['bg'] = bgclr
+        self.label9['bg'] = bgclr
+        self.radio1['bg'] = bgclr
+        self.radio2['bg'] = bgclr
+        self.radio3['bg'] = bgclr
+        self.radio4['bg'] = bgclr
+        self.radio5['bg'] = bgclr
+        self.radio6['bg'] = bgclr
+        self.fieldset2['bg'] = bgclr
+
+        self.create_live_panel()
+        self.create_task_bar()
+
+    ## Cria o painel de resultados ao vivo, escondido até que a opção
+    # "Resultados ao vivo" seja marcada. Os rótulos usam StringVars e são
+    # reaproveitados a cada recálculo, sem criar novos widgets.
+    #
+    def create_live_panel(self):
+        font = ("Times", "12", "bold")
+        padding_ = 10
+
+        self.ao_vivo = tk.BooleanVar()
+        self.ao_vivo.set(False)
+        self.check_ao_vivo = tk.Checkbutton(
+            self.fieldset, text="Resultados ao vivo", variable=self.ao_vivo,
+            command=self.toggle_live_panel, bg="#CABAA8")
+        self.check_ao_vivo.pack(side=tk.BOTTOM)
+
+        self.painel = tk.Frame(self, padx=padding_, pady=padding_,
+                               highlightbackground='lightblue',
+                               highlightthickness=5)
+        self.textos_painel = (tk.StringVar(), tk.StringVar(), tk.StringVar(),
+                              tk.StringVar())
+        self.painel_linha = tk.Frame(self.painel)
+        self.painel_linha.pack()
+        self.painel_label1 = tk.Label(
+            self.painel_linha, textvariable=self.textos_painel[0], font=font,
+            justify=tk.LEFT, padx=padding_)
+        self.painel_label1.pack(side=tk.LEFT, anchor='n')
+        self.painel_label2 = tk.Label(
+            self.painel_linha, textvariable=self.textos_painel[1], font=font,
+            justify=tk.LEFT, padx=padding_)
+        self.painel_label2.pack(side=tk.LEFT, anchor='n')
+        self.painel_label3 = tk.Label(
+            self.painel, textvariable=self.textos_painel[2], font=font,
+            justify=tk.LEFT)
+        self.painel_label3.pack(pady=padding_)
+        # Mensagem de erro quando algum campo é inválido
+        self.painel_status = tk.Label(
+            self.painel, textvariable=self.textos_painel[3], fg="red")
+        self.painel_status.pack()
+
+        self._recalculo = None
+        for variavel in self.entradas + (self.ir,):
+            variavel.trace_add("write", self.schedule_recalc)
+
+    ## Mostra ou esconde o painel de resultados ao vivo.
+    #
+    def toggle_live_panel(self):
+        if self.ao_vivo.get():
+            self.painel.pack(padx=10, pady=10)
+            self.recalc()
+        else:
+            self.painel.pack_forget()
+
+    ## Agenda o recálculo do painel para daqui a ATRASO_RECALCULO_MS,
+    # cancelando o agendamento anterior: uma sequência rápida de mudanças
+    # (digitação, setas do spinbox) gera um único recálculo.
+    #
+    def schedule_recalc(self, *args):
+        if not self.ao_vivo.get():
+            return
+        if self._recalculo is not None:
+            self.after_cancel(self._recalculo)
+        self._recalculo = self.after(ATRASO_RECALCULO_MS, self.recalc)
+
+    ## Recalcula e atualiza os textos do painel de resultados ao vivo.
+    # Com um campo inválido, os últimos resultados válidos são mantidos.
+    #
+    def recalc(self):
+        self._recalculo = None
+        try:
+            textos = self.result_texts()
+        except (ValueError, ArithmeticError, tk.TclError):
+            self.textos_painel[3].set("Valores inválidos")
+            return
+        for variavel, texto in zip(self.textos_painel, textos):
+            variavel.set(texto)
+        self.textos_painel[3].set("")
+
+    ## Cria o botão da evolução mensal e a barra de progresso, com o botão
+    # de cancelamento, mostrada enquanto uma tarefa em segundo plano roda.
+    #
+    def create_task_bar(self):
+        self.tarefa = None
+        self.status = tk.StringVar()
+        self.status_label = tk.Label(self.fieldset, textvariable=self.status,
+                                     bg="#CABAA8")
+        self.status_label.pack(side=tk.BOTTOM)
+
+        self.barra_tarefa = tk.Frame(self.fieldset, bg="#CABAA8")
+        self.progresso = ttk.Progressbar(self.barra_tarefa, length=200,
+                                         maximum=1.0, mode="determinate")
+        self.progresso.pack(side=tk.LEFT, padx=5)
+        self.button_cancel = tk.Button(self.barra_tarefa, text="Cancelar",
+                                       command=self.cancel_task)
+        self.button_cancel.pack(side=tk.LEFT)
+
+        self.button_evolution = tk.Button(
+            self.fieldset, text="Evolução mensal",
+            command=self.start_evolution, bg="#f8fad7", relief="groove",
+            borderwidth=2)
+        self.button_evolution.pack(side=tk.BOTTOM, pady=5)
+
+    ## Calcula a evolução mês a mês em uma thread, sem bloquear a janela.
+    # Com a alíquota automática, o IR de cada mês segue a tabela regressiva.
+    #
+    def start_evolution(self):
+        if self.tarefa is not None:
+            return
+        try:
+            valor_investido, taxa_selic, taxa_cdi, rentabilidade, meses, ir = \
+                self.read_inputs()
+        except (ValueError, tk.TclError):
+            self.status.set("Valores inválidos")
+            return
+        if self.ir.get() == IR_AUTOMATICO:
+            ir = None
+        self.tarefa = Tarefa(evolucao_em_blocos, valor_investido,
+                             taxa_cdi * 0.01, taxa_selic * 0.01,
+                             rentabilidade, ir, meses).inicia()
+        self.progresso["value"] = 0
+        self.barra_tarefa.pack(side=tk.BOTTOM, before=self.button_evolution)
+        self.button_evolution["state"] = tk.DISABLED
+        self.status.set("Calculando...")
+        self.after(INTERVALO_CONSULTA_MS, self.poll_task)
+
+    ## Pede o cancelamento da tarefa em andamento.
+    #
+    def cancel_task(self):
+        if self.tarefa is not None:
+            self.tarefa.cancela()
+            self.status.set("Cancelando...")
+
+    ## Consome as mensagens da tarefa em andamento e se reagenda até receber
+    # a mensagem final. Roda na thread do Tkinter, a única que toca widgets.
+    #
+    def poll_task(self):
+        for tipo, valor in self.tarefa.mensagens():
+            if tipo == PROGRESSO:
+                self.progresso["value"] = valor
+                continue
+            self.finish_task()
+            if tipo == RESULTADO:
+                self.show_evolution(valor)
+            elif tipo == CANCELADO:
+                self.status.set("Cálculo cancelado")
+            elif tipo == ERRO:
+                self.status.set("Erro: %s" % valor)
+            return
+        self.after(INTERVALO_CONSULTA_MS, self.poll_task)
+
+    ## Esconde a barra de progresso e libera o botão da evolução mensal.
+    #
+    def finish_task(self):
+        self.tarefa = None
+        self.barra_tarefa.pack_forget()
+        self.button_evolution["state"] = tk.NORMAL
+
+    ## Mostra a evolução mensal em uma nova janela, com um gráfico e uma
+    # tabela virtual, e o saldo do último mês na linha de status.
+    #
+    # @param linhas lista de cdi.MesCDB.
+    #
+    def show_evolution(self, linhas):
+        self.evolucao = linhas
+        if not linhas:
+            self.status.set("Nenhum mês calculado")
+            return
+        ultimo = linhas[-1]
+        self.status.set("%d meses: Apl - Poup = $%.2f" % (
+            ultimo.mes, ultimo.diferenca))
+
+        if getattr(self, "janela_evolucao", None) is not None:
+            self.janela_evolucao.destroy()
+        self.janela_evolucao = tk.Toplevel(self)
+        self.janela_evolucao.title("Evolução mensal")
+        series = [(nome, [linha[k] for linha in linhas])
+                  for k, nome in ((1, "Aplicação"), (2, "Poupança"),
+                                  (3, "Imposto"))]
+        grafico = GraficoLinhas(self.janela_evolucao, series,
+                                ("blue", "green", "red"))
+        grafico.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        tabela = TabelaVirtual(self.janela_evolucao, COLUNAS_EVOLUCAO, linhas)
+        tabela.pack(fill=tk.BOTH, padx=10, pady=10)
+
+    ## Muda a cor do botão quando o mouse está em cima dele
+    #
+    def on_enter(self, event):
+        self.button["bg"] = "#fadad7"
+
+    ## Muda a cor do botão quando o mouse sai de cima dele
+    #
+    def on_leave(self, event):
+        self.button["bg"] = "#f8fad7"
+
+    ## Lê os valores dos campos de entrada.
+    #
+    # @return tupla (capital, selic %, cdi %, rentabilidade, meses, ir).
+    # @exception ValueError se algum campo não for um número válido.
+    #
+    def read_inputs(self):
+        # Get the values from the spinboxes
+        valor_investido = float(self.spinbox1.get())
+        taxa_selic = float(self.spinbox2.get())
+        taxa_cdi = float(self.spinbox3.get())
+        rentabilidade = float(self.spinbox4.get())
+        meses = int(self.spinbox5.get())
+
+        # Get the value from the radio buttons
+        ir = self.ir.get()
+        if ir == IR_AUTOMATICO:
+            ir = aliquota_ir(DIAS_POR_MES * meses)
+        return valor_investido, taxa_selic, taxa_cdi, rentabilidade, meses, ir
+
+    ## Calcula o CDB com os valores dos campos e monta os três textos de
+    # resultado (entradas e taxas, montantes, comparação com a poupança).
+    #
+    # @return tupla com os três textos.
+    # @exception ValueError ou ArithmeticError se as entradas forem
+    #            inválidas.
+    #
+    def result_texts(self):
+        valor_investido, taxa_selic, taxa_cdi, rentabilidade, meses, ir = \
+            self.read_inputs()
+
+        # Calculate the results
+        # capital, aplicacao_opt, selic, rentabilidade, imposto_opt, meses
+        r = self.cenario.calcula(valor_investido, taxa_cdi * 0.01,
+                                 taxa_selic * 0.01, rentabilidade, ir, meses)
+
+        texto1 = "Capital: $%.2f\nTaxa Selic: %.2f%% ao ano\nCDI: %.2f%% " \
+                 "ao ano = %.4f%% ao mês = %.6f%% ao dia\nTaxa Poupança: " \
+                 "%.2f%% ao ano = %.4f%% ao mês\n\nIR: %.2f%%\n\n" \
+                 "Rentabilidade: %.1f%% CDI = %.2f%% ao ano\nCom impostos: " \
+                 "%.2f%% CDI = %.2f%% ao ano\n\nMeses: %d" % (
+                     valor_investido, taxa_selic, taxa_cdi, r.cdi_ao_mes,
+                     r.cdi_ao_dia, r.poupanca_ao_ano, r.poupanca_ao_mes, ir,
+                     rentabilidade, r.rentabilidade_ao_ano,
+                     r.cdi_com_impostos, r.rent_com_imp, meses)
+        texto2 = "Montante Aplicação = $%.2f\nMontante Poupança = $%.2f\n" \
+                 "Apl - Poup (%d meses) = $%.2f\nImposto = $%.4f\n" \
+                 "Rendimento em %d meses = %.4f%%" % (
+                     r.aplicacaocomimposto, r.poupanca, meses, r.apl_poup,
+                     r.imposto_val, meses, r.rendimento_total_perc)
+        texto3 = "Apl - Poup (%d meses) = %.4f%%\nApl ≍ Poup = %.2f%% CDI\n" \
+                 "Tempo 2 × Poupança = %.2f anos\nTempo 2 × Aplicação ≍ " \
+                 "%.2f anos" % (meses, r.rendimentocomimposto,
+                                r.apl_equal_poup, r.tempo_poup, r.tempo_aplic)
+        return texto1, texto2, texto3
+
+    ## Essa função tem como objetivo criar uma nova janela com o resultado
+    # dos cálculos de juros solicitados
+    #
+    def calculate(self):
+        font = ("Times", "12", "bold")
+        padding_ = 10
+        border = 8
+
+        texto1, texto2, texto3 = self.result_texts()
+
+        # Minimize the main window
+        self.master.withdraw()
+
+        # Create a new window to show the results
+        self.results = tk.Toplevel(self)
+        self.results.title("Resultado")
+
+        # Creat 3 containers to hold the results
+        cointeiner1 = tk.Frame(self.results, padx=padding_, pady=padding_)
+        cointeiner1.pack()
+        cointeiner2 = tk.Frame(cointeiner1)
+        cointeiner2.pack()
+        cointeiner3 = tk.Frame(self.results, padx=padding_, pady=padding_,
+                               highlightthickness=border,
+                               highlightbackground="red")
+        cointeiner3.pack()
+
+        lbl = tk.Label(cointeiner2, text=texto1,
+                       font=font, justify=tk.LEFT)
+        lbl["font"] = font
+        lbl["highlightthickness"] = border
+        lbl["highlightbackground"] = "green"
+        lbl["pady"] = padding_
+        lbl["padx"] = padding_
+
+        # pack the label left
+        lbl.pack(side=tk.LEFT)
+
+        lbl2 = tk.Label(cointeiner2, text=texto2, font=font,
+                        justify=tk.LEFT)
+        lbl2["font"] = font
+        lbl2["highlightthickness"] = border
+        lbl2["highlightbackground"] = "blue"
+        lbl2["pady"] = padding_
+        lbl2["padx"] = padding_
+
+        lbl2.pack(side=tk.LEFT, padx=padding_)
+
+        lbl3 = tk.Label(cointeiner3, text=texto3, font=font,
+                        justify=tk.LEFT)
+        lbl3["font"] = font
+        lbl3.pack()
+
+        # Create a button to return to the main window
+        self.button2 = tk.Button(
+            self.results, text="Voltar", command=self.back)
+        self.button2.pack(padx=padding_, pady=padding_)
+
+        # Listen for the close event
+        self.results.protocol("WM_DELETE_WINDOW", self.back)
+
+    ## Função que retorna a janela principal
+    #
+    def back(self):
+        self.results.destroy()
+        self.master.deiconify()
+
+
+## Cria a janela principal e entra no loop de eventos do Tkinter.
+#
+# @return instância de Application após o fechamento da janela.
+#
+def inicia():
+    app = Application()
+    # do not allow resizing the GUI
+    app.master.resizable(False, False)
+    app.mainloop()
+    return app
+
+
+if __name__ == "__main__":
+    inicia()
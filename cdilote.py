@@ -0,0 +1,436 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_CDI_Lote
+#
+# Processamento em lote de cenários de CDB lidos de arquivos CSV ou JSONL.
+#
+# Cada cenário tem os mesmos campos das opções longas da linha de comando
+# de cdi.py (capital, aplicacao, selic, imposto, rentabilidade, meses). A
+# leitura, o cálculo e a escrita são geradores encadeados: cada linha é
+# lida, calculada e escrita antes da próxima, de modo que o consumo de
+# memória não depende do tamanho da entrada. Linhas inválidas são
+# relatadas individualmente e não interrompem o lote.
+#
+# @author Luan Bernardo Dias
+# @since 09/10/2022
+# @see https://docs.python.org/3/library/csv.html
+#
+import collections
+import contextlib
+import csv
+import io
+import itertools
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from cdi import CAMPOS_CDB, DIAS_POR_MES, aliquota_ir, calcula_cdb
+
+## Campos de entrada de um cenário, na ordem dos argumentos de calcula_cdb.
+CAMPOS_CENARIO = ("capital", "aplicacao", "selic", "rentabilidade",
+                  "imposto", "meses")
+
+## Formatos de arquivo aceitos.
+FORMATOS = ("csv", "jsonl")
+
+
+## Erro em uma linha da entrada, com o número da linha para o relatório.
+#
+class ErroCenario(ValueError):
+    ##
+    # @param linha número da linha no arquivo (o cabeçalho do CSV é a 1).
+    # @param mensagem descrição do problema.
+    #
+    def __init__(self, linha: int, mensagem: str):
+        super().__init__("linha %d: %s" % (linha, mensagem))
+        self.linha = linha
+        self.mensagem = mensagem
+
+
+## Deduz o formato a partir da extensão do arquivo.
+#
+# @param caminho nome do arquivo ou "-" para entrada/saída padrão.
+# @param padrao formato usado quando a extensão não é reconhecida.
+# @return "csv" ou "jsonl".
+#
+def formato_por_extensao(caminho: str, padrao: str = "csv") -> str:
+    for formato in FORMATOS:
+        if caminho.lower().endswith("." + formato):
+            return formato
+    if caminho.lower().endswith(".json"):
+        return "jsonl"
+    return padrao
+
+
+## Converte um dicionário lido da entrada em uma tupla de argumentos para
+# calcula_cdb.
+#
+# O imposto "auto" é trocado pela alíquota da tabela regressiva para o
+# prazo do cenário. Valores não finitos e taxas anuais de -100% ou menos
+# (CDI, Selic ou a da aplicação) são recusados: as conversões para taxa
+# mensal dariam números complexos.
+#
+# @param registro dicionário campo -> valor (texto ou número).
+# @return tupla (capital, cdi, selic, rentabilidade, imposto, meses).
+# @exception ValueError se faltar um campo ou um valor for inválido.
+#
+def converte_cenario(registro: dict) -> tuple:
+    valores = []
+    automatico = False
+    for campo in CAMPOS_CENARIO:
+        valor = registro.get(campo)
+        if valor is None or valor == "":
+            if campo != "meses":
+                raise ValueError("campo '%s' ausente" % campo)
+            valor = 1
+        if campo == "imposto" and valor == "auto":
+            automatico = True
+            valor = 0
+        try:
+            valores.append(int(valor) if campo == "meses" else float(valor))
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError("valor inválido para '%s': %r" % (campo, valor))
+        if not math.isfinite(valores[-1]):
+            raise ValueError("valor não finito para '%s': %r"
+                             % (campo, valor))
+    aplicacao, selic, rentabilidade = valores[1:4]
+    for campo, taxa in (("aplicacao", aplicacao), ("selic", selic),
+                        ("rentabilidade", rentabilidade * aplicacao / 100)):
+        if taxa <= -1:
+            raise ValueError("taxa fora do domínio em '%s': %r"
+                             % (campo, taxa))
+    if automatico:
+        valores[4] = aliquota_ir(DIAS_POR_MES * valores[5])
+    return tuple(valores)
+
+
+## Lê os registros de um arquivo CSV ou JSONL.
+#
+# @param arquivo arquivo de texto aberto, ou qualquer iterável de linhas.
+# @param formato "csv" ou "jsonl".
+# @param cabecalho nomes das colunas do CSV; None lê da primeira linha.
+# @param inicio número, no arquivo, da primeira linha lida.
+# @return gerador de pares (linha, registro); registro é um dicionário ou
+#         uma exceção ErroCenario quando a linha não pôde ser lida.
+#
+def le_registros(arquivo, formato: str = "csv", cabecalho: list = None,
+                 inicio: int = 1):
+    if formato == "csv":
+        leitor = csv.DictReader(arquivo, fieldnames=cabecalho)
+        for registro in leitor:
+            yield inicio + leitor.line_num - 1, registro
+    else:
+        for linha, texto in enumerate(arquivo, inicio):
+            if not texto.strip():
+                continue
+            try:
+                registro = json.loads(texto)
+                if not isinstance(registro, dict):
+                    raise ValueError("esperado um objeto JSON")
+            except ValueError as err:
+                registro = ErroCenario(linha, str(err))
+            yield linha, registro
+
+
+## Calcula cada cenário lido.
+#
+# @param registros gerador retornado por le_registros.
+# @param cache cdicache.CacheResultados consultado antes de calcular, ou
+#        None.
+# @return gerador de triplas (linha, argumentos, ResultadoCDB) ou de
+#         exceções ErroCenario para as linhas inválidas.
+#
+def calcula_registros(registros, cache=None):
+    if cache is not None:
+        yield from calcula_registros_com_cache(registros, cache)
+        return
+    for linha, registro in registros:
+        if isinstance(registro, ErroCenario):
+            yield registro
+            continue
+        try:
+            argumentos = converte_cenario(registro)
+            yield linha, argumentos, calcula_cdb(*argumentos)
+        except (ArithmeticError, ValueError) as err:
+            yield ErroCenario(linha, str(err) or type(err).__name__)
+
+
+## Calcula os cenários lidos em blocos, consultando o cache uma vez por
+# bloco e guardando nele só os cenários que faltavam.
+#
+# @param registros gerador retornado por le_registros.
+# @param cache cdicache.CacheResultados.
+# @param tamanho_bloco cenários por consulta ao cache.
+# @return o mesmo gerador de calcula_registros.
+#
+def calcula_registros_com_cache(registros, cache,
+                                tamanho_bloco: int = 5000):
+    registros = iter(registros)
+    while True:
+        bloco = list(itertools.islice(registros, tamanho_bloco))
+        if not bloco:
+            return
+        itens = []
+        for linha, registro in bloco:
+            if not isinstance(registro, ErroCenario):
+                try:
+                    registro = (linha, converte_cenario(registro))
+                except ValueError as err:
+                    registro = ErroCenario(linha, str(err))
+            itens.append(registro)
+        validos = [item for item in itens
+                   if not isinstance(item, ErroCenario)]
+        encontrados = iter(cache.busca([argumentos
+                                        for _, argumentos in validos]))
+        novos = []
+        for item in itens:
+            if isinstance(item, ErroCenario):
+                yield item
+                continue
+            linha, argumentos = item
+            resultado = next(encontrados)
+            if resultado is None:
+                try:
+                    resultado = calcula_cdb(*argumentos)
+                except (ArithmeticError, ValueError) as err:
+                    yield ErroCenario(linha, str(err) or type(err).__name__)
+                    continue
+                novos.append((argumentos, resultado))
+            yield linha, argumentos, resultado
+        cache.grava(novos)
+
+
+## Escreve os resultados à medida que são produzidos, sem cabeçalho.
+#
+# @param resultados gerador retornado por calcula_registros.
+# @param saida arquivo de texto aberto para escrita.
+# @param formato "csv" ou "jsonl".
+# @param erros arquivo onde as linhas inválidas são relatadas.
+# @return tupla (cenários calculados, linhas com erro).
+#
+def formata_resultados(resultados, saida, formato: str = "csv",
+                       erros=sys.stderr) -> tuple:
+    campos = CAMPOS_CENARIO + CAMPOS_CDB
+    escritor = None
+    if formato == "csv":
+        escritor = csv.writer(saida, lineterminator="\n")
+    ok = falhas = 0
+    for item in resultados:
+        if isinstance(item, ErroCenario):
+            falhas += 1
+            print("Erro: %s" % item, file=erros)
+            continue
+        _, argumentos, resultado = item
+        if escritor is not None:
+            escritor.writerow(argumentos + resultado)
+        else:
+            saida.write(json.dumps(dict(zip(campos, argumentos + resultado)))
+                        + "\n")
+        ok += 1
+    return ok, falhas
+
+
+## Escreve o cabeçalho (no CSV) e os resultados à medida que são produzidos.
+#
+# @param resultados gerador retornado por calcula_registros.
+# @param saida arquivo de texto aberto para escrita.
+# @param formato "csv" ou "jsonl".
+# @param erros arquivo onde as linhas inválidas são relatadas.
+# @return tupla (cenários calculados, linhas com erro).
+#
+def escreve_resultados(resultados, saida, formato: str = "csv",
+                       erros=sys.stderr) -> tuple:
+    if formato == "csv":
+        csv.writer(saida, lineterminator="\n").writerow(
+            CAMPOS_CENARIO + CAMPOS_CDB)
+    return formata_resultados(resultados, saida, formato, erros)
+
+
+## Lê, calcula e formata um bloco de linhas; executado nos processos
+# trabalhadores, para que o processo principal só distribua e escreva texto.
+#
+# @param linhas lista de linhas de texto da entrada.
+# @param inicio número da primeira linha do bloco.
+# @param formato_entrada "csv" ou "jsonl".
+# @param formato_saida "csv" ou "jsonl".
+# @param cabecalho nomes das colunas do CSV de entrada.
+# @param cache arquivo do cache de resultados (cdicache), ou None; aberto
+#        sem contar as entradas, o que fica para o processo principal.
+# @return tupla (texto de saída, texto de erros, calculados, com erro,
+#         acertos do cache, faltas do cache).
+#
+def processa_bloco(linhas: list, inicio: int, formato_entrada: str,
+                   formato_saida: str, cabecalho: list = None,
+                   cache: str = None) -> tuple:
+    saida, erros = io.StringIO(), io.StringIO()
+    with abre_cache(cache, conta=False) as resultados:
+        ok, falhas = formata_resultados(
+            calcula_registros(le_registros(linhas, formato_entrada,
+                                           cabecalho, inicio), resultados),
+            saida, formato_saida, erros)
+    acertos, faltas = (0, 0) if resultados is None else (
+        resultados.acertos, resultados.faltas)
+    return saida.getvalue(), erros.getvalue(), ok, falhas, acertos, faltas
+
+
+## Abre o cache de resultados, importando cdicache só quando pedido.
+#
+# @param caminho arquivo sqlite, ou None para nenhum cache.
+# @param conta se as entradas são contadas ao abrir (ver cdicache).
+# @return gerenciador de contexto que fornece o cache ou None.
+#
+def abre_cache(caminho: str = None, conta: bool = True):
+    if caminho is None:
+        return contextlib.nullcontext()
+    import cdicache
+    return cdicache.CacheResultados(caminho, conta=conta)
+
+
+## Relata os acertos e as faltas do cache.
+#
+# @param resultados cdicache.CacheResultados ou None.
+# @param erros arquivo onde o relato é escrito.
+#
+def relata_cache(resultados, erros=sys.stderr):
+    if resultados is not None:
+        print("Cache: %d acertos, %d faltas" % (resultados.acertos,
+                                                resultados.faltas),
+              file=erros)
+
+
+## Processa um lote em blocos de linhas distribuídos por um
+# ProcessPoolExecutor.
+#
+# Os blocos são submetidos em ordem e escritos na mesma ordem da entrada,
+# então a saída é idêntica à do processamento sequencial. No máximo 2
+# blocos por trabalhador ficam pendentes ao mesmo tempo, o que limita a
+# memória usada independentemente do tamanho da entrada. Os blocos são
+# separados por linha, então campos CSV com quebra de linha não são
+# suportados neste modo.
+#
+# @param entrada arquivo de texto com os cenários.
+# @param saida arquivo de texto para os resultados.
+# @param formato_entrada "csv" ou "jsonl".
+# @param formato_saida "csv" ou "jsonl".
+# @param erros arquivo onde as linhas inválidas são relatadas.
+# @param trabalhadores número de processos; None usa os.cpu_count().
+# @param tamanho_bloco linhas por bloco.
+# @param cache arquivo do cache de resultados, aberto por cada processo;
+#        os acertos e as faltas de todos os blocos são relatados em erros.
+# @return tupla (cenários calculados, linhas com erro).
+#
+def processa_paralelo(entrada, saida, formato_entrada: str = "csv",
+                      formato_saida: str = "csv", erros=sys.stderr,
+                      trabalhadores: int = None,
+                      tamanho_bloco: int = 10000,
+                      cache: str = None) -> tuple:
+    trabalhadores = trabalhadores or os.cpu_count() or 1
+    entrada = iter(entrada)
+    cabecalho = None
+    if formato_entrada == "csv":
+        cabecalho = next(csv.reader([next(entrada, "")]), None)
+    if formato_saida == "csv":
+        csv.writer(saida, lineterminator="\n").writerow(
+            CAMPOS_CENARIO + CAMPOS_CDB)
+    ok = falhas = 0
+    inicio = 2 if cabecalho is not None else 1
+    pendentes = collections.deque()
+    with abre_cache(cache, conta=False) as resultados, \
+            ProcessPoolExecutor(max_workers=trabalhadores) as executor:
+        while True:
+            while len(pendentes) < 2 * trabalhadores:
+                linhas = list(itertools.islice(entrada, tamanho_bloco))
+                if not linhas:
+                    break
+                pendentes.append(executor.submit(
+                    processa_bloco, linhas, inicio, formato_entrada,
+                    formato_saida, cabecalho, cache))
+                inicio += len(linhas)
+            if not pendentes:
+                break
+            texto, texto_erros, ok_bloco, falhas_bloco, acertos, faltas = \
+                pendentes.popleft().result()
+            saida.write(texto)
+            erros.write(texto_erros)
+            ok += ok_bloco
+            falhas += falhas_bloco
+            if resultados is not None:
+                resultados.acertos += acertos
+                resultados.faltas += faltas
+        if resultados is not None:
+            # as entradas são contadas uma vez, depois de todos os blocos
+            resultados.limita()
+            relata_cache(resultados, erros)
+    return ok, falhas
+
+
+## Processa um lote completo: leitura, cálculo e escrita.
+#
+# @param entrada arquivo de texto com os cenários.
+# @param saida arquivo de texto para os resultados.
+# @param formato_entrada "csv" ou "jsonl".
+# @param formato_saida "csv" ou "jsonl".
+# @param erros arquivo onde as linhas inválidas são relatadas.
+# @param trabalhadores número de processos; 0 calcula no próprio processo.
+# @param tamanho_bloco linhas por bloco no modo paralelo.
+# @param cache arquivo do cache de resultados (cdicache), ou None.
+# @return tupla (cenários calculados, linhas com erro).
+#
+def processa_lote(entrada, saida, formato_entrada: str = "csv",
+                  formato_saida: str = "csv", erros=sys.stderr,
+                  trabalhadores: int = 0,
+                  tamanho_bloco: int = 10000, cache: str = None) -> tuple:
+    if trabalhadores:
+        return processa_paralelo(entrada, saida, formato_entrada,
+                                 formato_saida, erros, trabalhadores,
+                                 tamanho_bloco, cache)
+    with abre_cache(cache) as resultados:
+        ok, falhas = escreve_resultados(
+            calcula_registros(le_registros(entrada, formato_entrada),
+                              resultados), saida, formato_saida, erros)
+        relata_cache(resultados, erros)
+    return ok, falhas
+
+
+## Abre um arquivo de texto, tratando "-" como entrada ou saída padrão.
+#
+# @param caminho nome do arquivo ou "-".
+# @param modo "r" ou "w".
+# @return arquivo aberto.
+#
+def abre(caminho: str, modo: str = "r"):
+    if caminho == "-":
+        return sys.stdin if modo == "r" else sys.stdout
+    return open(caminho, modo, newline="", encoding="utf-8")
+
+
+## Processa o lote indicado pela linha de comando de cdi.py.
+#
+# @param caminho_entrada arquivo de cenários ou "-" para stdin.
+# @param caminho_saida arquivo de resultados ou "-" para stdout.
+# @param formato formato forçado; None deduz pela extensão de cada arquivo.
+# @param trabalhadores número de processos; 0 calcula no próprio processo.
+# @param tamanho_bloco linhas por bloco no modo paralelo.
+# @param cache arquivo do cache de resultados (cdicache), ou None.
+# @return tupla (cenários calculados, linhas com erro).
+#
+def executa(caminho_entrada: str, caminho_saida: str = "-",
+            formato: str = None, trabalhadores: int = 0,
+            tamanho_bloco: int = 10000, cache: str = None) -> tuple:
+    formato_entrada = formato or formato_por_extensao(caminho_entrada)
+    formato_saida = formato or formato_por_extensao(caminho_saida,
+                                                    formato_entrada)
+    entrada = abre(caminho_entrada, "r")
+    saida = abre(caminho_saida, "w")
+    try:
+        return processa_lote(entrada, saida, formato_entrada, formato_saida,
+                             sys.stderr, trabalhadores, tamanho_bloco,
+                             cache)
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if saida is not sys.stdout:
+            saida.close()
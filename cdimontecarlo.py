@@ -0,0 +1,313 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_CDI_Monte_Carlo
+#
+# Simulação de Monte Carlo de caminhos mensais da Selic e do CDI.
+#
+# cdi.CDB supõe o mesmo CDI durante todo o prazo. Aqui a Selic anual segue
+# um processo com reversão à média (Vasicek discretizado por mês, com piso
+# zero),
+#
+#     s[k+1] = s[k] + reversao (media − s[k]) / 12 + volatilidade ε √(1/12),
+#
+# e o CDI acompanha a Selic com a diferença inicial entre os dois. Em cada
+# mês a aplicação rende a taxa mensal de t% do CDI daquele mês e a poupança
+# a de cdivec.jurospoupanca da Selic daquele mês, o que inclui a troca de
+# regra em 8,5%. O IR incide sobre o rendimento no resgate, como em cdi.CDB.
+#
+# Os caminhos são gerados em blocos de tamanho fixo, cada um com sua
+# semente derivada (numpy.random.SeedSequence.spawn), e o resultado de uma
+# semente é o mesmo com qualquer número de processos. Cada bloco é reduzido
+# a um resumo de tamanho fixo (contagem, soma, caminhos em que a aplicação
+# supera a poupança e PONTOS_RESUMO quantis ponderados) e os resumos são
+# juntados à medida que os blocos terminam: a memória não depende do número
+# de caminhos. Os quantis finais são aproximados, com erro de ordem
+# 1 / PONTOS_RESUMO no posto; as médias e a fração são exatas.
+#
+# @author Luan Bernardo Dias
+# @since 09/10/2022
+# @see https://en.wikipedia.org/wiki/Vasicek_model
+#
+import contextlib
+import getopt
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from cdi import DIAS_POR_MES
+from cdivec import aliquota_ir, jurospoupanca, year2month
+
+## Caminhos por bloco.
+TAMANHO_BLOCO = 10000
+
+## Velocidade de reversão à média da Selic, por ano.
+REVERSAO = 0.5
+
+## Volatilidade anual da Selic (em fração, 0.02 = 2 pontos percentuais).
+VOLATILIDADE = 0.02
+
+## Quantis calculados.
+QUANTIS = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+## Valores finais simulados de cada caminho.
+CAMPOS_MC = ("aplicacao", "poupanca", "diferenca")
+
+## Pontos do resumo de quantis de cada bloco.
+PONTOS_RESUMO = 2001
+
+
+## Gera caminhos mensais da Selic anual.
+#
+# @param rng numpy.random.Generator.
+# @param n número de caminhos.
+# @param meses número de meses.
+# @param p Selic anual inicial.
+# @param media Selic de longo prazo.
+# @param reversao velocidade de reversão à média, por ano.
+# @param volatilidade volatilidade anual.
+# @return matriz (n, meses) com a Selic de cada mês; o primeiro mês é p.
+#
+def caminhos_selic(rng, n: int, meses: int, p: float, media: float,
+                   reversao: float = REVERSAO,
+                   volatilidade: float = VOLATILIDADE):
+    # um mês por linha, para que cada passo da recorrência percorra memória
+    # contígua; o resultado é a transposta
+    choques = rng.standard_normal((meses - 1, n)) * volatilidade * \
+        np.sqrt(1 / 12)
+    caminhos = np.empty((meses, n))
+    caminhos[0] = p
+    for k in range(1, meses):
+        anterior = caminhos[k - 1]
+        np.maximum(anterior + reversao * (media - anterior) / 12 +
+                   choques[k - 1], 0.0, out=caminhos[k])
+    return caminhos.T
+
+
+## Simula um bloco de caminhos e calcula os valores finais.
+#
+# @param semente numpy.random.SeedSequence do bloco.
+# @param n número de caminhos do bloco.
+# @param c capital
+# @param cdi taxa cdi anual inicial
+# @param p taxa Selic anual inicial
+# @param t rentabilidade da aplicação em função do CDI
+# @param i alíquota do imposto de renda.
+# @param meses prazo em meses.
+# @param media Selic de longo prazo.
+# @param reversao velocidade de reversão à média.
+# @param volatilidade volatilidade anual da Selic.
+# @return dicionário com os resumos (ver resume) de CAMPOS_MC e
+#         "positivos", o número de caminhos com diferença positiva.
+#
+def simula_bloco(semente, n: int, c: float, cdi: float, p: float, t: float,
+                 i: float, meses: int, media: float,
+                 reversao: float = REVERSAO,
+                 volatilidade: float = VOLATILIDADE) -> dict:
+    selic = caminhos_selic(np.random.default_rng(semente), n, meses, p,
+                           media, reversao, volatilidade)
+    taxas_cdi = np.maximum(selic - (p - cdi), 0.0)
+    taxa_aplicacao = year2month(t * taxas_cdi / 100) / 100
+    taxa_poupanca = year2month(jurospoupanca(selic)) / 100
+    valor_aplicacao = c * np.prod(1 + taxa_aplicacao, axis=1)
+    aplicacao = valor_aplicacao - (valor_aplicacao - c) * i / 100
+    poupanca = c * np.prod(1 + taxa_poupanca, axis=1)
+    diferenca = aplicacao - poupanca
+    return {"aplicacao": resume(aplicacao), "poupanca": resume(poupanca),
+            "diferenca": resume(diferenca),
+            "positivos": int((diferenca > 0).sum())}
+
+
+## Resume um vetor em contagem, soma e quantis ponderados.
+#
+# @param valores vetor de valores.
+# @return dicionário com "n", "soma", "pontos" e "pesos" (o número de
+#         valores representado por cada ponto).
+#
+def resume(valores) -> dict:
+    niveis = np.linspace(0, 1, PONTOS_RESUMO)
+    return {"n": len(valores), "soma": float(valores.sum()),
+            "pontos": np.quantile(valores, niveis),
+            "pesos": np.full(PONTOS_RESUMO, len(valores) / PONTOS_RESUMO)}
+
+
+## Quantis de pontos ponderados, interpolando entre os pontos.
+#
+# @param pontos vetor de pontos.
+# @param pesos peso de cada ponto.
+# @param niveis níveis dos quantis, entre 0 e 1.
+# @return vetor de quantis.
+#
+def quantis_ponderados(pontos, pesos, niveis):
+    ordem = np.argsort(pontos, kind="stable")
+    pontos, pesos = pontos[ordem], pesos[ordem]
+    acumulado = np.cumsum(pesos)
+    # o posto de cada ponto é o peso acumulado até ele, com o primeiro em 0
+    # e o último em 1; com pesos iguais, são os níveis de numpy.quantile
+    postos = (acumulado - acumulado[0]) / (acumulado[-1] - acumulado[0]) \
+        if len(pontos) > 1 else np.zeros(1)
+    return np.interp(niveis, postos, pontos)
+
+
+## Junta dois resumos em um do mesmo tamanho.
+#
+# @param a resumo de resume ou None.
+# @param b resumo de resume.
+# @return resumo com os valores dos dois.
+#
+def junta(a, b) -> dict:
+    if a is None:
+        return b
+    pontos = np.concatenate([a["pontos"], b["pontos"]])
+    pesos = np.concatenate([a["pesos"], b["pesos"]])
+    n = a["n"] + b["n"]
+    return {"n": n, "soma": a["soma"] + b["soma"],
+            "pontos": quantis_ponderados(pontos, pesos,
+                                         np.linspace(0, 1, PONTOS_RESUMO)),
+            "pesos": np.full(PONTOS_RESUMO, n / PONTOS_RESUMO)}
+
+
+## Simula caminhos da Selic e resume a distribuição dos valores finais.
+#
+# @param c capital
+# @param cdi taxa cdi anual inicial
+# @param p taxa Selic anual inicial
+# @param t rentabilidade da aplicação em função do CDI
+# @param i alíquota do imposto de renda; None usa a tabela regressiva
+#          para o prazo.
+# @param meses prazo em meses.
+# @param caminhos número de caminhos simulados.
+# @param semente semente do gerador.
+# @param media Selic de longo prazo; None usa p.
+# @param reversao velocidade de reversão à média.
+# @param volatilidade volatilidade anual da Selic.
+# @param trabalhadores número de processos; 0 simula no próprio processo.
+# @param tamanho_bloco caminhos por bloco.
+# @return dicionário com "caminhos", "quantis" (os níveis de QUANTIS),
+#         "prob_supera" (fração dos caminhos em que a aplicação supera a
+#         poupança) e, para cada campo de CAMPOS_MC, um dicionário com
+#         "media" e "quantis" (aproximados, ver PONTOS_RESUMO).
+# @exception ValueError se meses ou caminhos for menor que 1.
+#
+def monte_carlo(c: float, cdi: float, p: float, t: float, i: float,
+                meses: int, caminhos: int = 100000, semente: int = 2022,
+                media: float = None, reversao: float = REVERSAO,
+                volatilidade: float = VOLATILIDADE, trabalhadores: int = 0,
+                tamanho_bloco: int = TAMANHO_BLOCO) -> dict:
+    if meses < 1:
+        raise ValueError("meses deve ser pelo menos 1: %d" % meses)
+    if caminhos < 1:
+        raise ValueError("caminhos deve ser pelo menos 1: %d" % caminhos)
+    if i is None:
+        i = float(aliquota_ir(DIAS_POR_MES * meses))
+    media = p if media is None else media
+    tamanhos = [min(tamanho_bloco, caminhos - k)
+                for k in range(0, caminhos, tamanho_bloco)]
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    argumentos = (c, cdi, p, t, i, meses, media, reversao, volatilidade)
+    with contextlib.ExitStack() as pilha:
+        if trabalhadores:
+            executor = pilha.enter_context(
+                ProcessPoolExecutor(max_workers=trabalhadores))
+            blocos = executor.map(
+                simula_bloco, sementes, tamanhos,
+                *([valor] * len(tamanhos) for valor in argumentos))
+        else:
+            blocos = (simula_bloco(s, n, *argumentos)
+                      for s, n in zip(sementes, tamanhos))
+        # os resumos são juntados na ordem dos blocos, à medida que chegam
+        juntos = dict.fromkeys(CAMPOS_MC)
+        positivos = 0
+        for bloco in blocos:
+            for campo in CAMPOS_MC:
+                juntos[campo] = junta(juntos[campo], bloco[campo])
+            positivos += bloco["positivos"]
+    resumo = {"caminhos": caminhos, "quantis": QUANTIS,
+              "prob_supera": positivos / caminhos}
+    for campo in CAMPOS_MC:
+        resumo[campo] = {
+            "media": juntos[campo]["soma"] / caminhos,
+            "quantis": quantis_ponderados(juntos[campo]["pontos"],
+                                          juntos[campo]["pesos"], QUANTIS)}
+    return resumo
+
+
+## Função principal: simula e imprime médias e quantis.
+#   @param c capital.
+#   @param a taxa CDI anual inicial.
+#   @param s taxa Selic anual inicial.
+#   @param i alíquota de IR ou auto.
+#   @param t rentabilidade (% CDI).
+#   @param m meses.
+#   @param n número de caminhos.
+#   @param r semente.
+#   @param v volatilidade anual da Selic.
+#   @param l Selic de longo prazo.
+#   @param p número de processos.
+#
+def main():
+    try:
+        opts, _ = getopt.getopt(sys.argv[1:], "c:a:s:i:t:m:n:r:v:l:p:h",
+                                ["capital=", "aplicacao=", "selic=",
+                                 "imposto=", "rentabilidade=", "meses=",
+                                 "caminhos=", "semente=", "volatilidade=",
+                                 "media=", "processos=", "help"])
+    except getopt.GetoptError as err:
+        print(err)
+        sys.exit(2)
+    c = cdi = p = t = None
+    i = None
+    meses = 12
+    opcoes = {"caminhos": 100000, "semente": 2022,
+              "volatilidade": VOLATILIDADE, "media": None,
+              "trabalhadores": 0}
+    for o, a in opts:
+        if o in ("-c", "--capital"):
+            c = float(a)
+        elif o in ("-a", "--aplicacao"):
+            cdi = float(a)
+        elif o in ("-s", "--selic"):
+            p = float(a)
+        elif o in ("-i", "--imposto"):
+            i = None if a == "auto" else float(a)
+        elif o in ("-t", "--rentabilidade"):
+            t = float(a)
+        elif o in ("-m", "--meses"):
+            meses = int(a)
+        elif o in ("-n", "--caminhos"):
+            opcoes["caminhos"] = int(a)
+        elif o in ("-r", "--semente"):
+            opcoes["semente"] = int(a)
+        elif o in ("-v", "--volatilidade"):
+            opcoes["volatilidade"] = float(a)
+        elif o in ("-l", "--media"):
+            opcoes["media"] = float(a)
+        elif o in ("-p", "--processos"):
+            opcoes["trabalhadores"] = int(a)
+        elif o in ("-h", "--help"):
+            c = None
+            break
+    if None in (c, cdi, p, t):
+        print("Usage: %s -c [capital] -a [CDI anual] -s [Selic] -i [IR|auto] "
+              "-t [taxa CDI] -m [meses] -n [caminhos] -r [semente] "
+              "-v [volatilidade] -l [Selic de longo prazo] -p [processos]"
+              % sys.argv[0])
+        sys.exit()
+    try:
+        resumo = monte_carlo(c, cdi, p, t, i, meses, **opcoes)
+    except ValueError as err:
+        print(err)
+        sys.exit(1)
+    print("%d caminhos, %d meses; aplicação supera a poupança em %.1f%% "
+          "dos caminhos" % (resumo["caminhos"], meses,
+                            100 * resumo["prob_supera"]))
+    print("%-12s %12s" % ("", "média") + "".join(
+        " %11s" % ("q%02d" % round(100 * q)) for q in resumo["quantis"]))
+    for campo in CAMPOS_MC:
+        print("%-12s %12.2f" % (campo, resumo[campo]["media"]) + "".join(
+            " %11.2f" % v for v in resumo[campo]["quantis"]))
+
+
+if __name__ == "__main__":
+    main()
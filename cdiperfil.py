@@ -0,0 +1,216 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_CDI_Perfil
+#
+# Instrumentação opcional das funções principais de cdi.py e das etapas
+# de leitura, cálculo e escrita do modo lote (cdilote.py).
+#
+# Ativada pela variável de ambiente CDI_PERFIL ou pela opção --perfil de
+# cdi.py. ativa() troca as funções dos módulos por versões que contam as
+# chamadas e somam o tempo de parede; sem ativa(), nada é trocado e o custo
+# é nulo. Ao sair, um resumo é impresso na saída de erro e, se um arquivo
+# foi indicado, o cProfile da execução é salvo nele (ver pstats).
+#
+# Os tempos são de parede: "total" inclui as funções instrumentadas
+# chamadas de dentro (ou, nos geradores, as etapas anteriores do lote) e
+# "próprio" as exclui. Só o processo atual é medido: no modo lote com
+# processos (-p), o trabalho dos processos filhos não aparece.
+#
+# @author Luan Bernardo Dias
+# @since 09/10/2022
+# @see https://docs.python.org/3/library/profile.html
+#
+import atexit
+import cProfile
+import functools
+import importlib
+import inspect
+import os
+import sys
+import time
+
+## Variável de ambiente que ativa a instrumentação: "1" ou "resumo" para
+# só o resumo, ou o nome do arquivo onde salvar o cProfile.
+VARIAVEL_AMBIENTE = "CDI_PERFIL"
+
+## Valores de CDI_PERFIL e --perfil que pedem só o resumo.
+SO_RESUMO = ("1", "resumo")
+
+## Funções instrumentadas em cada módulo.
+FUNCOES = {
+    "cdi": ("jc", "year2month", "month2day", "jurospoupanca", "calcula_cdb",
+            "CDB"),
+    "cdilote": ("le_registros", "calcula_registros", "escreve_resultados",
+                "calcula_cdb"),
+}
+
+
+## Chamadas e tempos acumulados de uma função instrumentada.
+#
+class Contador:
+    __slots__ = ("chamadas", "total", "proprio")
+
+    def __init__(self):
+        self.chamadas = 0
+        self.total = 0.0
+        self.proprio = 0.0
+
+
+## Contadores por nome de função.
+CONTADORES = {}
+
+## Tempo gasto em funções instrumentadas filhas de cada medição aberta.
+_pilha = []
+
+## Funções originais trocadas por ativa(): (módulo, nome, função).
+_originais = []
+
+## Estado da instrumentação ativa: {"destino": ..., "perfil": ...}.
+_estado = {}
+
+
+## Abre uma medição.
+#
+# @return instante inicial.
+#
+def _inicia():
+    _pilha.append(0.0)
+    return time.perf_counter()
+
+
+## Fecha a medição aberta por _inicia e acumula o tempo no contador.
+#
+# @param contador contador da função.
+# @param inicio instante retornado por _inicia.
+#
+def _termina(contador: Contador, inicio: float):
+    decorrido = time.perf_counter() - inicio
+    filhas = _pilha.pop()
+    contador.total += decorrido
+    contador.proprio += decorrido - filhas
+    if _pilha:
+        _pilha[-1] += decorrido
+
+
+## Envolve uma função para contar chamadas e medir o tempo. Em geradores,
+# cada chamada conta uma vez e o tempo é o de cada next().
+#
+# @param nome nome do contador.
+# @param funcao função original.
+# @return função instrumentada.
+#
+def instrumenta(nome: str, funcao):
+    contador = CONTADORES.setdefault(nome, Contador())
+
+    if inspect.isgeneratorfunction(funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            contador.chamadas += 1
+            iterador = funcao(*args, **kwargs)
+            while True:
+                inicio = _inicia()
+                try:
+                    item = next(iterador)
+                except StopIteration:
+                    return
+                finally:
+                    _termina(contador, inicio)
+                yield item
+    else:
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            contador.chamadas += 1
+            inicio = _inicia()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                _termina(contador, inicio)
+    medida.contador = contador
+    return medida
+
+
+## Troca as funções de FUNCOES pelas versões instrumentadas.
+#
+# @param destino arquivo onde salvar o cProfile ao sair, ou None/"resumo"
+#        para só o resumo.
+# @param principal módulo adicional com as funções de cdi.py, quando
+#        cdi.py roda como __main__.
+#
+def ativa(destino: str = None, principal=None):
+    if _estado:
+        return
+    alvos = [(importlib.import_module(nome), funcoes)
+             for nome, funcoes in FUNCOES.items()]
+    if principal is not None and principal not in [m for m, _ in alvos]:
+        alvos.append((principal, FUNCOES["cdi"]))
+    for modulo, funcoes in alvos:
+        for nome in funcoes:
+            funcao = getattr(modulo, nome)
+            _originais.append((modulo, nome, funcao))
+            setattr(modulo, nome, instrumenta(nome, funcao))
+    _estado["destino"] = None if destino in SO_RESUMO else destino
+    _estado["perfil"] = None
+    if _estado["destino"]:
+        _estado["perfil"] = cProfile.Profile()
+        _estado["perfil"].enable()
+    atexit.register(encerra)
+
+
+## Ativa a instrumentação se CDI_PERFIL estiver definida.
+#
+# @param principal ver ativa().
+# @return True se a instrumentação foi ativada.
+#
+def ativa_pelo_ambiente(principal=None) -> bool:
+    destino = os.environ.get(VARIAVEL_AMBIENTE)
+    if not destino:
+        return False
+    ativa(destino, principal)
+    return True
+
+
+## Restaura as funções originais, sem imprimir nada.
+#
+def desativa():
+    while _originais:
+        modulo, nome, funcao = _originais.pop()
+        setattr(modulo, nome, funcao)
+    if _estado.get("perfil") is not None:
+        _estado["perfil"].disable()
+    _estado.clear()
+    atexit.unregister(encerra)
+
+
+## Monta a tabela de chamadas e tempos, da função com maior tempo próprio
+# para a menor.
+#
+# @return texto da tabela.
+#
+def resumo() -> str:
+    linhas = ["%-20s %12s %12s %12s" % ("função", "chamadas", "total (s)",
+                                        "próprio (s)")]
+    for nome, contador in sorted(CONTADORES.items(),
+                                 key=lambda item: -item[1].proprio):
+        if contador.chamadas:
+            linhas.append("%-20s %12d %12.6f %12.6f" % (
+                nome, contador.chamadas, contador.total, contador.proprio))
+    return "\n".join(linhas)
+
+
+## Finaliza a instrumentação: salva o cProfile, se pedido, imprime o resumo
+# e restaura as funções originais. Registrada com atexit por ativa().
+#
+# @param saida arquivo do resumo (padrão: saída de erro).
+#
+def encerra(saida=None):
+    if not _estado:
+        return
+    perfil, destino = _estado["perfil"], _estado["destino"]
+    if perfil is not None:
+        perfil.disable()
+        perfil.dump_stats(destino)
+    print(resumo(), file=saida or sys.stderr)
+    if perfil is not None:
+        print("cProfile salvo em %s" % destino, file=saida or sys.stderr)
+    desativa()
@@ -0,0 +1,256 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_CDI_Ranking
+#
+# Ranking das melhores ofertas (CDB/LCI/LCA) de um catálogo para um
+# capital e um horizonte.
+#
+# Cada oferta tem emissor, rentabilidade (% CDI), prazo em meses e isenção
+# de IR. Uma oferta só serve ao horizonte se vencer até ele: o catálogo é
+# mantido ordenado por prazo (o índice por prazo), e as ofertas elegíveis
+# são uma fatia contínua encontrada por busca binária, sem percorrer as
+# demais. Até o horizonte, o montante líquido no vencimento rende na
+# poupança, para que ofertas de prazos diferentes sejam comparadas na mesma
+# data. A nota de cada oferta é a diferença entre esse montante e o da
+# poupança no horizonte, como Apl - Poup de cdi.CDB.
+#
+# As ofertas elegíveis são avaliadas de uma vez (NumPy) e as k melhores
+# separadas com numpy.argpartition, em tempo linear; só elas são ordenadas.
+#
+# @author Luan Bernardo Dias
+# @since 09/10/2022
+# @see https://numpy.org/doc/stable/reference/routines.sort.html
+#
+import getopt
+import sys
+from typing import NamedTuple
+
+import numpy as np
+
+from cdi import DIAS_POR_MES
+from cdilote import ErroCenario, formato_por_extensao, le_registros
+from cdivec import aliquota_ir, jurospoupanca, year2month
+
+## Campos de uma oferta do catálogo.
+CAMPOS_OFERTA = ("emissor", "rentabilidade", "prazo", "isento")
+
+## Textos aceitos como verdadeiro na coluna "isento".
+VERDADEIROS = ("1", "true", "sim", "s", "yes", "y")
+
+
+## Uma oferta do ranking e seus valores no horizonte.
+#
+class PosicaoRanking(NamedTuple):
+    emissor: str
+    rentabilidade: float
+    prazo: int
+    isento: bool
+    liquido: float
+    poupanca: float
+    diferenca: float
+
+
+## Converte o valor da coluna "isento".
+#
+# @param valor bool, número ou texto.
+# @return True se a oferta for isenta de IR.
+#
+def le_isento(valor) -> bool:
+    if isinstance(valor, str):
+        return valor.strip().lower() in VERDADEIROS
+    return bool(valor)
+
+
+## Catálogo de ofertas, indexado por prazo.
+#
+class Catalogo:
+    ##
+    # @param emissores nomes dos emissores.
+    # @param rentabilidades rentabilidades (% CDI).
+    # @param prazos prazos em meses (>= 1).
+    # @param isentos isenção de IR de cada oferta.
+    # @exception ValueError se os tamanhos forem diferentes ou algum prazo
+    #            for menor que 1.
+    #
+    def __init__(self, emissores, rentabilidades, prazos, isentos):
+        prazos = np.asarray(prazos, dtype=np.int64)
+        colunas = [np.asarray(emissores, dtype=object),
+                   np.asarray(rentabilidades, dtype=np.float64), prazos,
+                   np.asarray(isentos, dtype=bool)]
+        if len({len(coluna) for coluna in colunas}) > 1:
+            raise ValueError("colunas de tamanhos diferentes")
+        if len(prazos) and prazos.min() < 1:
+            raise ValueError("prazo menor que 1 mês")
+        ordem = np.argsort(prazos, kind="stable")
+        self.emissores, self.rentabilidades, self.prazos, self.isentos = (
+            coluna[ordem] for coluna in colunas)
+        # a alíquota só depende do prazo da oferta, não da consulta
+        self.aliquotas = np.where(self.isentos, 0.0,
+                                  aliquota_ir(DIAS_POR_MES * self.prazos))
+
+    def __len__(self):
+        return len(self.prazos)
+
+    ## Monta o catálogo a partir de registros lidos de CSV ou JSONL.
+    #
+    # @param registros iterável de pares (linha, registro), como os de
+    #        cdilote.le_registros; registro é um dicionário com
+    #        CAMPOS_OFERTA ou a exceção da linha que não pôde ser lida.
+    # @return Catalogo.
+    # @exception cdilote.ErroCenario (ValueError) com a linha do arquivo
+    #            se um registro não puder ser lido.
+    #
+    @classmethod
+    def de_registros(cls, registros):
+        colunas = ([], [], [], [])
+        for linha, registro in registros:
+            if isinstance(registro, Exception):
+                raise registro
+            try:
+                colunas[0].append(str(registro["emissor"]))
+                colunas[1].append(float(registro["rentabilidade"]))
+                colunas[2].append(int(registro["prazo"]))
+                colunas[3].append(le_isento(registro.get("isento") or ""))
+            except (KeyError, TypeError, ValueError) as err:
+                raise ErroCenario(linha, "oferta inválida: %s" % err)
+        return cls(*colunas)
+
+    ## Fatia do catálogo com as ofertas que vencem no horizonte.
+    #
+    # @param horizonte meses.
+    # @param prazo_minimo menor prazo aceito, em meses.
+    # @return slice sobre as colunas do catálogo.
+    #
+    def elegiveis(self, horizonte: int, prazo_minimo: int = 1) -> slice:
+        return slice(np.searchsorted(self.prazos, prazo_minimo, "left"),
+                     np.searchsorted(self.prazos, horizonte, "right"))
+
+    ## Avalia as ofertas elegíveis.
+    #
+    # @param c capital
+    # @param cdi taxa cdi anual
+    # @param p taxa Selic anual
+    # @param horizonte meses.
+    # @param prazo_minimo menor prazo aceito, em meses.
+    # @return par (fatia, dicionário com os vetores "liquido", "poupanca"
+    #         e "diferenca" das ofertas da fatia).
+    #
+    def avalia(self, c: float, cdi: float, p: float, horizonte: int,
+               prazo_minimo: int = 1) -> tuple:
+        fatia = self.elegiveis(horizonte, prazo_minimo)
+        prazos = self.prazos[fatia]
+        taxa = year2month(self.rentabilidades[fatia] * cdi / 100) / 100
+        taxa_poupanca = year2month(jurospoupanca(p)) / 100
+        valor = c * (1 + taxa) ** prazos
+        liquido = (valor - (valor - c) * self.aliquotas[fatia] / 100) * \
+            (1 + taxa_poupanca) ** (horizonte - prazos)
+        poupanca = c * (1 + taxa_poupanca) ** horizonte
+        return fatia, {"liquido": liquido,
+                       "poupanca": np.full(liquido.shape, poupanca),
+                       "diferenca": liquido - poupanca}
+
+    ## As k melhores ofertas para um capital e um horizonte.
+    #
+    # @param c capital
+    # @param cdi taxa cdi anual
+    # @param p taxa Selic anual
+    # @param horizonte meses.
+    # @param k número de ofertas.
+    # @param prazo_minimo menor prazo aceito, em meses.
+    # @return lista de PosicaoRanking, da maior para a menor diferença.
+    #
+    def melhores(self, c: float, cdi: float, p: float, horizonte: int,
+                 k: int = 10, prazo_minimo: int = 1) -> list:
+        fatia, valores = self.avalia(c, cdi, p, horizonte, prazo_minimo)
+        diferenca = valores["diferenca"]
+        k = min(k, len(diferenca))
+        if k <= 0:
+            return []
+        escolhidas = np.argpartition(-diferenca, k - 1)[:k] \
+            if k < len(diferenca) else np.arange(len(diferenca))
+        escolhidas = escolhidas[np.argsort(-diferenca[escolhidas],
+                                           kind="stable")]
+        posicoes = escolhidas + fatia.start
+        return [PosicaoRanking(self.emissores[j],
+                               float(self.rentabilidades[j]),
+                               int(self.prazos[j]), bool(self.isentos[j]),
+                               float(valores["liquido"][e]),
+                               float(valores["poupanca"][e]),
+                               float(diferenca[e]))
+                for e, j in zip(escolhidas, posicoes)]
+
+
+## Lê um catálogo de um arquivo CSV ou JSONL.
+#
+# @param caminho arquivo com as colunas de CAMPOS_OFERTA.
+# @return Catalogo.
+# @exception ValueError se uma linha não puder ser lida; a mensagem traz o
+#            número da linha no arquivo.
+#
+def le_catalogo(caminho: str) -> Catalogo:
+    with open(caminho, newline="", encoding="utf-8") as arquivo:
+        return Catalogo.de_registros(
+            le_registros(arquivo, formato_por_extensao(caminho)))
+
+
+## Função principal: imprime as melhores ofertas do catálogo.
+#   @param f arquivo do catálogo (CSV ou JSONL).
+#   @param c capital.
+#   @param a taxa CDI anual.
+#   @param s taxa Selic anual.
+#   @param m horizonte em meses.
+#   @param k número de ofertas.
+#   @param n menor prazo aceito, em meses.
+#
+def main():
+    try:
+        opts, _ = getopt.getopt(sys.argv[1:], "f:c:a:s:m:k:n:h",
+                                ["catalogo=", "capital=", "aplicacao=",
+                                 "selic=", "meses=", "melhores=",
+                                 "prazo-minimo=", "help"])
+    except getopt.GetoptError as err:
+        print(err)
+        sys.exit(2)
+    caminho = c = cdi = p = meses = None
+    k = 10
+    prazo_minimo = 1
+    for o, a in opts:
+        if o in ("-f", "--catalogo"):
+            caminho = a
+        elif o in ("-c", "--capital"):
+            c = float(a)
+        elif o in ("-a", "--aplicacao"):
+            cdi = float(a)
+        elif o in ("-s", "--selic"):
+            p = float(a)
+        elif o in ("-m", "--meses"):
+            meses = int(a)
+        elif o in ("-k", "--melhores"):
+            k = int(a)
+        elif o in ("-n", "--prazo-minimo"):
+            prazo_minimo = int(a)
+        elif o in ("-h", "--help"):
+            caminho = None
+            break
+    if None in (caminho, c, cdi, p, meses):
+        print("Usage: %s -f [catálogo.csv|.jsonl] -c [capital] -a [CDI anual] "
+              "-s [Selic] -m [horizonte em meses] -k [ofertas] "
+              "-n [prazo mínimo]" % sys.argv[0])
+        sys.exit()
+    try:
+        catalogo = le_catalogo(caminho)
+    except (OSError, ValueError) as err:
+        print(err)
+        sys.exit(1)
+    print("%-20s %8s %6s %6s %12s %12s" % ("emissor", "% CDI", "prazo",
+                                            "isento", "líquido", "Apl-Poup"))
+    for posicao in catalogo.melhores(c, cdi, p, meses, k, prazo_minimo):
+        print("%-20s %8.1f %6d %6s %12.2f %12.2f" % (
+            posicao.emissor, posicao.rentabilidade, posicao.prazo,
+            "sim" if posicao.isento else "não", posicao.liquido,
+            posicao.diferenca))
+
+
+if __name__ == "__main__":
+    main()
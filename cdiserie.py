@@ -0,0 +1,345 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_CDI_Serie
+#
+# Rendimento de CDBs por dia útil sobre uma série histórica de CDI.
+#
+# O modelo de cdi.py capitaliza um CDI anual constante mês a mês. Aqui a
+# série diária publicada é usada dia a dia, na convenção de 252 dias úteis
+# por ano de month2day/day2year: o fator de um dia é (1 + cdi)^(1/252) e,
+# para um título de t% do CDI, 1 + t/100 × ((1 + cdi)^(1/252) − 1).
+#
+# Os fatores diários são acumulados uma única vez em um índice de produtos
+# prefixados, de modo que o fator entre duas datas quaisquer é a razão de
+# duas posições do índice: cada consulta custa uma busca binária pelas
+# datas (O(log n)) e uma divisão, sem laço sobre os dias.
+#
+# Para não reprocessar o CSV a cada inicialização, a série pode ser
+# convertida para um arquivo binário compacto (cabeçalho fixo seguido de
+# vetores int64/float64 contíguos, incluindo o índice de 100% do CDI),
+# aberto com numpy.memmap sem cópia. Vários processos que abrem o mesmo
+# arquivo compartilham as mesmas páginas do cache do sistema operacional.
+#
+# @author Luan Bernardo Dias
+# @since 09/10/2022
+# @see https://www.b3.com.br/pt_br/market-data-e-indices/
+#
+import csv
+import functools
+import getopt
+import struct
+import sys
+
+import numpy as np
+
+from cdi import imposto
+from cdivec import aliquota_iof, aliquota_ir
+
+
+## Número máximo de índices (um por percentual do CDI) guardados em cada
+# série, além do de 100% lido do arquivo binário.
+INDICES_GUARDADOS = 32
+
+## Identificação do arquivo binário de séries.
+MAGICO = b"CDISERIE"
+
+## Versão do formato binário.
+VERSAO = 1
+
+## Cabeçalho do arquivo binário: identificação, versão, indicadores
+# (bit 0: possui Selic), número de dias e dias úteis por ano.
+CABECALHO = struct.Struct("<8sIIqq")
+
+
+## Converte uma data em texto (AAAA-MM-DD ou DD/MM/AAAA) para
+# numpy.datetime64.
+#
+# @param texto data em texto.
+# @return numpy.datetime64 com precisão de dia.
+#
+def converte_data(texto: str) -> np.datetime64:
+    texto = texto.strip()
+    if "/" in texto:
+        dia, mes, ano = texto.split("/")
+        texto = "%s-%s-%s" % (ano, mes.zfill(2), dia.zfill(2))
+    return np.datetime64(texto, "D")
+
+
+## Índice acumulado de t% do CDI, sem cache (ver SerieCDI.indice).
+#
+# @param taxa_diaria vetor de taxas diárias do CDI.
+# @param t rentabilidade em % do CDI.
+# @return vetor de n + 1 fatores.
+#
+def calcula_indice(taxa_diaria, t: float) -> np.ndarray:
+    fatores = 1 + t / 100 * taxa_diaria
+    return np.concatenate(([1.0], np.cumprod(fatores)))
+
+
+## Série diária de CDI (e, opcionalmente, Selic) com índice acumulado.
+#
+class SerieCDI:
+    ##
+    # @param datas vetor de datas (dias úteis), em ordem crescente.
+    # @param cdi vetor de taxas CDI anuais (0.1365 = 13,65% ao ano).
+    # @param selic vetor de taxas Selic anuais ou None.
+    # @param wd número de dias úteis por ano.
+    # @param taxa_diaria taxas diárias já calculadas (arquivo binário).
+    # @param indice índice de 100% do CDI já calculado (arquivo binário).
+    #
+    def __init__(self, datas, cdi, selic=None, wd: int = 252,
+                 taxa_diaria=None, indice=None):
+        self.datas = np.asarray(datas, dtype="datetime64[D]")
+        self.cdi = np.asarray(cdi, dtype=np.float64)
+        self.selic = None if selic is None else np.asarray(selic,
+                                                           dtype=np.float64)
+        if self.datas.shape != self.cdi.shape or self.datas.ndim != 1:
+            raise ValueError("datas e cdi devem ser vetores do mesmo tamanho")
+        self.wd = wd
+        self._indice_arquivo = None
+        if taxa_diaria is not None and indice is not None:
+            self.taxa_diaria = taxa_diaria
+            self._indice_arquivo = indice
+        else:
+            if np.any(self.datas[1:] <= self.datas[:-1]):
+                raise ValueError("as datas devem ser crescentes e sem "
+                                 "repetição")
+            # taxa de cada dia útil, como em month2day (sem o fator 100)
+            self.taxa_diaria = (1 + self.cdi) ** (1.0 / wd) - 1
+        # cache LRU por série, como cdi.taxas_cdb: cada índice tem n + 1
+        # fatores, e percentuais variados não podem acumular sem limite.
+        # O cache guarda só as taxas, e não a série, para não criar um
+        # ciclo de referências que prenda o arquivo mapeado.
+        self._indices = functools.lru_cache(maxsize=INDICES_GUARDADOS)(
+            functools.partial(calcula_indice, self.taxa_diaria))
+
+    ## Lê uma série de um arquivo CSV com cabeçalho e as colunas data, cdi
+    # e, opcionalmente, selic. As taxas são percentuais anuais (13.65), ou
+    # diárias se taxa_diaria for True (como na série 12 do Banco Central).
+    # Aceita separador "," ou ";" e vírgula decimal.
+    #
+    # @param caminho nome do arquivo.
+    # @param taxa_diaria True se as taxas do arquivo forem diárias.
+    # @param wd número de dias úteis por ano.
+    # @return SerieCDI.
+    #
+    @classmethod
+    def carrega_csv(cls, caminho: str, taxa_diaria: bool = False,
+                    wd: int = 252) -> "SerieCDI":
+        with open(caminho, newline="", encoding="utf-8") as arquivo:
+            cabecalho = arquivo.readline()
+            separador = ";" if ";" in cabecalho else ","
+            campos = [c.strip().lower() for c in cabecalho.split(separador)]
+            datas, colunas = [], {"cdi": [], "selic": []}
+            for linha in csv.DictReader(arquivo, fieldnames=campos,
+                                        delimiter=separador):
+                if not linha.get("data"):
+                    continue
+                datas.append(converte_data(linha["data"]))
+                for nome in colunas:
+                    if linha.get(nome) not in (None, ""):
+                        colunas[nome].append(
+                            float(linha[nome].replace(",", ".")) / 100)
+        taxas = {nome: np.array(valores) for nome, valores in colunas.items()
+                 if len(valores) == len(datas)}
+        if "cdi" not in taxas:
+            raise ValueError("coluna 'cdi' ausente ou incompleta em %s"
+                             % caminho)
+        if taxa_diaria:
+            taxas = {nome: (1 + v) ** wd - 1 for nome, v in taxas.items()}
+        return cls(datas, taxas["cdi"], taxas.get("selic"), wd)
+
+    ## Grava a série no formato binário lido por abre_binario.
+    #
+    # @param caminho nome do arquivo de destino.
+    #
+    def salva_binario(self, caminho: str):
+        indicadores = 0 if self.selic is None else 1
+        with open(caminho, "wb") as arquivo:
+            arquivo.write(CABECALHO.pack(MAGICO, VERSAO, indicadores,
+                                         len(self), self.wd))
+            np.asarray(self.datas.view(np.int64), dtype="<i8").tofile(arquivo)
+            vetores = [self.cdi, self.taxa_diaria, self.indice(100)]
+            if self.selic is not None:
+                vetores.append(self.selic)
+            for vetor in vetores:
+                np.asarray(vetor, dtype="<f8").tofile(arquivo)
+
+    ## Abre uma série gravada por salva_binario sem ler o arquivo para a
+    # memória: os vetores são numpy.memmap somente leitura sobre o arquivo.
+    #
+    # @param caminho nome do arquivo.
+    # @return SerieCDI.
+    # @exception ValueError se o arquivo não estiver no formato esperado.
+    #
+    @classmethod
+    def abre_binario(cls, caminho: str) -> "SerieCDI":
+        with open(caminho, "rb") as arquivo:
+            cabecalho = arquivo.read(CABECALHO.size)
+        if len(cabecalho) != CABECALHO.size:
+            raise ValueError("%s: arquivo de série truncado" % caminho)
+        magico, versao, indicadores, n, wd = CABECALHO.unpack(cabecalho)
+        if magico != MAGICO or versao != VERSAO:
+            raise ValueError("%s: não é uma série CDI versão %d"
+                             % (caminho, VERSAO))
+        mapa = np.memmap(caminho, dtype=np.uint8, mode="r")
+        posicao = CABECALHO.size
+
+        def vetor(tipo, tamanho):
+            nonlocal posicao
+            visao = np.frombuffer(mapa, dtype=tipo, count=tamanho,
+                                  offset=posicao)
+            posicao += 8 * tamanho
+            return visao
+
+        datas = vetor("<i8", n).view("datetime64[D]")
+        cdi = vetor("<f8", n)
+        taxa_diaria = vetor("<f8", n)
+        indice = vetor("<f8", n + 1)
+        selic = vetor("<f8", n) if indicadores & 1 else None
+        return cls(datas, cdi, selic, wd, taxa_diaria, indice)
+
+    ## Número de dias úteis da série.
+    #
+    def __len__(self) -> int:
+        return len(self.datas)
+
+    ## Índice acumulado para um percentual do CDI: indice[k] é o fator
+    # acumulado dos k primeiros dias da série (indice[0] = 1). É calculado
+    # na primeira consulta de cada percentual e guardado, até
+    # INDICES_GUARDADOS percentuais (os menos usados saem primeiro); o de
+    # 100% lido do arquivo binário é sempre mantido.
+    #
+    # @param t rentabilidade em % do CDI.
+    # @return vetor de n + 1 fatores.
+    #
+    def indice(self, t: float = 100) -> np.ndarray:
+        t = float(t)
+        if t == 100.0 and self._indice_arquivo is not None:
+            return self._indice_arquivo
+        return self._indices(t)
+
+    ## Estatísticas do cache de índices.
+    #
+    # @return tupla (hits, misses, maxsize, currsize) de functools.
+    #
+    def estatisticas_indices(self):
+        return self._indices.cache_info()
+
+    ## Posição, no índice, de cada data: o primeiro dia útil da série que
+    # não é anterior à data.
+    #
+    # @param datas data ou vetor de datas.
+    # @return posição ou vetor de posições entre 0 e len(self) - 1.
+    # @exception ValueError se alguma data for anterior à primeira ou
+    #            posterior à última da série, que searchsorted trocaria
+    #            pela primeira ou pela última sem aviso.
+    #
+    def posicao(self, datas):
+        datas = np.asarray(datas, dtype="datetime64[D]")
+        fora = (datas < self.datas[0]) | (datas > self.datas[-1])
+        if np.any(fora):
+            raise ValueError("data fora da série (%s a %s): %s"
+                             % (self.datas[0], self.datas[-1],
+                                np.extract(fora, datas)[0]))
+        return np.searchsorted(self.datas, datas)
+
+    ## Número de dias úteis da série em [inicio, fim).
+    #
+    # @param inicio data (ou vetor) de aplicação.
+    # @param fim data (ou vetor) de resgate.
+    # @return número (ou vetor) de dias úteis.
+    #
+    def dias_uteis(self, inicio, fim):
+        return self.posicao(fim) - self.posicao(inicio)
+
+    ## Fator acumulado de t% do CDI entre a data de aplicação (inclusive) e
+    # a de resgate (exclusive). As datas podem ser vetores.
+    #
+    # @param inicio data (ou vetor) de aplicação.
+    # @param fim data (ou vetor) de resgate.
+    # @param t rentabilidade em % do CDI.
+    # @return fator (ou vetor de fatores).
+    # @exception ValueError se alguma data estiver fora da série.
+    #
+    def fator(self, inicio, fim, t: float = 100):
+        indice = self.indice(t)
+        return indice[self.posicao(fim)] / indice[self.posicao(inicio)]
+
+    ## Montante líquido de uma aplicação em t% do CDI entre duas datas,
+    # descontado o imposto de renda como em cdi.CDB.
+    #
+    # Com i=None, os impostos seguem o prazo em dias corridos de cada
+    # aplicação: o IOF regressivo (resgates em menos de 30 dias) incide
+    # sobre o rendimento e o IR da tabela regressiva sobre o rendimento
+    # que sobra.
+    #
+    # @param c capital.
+    # @param inicio data (ou vetor) de aplicação.
+    # @param fim data (ou vetor) de resgate.
+    # @param t rentabilidade em % do CDI.
+    # @param i alíquota do imposto de renda ou None.
+    # @return montante líquido (ou vetor).
+    #
+    def montante(self, c, inicio, fim, t: float = 100, i=0.0):
+        c = np.asarray(c, dtype=np.float64)
+        valor = c * self.fator(inicio, fim, t)
+        if i is None:
+            dias = (np.asarray(fim, dtype="datetime64[D]")
+                    - np.asarray(inicio, dtype="datetime64[D]")).astype(int)
+            valor = valor - imposto(valor, c, aliquota_iof(dias))
+            i = aliquota_ir(dias)
+        return valor - imposto(valor, c, np.asarray(i, dtype=np.float64))
+
+
+## Converte uma série em CSV (ver SerieCDI.carrega_csv) para o formato
+# binário.
+#
+# @param origem arquivo CSV.
+# @param destino arquivo binário.
+# @param taxa_diaria True se as taxas do CSV forem diárias.
+# @return SerieCDI lida do CSV.
+#
+def converte_csv(origem: str, destino: str,
+                 taxa_diaria: bool = False) -> SerieCDI:
+    serie = SerieCDI.carrega_csv(origem, taxa_diaria)
+    serie.salva_binario(destino)
+    return serie
+
+
+## Função principal: converte um CSV de série CDI para o formato binário.
+#   @param e arquivo CSV de entrada.
+#   @param o arquivo binário de saída.
+#   @param d as taxas do CSV são diárias.
+#
+def main():
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "e:o:dh",
+                                   ["entrada=", "saida=", "diaria", "help"])
+    except getopt.GetoptError as err:
+        print(err)
+        sys.exit(2)
+    entrada = saida = None
+    taxa_diaria = False
+    for o, a in opts:
+        if o in ("-e", "--entrada"):
+            entrada = a
+        elif o in ("-o", "--saida"):
+            saida = a
+        elif o in ("-d", "--diaria"):
+            taxa_diaria = True
+        elif o in ("-h", "--help"):
+            entrada = None
+            break
+    if entrada is None or saida is None:
+        print("Usage: %s -e [série.csv] -o [série.bin] -d [taxas diárias]"
+              % sys.argv[0])
+        sys.exit()
+    serie = converte_csv(entrada, saida, taxa_diaria)
+    print("%d dias úteis de %s a %s gravados em %s" % (
+        len(serie), serie.datas[0], serie.datas[-1], saida))
+
+
+if __name__ == "__main__":
+    main()
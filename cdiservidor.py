@@ -0,0 +1,314 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_CDI_Servidor
+#
+# Servidor HTTP (asyncio) do cálculo de CDB, em TCP ou em socket Unix.
+#
+# Um processo só atende muitas cotações sem pagar a inicialização do
+# interpretador a cada uma. Requisições que chegam dentro de uma janela
+# curta (JANELA_LOTE) são agrupadas em um único cálculo vetorizado
+# (cdivec.cdb_lote); sem o NumPy, cada cenário é calculado por
+# cdi.calcula_cdb. Um cenário que falha no cálculo só faz falhar, com 400,
+# a requisição a que pertence.
+#
+# Rotas:
+# - POST /cdb: corpo JSON com um cenário (campos de cdilote.CAMPOS_CENARIO)
+#   ou uma lista de cenários; resposta com os campos de entrada e de
+#   cdi.CAMPOS_CDB, como no modo lote em JSONL. Cenários com resultado não
+#   finito (capital zero, por exemplo) são rejeitados com 400, já que NaN e
+#   infinito não são JSON válido.
+# - GET /estatisticas: contadores de requisições, lotes, vazão e latência.
+#
+# @author Luan Bernardo Dias
+# @since 09/10/2022
+# @see https://docs.python.org/3/library/asyncio-stream.html
+#
+import asyncio
+import collections
+import json
+import math
+import sys
+import time
+
+from cdi import CAMPOS_CDB, calcula_cdb
+from cdilote import CAMPOS_CENARIO, converte_cenario
+
+try:
+    import cdivec
+except ImportError:
+    cdivec = None
+
+## Tempo, em segundos, que o primeiro cenário de um lote espera por outros.
+JANELA_LOTE = 0.002
+
+## Número de cenários a partir do qual o lote é calculado sem esperar.
+MAX_LOTE = 4096
+
+## Número de latências guardadas para os percentis.
+AMOSTRAS_LATENCIA = 10000
+
+## Textos dos códigos de status usados.
+STATUS_HTTP = {200: "OK", 400: "Bad Request", 404: "Not Found"}
+
+
+## Contadores de requisições, lotes e latências do servidor.
+#
+class Estatisticas:
+    def __init__(self):
+        self.inicio = time.monotonic()
+        self.requisicoes = 0
+        self.cenarios = 0
+        self.erros = 0
+        self.lotes = 0
+        self.cenarios_em_lotes = 0
+        self.latencias = collections.deque(maxlen=AMOSTRAS_LATENCIA)
+
+    ## Registra uma requisição atendida.
+    #
+    # @param latencia tempo de atendimento, em segundos.
+    # @param cenarios número de cenários da requisição.
+    #
+    def registra(self, latencia: float, cenarios: int):
+        self.requisicoes += 1
+        self.cenarios += cenarios
+        self.latencias.append(latencia)
+
+    ## Contadores em um dicionário, para a rota /estatisticas.
+    #
+    def como_dict(self) -> dict:
+        decorrido = time.monotonic() - self.inicio
+        latencias = sorted(self.latencias)
+
+        def percentil(q):
+            if not latencias:
+                return 0.0
+            return 1000 * latencias[min(len(latencias) - 1,
+                                        int(q * len(latencias)))]
+
+        return {
+            "segundos": decorrido,
+            "requisicoes": self.requisicoes,
+            "cenarios": self.cenarios,
+            "erros": self.erros,
+            "lotes": self.lotes,
+            "cenarios_por_lote": self.cenarios_em_lotes / (self.lotes or 1),
+            "cenarios_por_segundo": self.cenarios / (decorrido or 1),
+            "latencia_media_ms": 1000 * sum(latencias) / (len(latencias)
+                                                           or 1),
+            "latencia_p50_ms": percentil(0.50),
+            "latencia_p99_ms": percentil(0.99),
+            "latencia_max_ms": 1000 * latencias[-1] if latencias else 0.0,
+        }
+
+
+## Calcula um lote de cenários.
+#
+# @param argumentos lista de tuplas de argumentos de calcula_cdb.
+# @return lista de tuplas com os campos de CAMPOS_CDB.
+#
+def calcula_lote(argumentos: list) -> list:
+    if cdivec is None:
+        return [tuple(calcula_cdb(*a)) for a in argumentos]
+    colunas = cdivec.cdb_lote(*zip(*argumentos))
+    return list(zip(*(colunas[campo].tolist() for campo in CAMPOS_CDB)))
+
+
+## Calcula um cenário sozinho, sem levantar exceções.
+#
+# @param argumentos tupla de argumentos de calcula_cdb.
+# @return tupla com os campos de CAMPOS_CDB ou a exceção do cálculo.
+#
+def calcula_cenario(argumentos: tuple):
+    try:
+        return calcula_lote([argumentos])[0]
+    except Exception as err:  # pylint: disable=broad-except
+        return err
+
+
+## Junta os cenários pedidos dentro de uma janela de tempo em um lote.
+#
+class Agrupador:
+    ##
+    # @param estatisticas contadores do servidor.
+    # @param janela espera máxima do primeiro cenário do lote, em segundos.
+    # @param max_lote tamanho a partir do qual o lote sai sem esperar.
+    #
+    def __init__(self, estatisticas: Estatisticas,
+                 janela: float = JANELA_LOTE, max_lote: int = MAX_LOTE):
+        self.estatisticas = estatisticas
+        self.janela = janela
+        self.max_lote = max_lote
+        self.pendentes = []
+        self.agendado = None
+
+    ## Agenda o cálculo de um cenário.
+    #
+    # @param argumentos tupla de argumentos de calcula_cdb.
+    # @return future com a tupla de resultados.
+    #
+    def calcula(self, argumentos: tuple) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        self.pendentes.append((argumentos, futuro))
+        if len(self.pendentes) >= self.max_lote:
+            self.esvazia()
+        elif self.agendado is None:
+            self.agendado = loop.call_later(self.janela, self.esvazia)
+        return futuro
+
+    ## Calcula todos os cenários pendentes em um lote. Se o lote falhar, os
+    # cenários são calculados um a um, e só os que falharem recebem a
+    # exceção.
+    #
+    def esvazia(self):
+        if self.agendado is not None:
+            self.agendado.cancel()
+            self.agendado = None
+        lote, self.pendentes = self.pendentes, []
+        if not lote:
+            return
+        self.estatisticas.lotes += 1
+        self.estatisticas.cenarios_em_lotes += len(lote)
+        try:
+            resultados = calcula_lote([argumentos for argumentos, _ in lote])
+        except Exception:  # pylint: disable=broad-except
+            resultados = [calcula_cenario(argumentos)
+                          for argumentos, _ in lote]
+        for (_, futuro), resultado in zip(lote, resultados):
+            if futuro.done():
+                continue
+            if isinstance(resultado, Exception):
+                futuro.set_exception(resultado)
+            else:
+                futuro.set_result(resultado)
+
+
+## Atende uma requisição já lida.
+#
+# @param metodo método HTTP.
+# @param caminho caminho pedido.
+# @param corpo corpo da requisição.
+# @param agrupador agrupador de lotes.
+# @return tupla (status, objeto a serializar em JSON).
+#
+async def responde(metodo: str, caminho: str, corpo: bytes,
+                   agrupador: Agrupador) -> tuple:
+    estatisticas = agrupador.estatisticas
+    if metodo == "GET" and caminho == "/estatisticas":
+        return 200, estatisticas.como_dict()
+    if metodo != "POST" or caminho != "/cdb":
+        return 404, {"erro": "rota inexistente: %s %s" % (metodo, caminho)}
+    inicio = time.perf_counter()
+    try:
+        pedido = json.loads(corpo)
+        registros = pedido if isinstance(pedido, list) else [pedido]
+        argumentos = [converte_cenario(registro) for registro in registros]
+    except (ValueError, AttributeError) as err:
+        estatisticas.erros += 1
+        return 400, {"erro": str(err)}
+    # as exceções são recolhidas para que a falha de um cenário não deixe
+    # as dos outros sem tratamento
+    resultados = await asyncio.gather(*(agrupador.calcula(a)
+                                        for a in argumentos),
+                                      return_exceptions=True)
+    for posicao, resultado in enumerate(resultados):
+        if isinstance(resultado, Exception):
+            estatisticas.erros += 1
+            return 400, {"erro": "cenário %d inválido: %s"
+                                 % (posicao + 1, resultado)}
+        # um valor complexo faria math.isfinite levantar TypeError fora de
+        # qualquer tratamento
+        if not all(isinstance(valor, float) and math.isfinite(valor)
+                   for valor in resultado):
+            estatisticas.erros += 1
+            return 400, {"erro": "cenário %d com resultado não finito"
+                                 % (posicao + 1)}
+    campos = CAMPOS_CENARIO + CAMPOS_CDB
+    resposta = [dict(zip(campos, a + tuple(r)))
+                for a, r in zip(argumentos, resultados)]
+    estatisticas.registra(time.perf_counter() - inicio, len(argumentos))
+    return 200, resposta if isinstance(pedido, list) else resposta[0]
+
+
+## Atende as requisições HTTP/1.1 de uma conexão, que fica aberta até o
+# cliente fechá-la ou pedir "Connection: close".
+#
+# @param leitor StreamReader da conexão.
+# @param escritor StreamWriter da conexão.
+# @param agrupador agrupador de lotes.
+#
+async def atende(leitor, escritor, agrupador: Agrupador):
+    try:
+        while True:
+            linha = await leitor.readline()
+            if not linha:
+                break
+            metodo, caminho, _ = linha.decode("latin-1").split(" ", 2)
+            cabecalhos = {}
+            while True:
+                linha = await leitor.readline()
+                if linha in (b"\r\n", b"\n", b""):
+                    break
+                nome, _, valor = linha.decode("latin-1").partition(":")
+                cabecalhos[nome.strip().lower()] = valor.strip()
+            corpo = await leitor.readexactly(
+                int(cabecalhos.get("content-length", 0)))
+            status, resposta = await responde(metodo, caminho, corpo,
+                                              agrupador)
+            dados = json.dumps(resposta, allow_nan=False).encode()
+            escritor.write(b"HTTP/1.1 %d %s\r\nContent-Type: application/json"
+                           b"\r\nContent-Length: %d\r\n\r\n%s" % (
+                               status, STATUS_HTTP[status].encode(),
+                               len(dados), dados))
+            await escritor.drain()
+            if cabecalhos.get("connection", "").lower() == "close":
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        escritor.close()
+
+
+## Cria o servidor.
+#
+# @param endereco "host:porta", ":porta" ou "unix:/caminho/do/socket".
+# @param janela ver Agrupador.
+# @param max_lote ver Agrupador.
+# @return asyncio.Server já escutando; o agrupador fica em .agrupador.
+#
+async def inicia_servidor(endereco: str, janela: float = JANELA_LOTE,
+                          max_lote: int = MAX_LOTE):
+    agrupador = Agrupador(Estatisticas(), janela, max_lote)
+
+    def conexao(leitor, escritor):
+        return atende(leitor, escritor, agrupador)
+
+    if endereco.startswith("unix:"):
+        servidor = await asyncio.start_unix_server(conexao, endereco[5:])
+    else:
+        host, _, porta = endereco.rpartition(":")
+        servidor = await asyncio.start_server(conexao, host or "127.0.0.1",
+                                              int(porta))
+    servidor.agrupador = agrupador
+    return servidor
+
+
+## Roda o servidor até ser interrompido (Ctrl+C).
+#
+# @param endereco ver inicia_servidor.
+# @param janela ver Agrupador.
+#
+def executa(endereco: str, janela: float = JANELA_LOTE):
+    async def serve():
+        servidor = await inicia_servidor(endereco, janela)
+        print("Servindo em %s (lote: %s)" % (
+            endereco, "cdivec" if cdivec is not None else "calcula_cdb"),
+            file=sys.stderr)
+        async with servidor:
+            await servidor.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
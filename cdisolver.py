@@ -0,0 +1,289 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_CDI_Solver
+#
+# Pontos de equilíbrio entre uma aplicação e a poupança, calculados de
+# forma vetorizada para muitas ofertas de uma vez.
+#
+# Com a = taxa mensal da aplicação, s = taxa mensal da poupança e
+# τ = alíquota de IR / 100, a diferença Apl - Poup de cdi.CDB após m meses,
+# por unidade de capital, é
+#
+#     f(m) = (1 + a)^m (1 − τ) + τ − (1 + s)^m.
+#
+# - Rentabilidade mínima: para m fixo, f(m) = 0 tem solução fechada em a,
+#   e daí em % do CDI.
+# - Prazo mínimo: f tem no máximo uma raiz positiva (é uma soma de três
+#   exponenciais e f(0) = 0), negativa antes e positiva depois. Se a <= s a
+#   aplicação nunca supera a poupança; caso contrário o primeiro mês com
+#   f(m) > 0 é encontrado por bisseção sobre os inteiros, vetorizada.
+#
+# Os solvers inversos partem de um montante líquido desejado (alvo), o
+# aplicacaocomimposto de cdi.CDB, que por unidade de capital é
+#
+#     g(m) = (1 + a)^m (1 − τ) + τ.
+#
+# - Capital necessário: g não depende do capital, então c = alvo / g(m).
+# - Rentabilidade necessária: (1 + a)^m = (alvo / c − τ) / (1 − τ), e daí
+#   em % do CDI, como na rentabilidade mínima.
+# - Prazo necessário: com alíquota fixa, m = log((alvo / c − τ) / (1 − τ))
+#   / log(1 + a), arredondado para cima e conferido nos meses vizinhos. Com
+#   a alíquota da tabela regressiva, τ muda com m e não há fórmula fechada;
+#   como g é crescente em m quando a > 0 (o rendimento cresce e a alíquota
+#   cai), o primeiro mês com g(m) >= alvo / c é encontrado por bisseção.
+#
+# @author Luan Bernardo Dias
+# @since 09/10/2022
+# @see https://en.wikipedia.org/wiki/Bisection_method
+#
+import getopt
+import sys
+
+import numpy as np
+
+from cdi import DIAS_POR_MES
+from cdivec import aliquota_ir, jurospoupanca, year2month
+
+## Maior prazo, em meses, considerado por meses_minimos e
+# meses_necessarios.
+MAX_MESES = 1200
+
+
+## Rentabilidade (% do CDI) a partir da qual a aplicação supera a poupança
+# após m meses, descontado o IR. Na rentabilidade retornada, Apl = Poup.
+#
+# @param cdi taxa cdi anual.
+# @param p taxa Selic anual.
+# @param i alíquota do imposto de renda.
+# @param m meses (>= 1).
+# @return vetor de rentabilidades (% CDI); infinito se não houver
+#         rentabilidade suficiente (IR de 100% ou CDI nulo).
+#
+def rentabilidade_minima(cdi, p, i, m=1):
+    cdi, p, i, m = (np.asarray(v, dtype=np.float64) for v in (cdi, p, i, m))
+    tau = i / 100
+    poupanca = (1 + year2month(jurospoupanca(p)) / 100) ** m
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fator_aplicacao = (poupanca - tau) / (1 - tau)
+        anual = fator_aplicacao ** (12 / m) - 1
+        t = 100 * anual / cdi
+    return np.where((tau < 1) & (cdi > 0), t, np.inf)
+
+
+## Diferença Apl - Poup por unidade de capital após m meses, com as mesmas
+# operações de cdi.calcula_cdb.
+#
+# @param a vetor de taxas mensais da aplicação.
+# @param s vetor de taxas mensais da poupança.
+# @param i vetor de alíquotas de IR.
+# @param m vetor de meses.
+# @return vetor de diferenças.
+#
+def diferenca(a, s, i, m):
+    valor_aplicacao = (1 + a) ** m
+    return (valor_aplicacao - (valor_aplicacao - 1) * i / 100
+            - (1 + s) ** m)
+
+
+## Menor número de meses a partir do qual a aplicação supera a poupança
+# (Apl - Poup > 0), descontado o IR.
+#
+# @param cdi taxa cdi anual.
+# @param p taxa Selic anual.
+# @param t rentabilidade da aplicação em função do CDI.
+# @param i alíquota do imposto de renda.
+# @param max_meses maior prazo considerado.
+# @return vetor de meses (float); infinito se a aplicação não supera a
+#         poupança em até max_meses.
+#
+def meses_minimos(cdi, p, t, i, max_meses: int = MAX_MESES):
+    cdi, p, t, i = np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.float64) for v in (cdi, p, t, i)))
+    a = year2month(t * cdi / 100) / 100
+    s = year2month(jurospoupanca(p)) / 100
+    # invariante: f(baixo) <= 0 e f(alto) > 0
+    baixo = np.zeros(a.shape, dtype=np.int64)
+    alto = np.full(a.shape, max_meses, dtype=np.int64)
+    supera = (a > s) & (diferenca(a, s, i, alto) > 0)
+    while True:
+        ativo = supera & (alto - baixo > 1)
+        if not ativo.any():
+            break
+        meio = (baixo + alto) // 2
+        positivo = diferenca(a, s, i, meio) > 0
+        alto = np.where(ativo & positivo, meio, alto)
+        baixo = np.where(ativo & ~positivo, meio, baixo)
+    return np.where(supera, alto, np.inf)
+
+
+## Alíquotas de IR dos solvers inversos: a informada ou, se None, a da
+# tabela regressiva pelo prazo.
+#
+# @param i alíquota do imposto de renda, vetor ou None.
+# @param m vetor de meses.
+# @return vetor de alíquotas.
+#
+def aliquotas(i, m):
+    if i is None:
+        return aliquota_ir(DIAS_POR_MES * np.asarray(m, dtype=np.int64))
+    return np.asarray(i, dtype=np.float64)
+
+
+## Montante líquido por unidade de capital após m meses, com as mesmas
+# operações de cdi.calcula_cdb.
+#
+# @param a vetor de taxas mensais da aplicação.
+# @param i vetor de alíquotas de IR.
+# @param m vetor de meses.
+# @return vetor de montantes.
+#
+def liquido(a, i, m):
+    valor_aplicacao = (1 + a) ** m
+    return valor_aplicacao - (valor_aplicacao - 1) * i / 100
+
+
+## Capital que rende o montante líquido alvo em m meses.
+#
+# @param alvo montante líquido desejado.
+# @param cdi taxa cdi anual.
+# @param t rentabilidade da aplicação em função do CDI.
+# @param i alíquota do imposto de renda; None usa a tabela regressiva.
+# @param m meses.
+# @return vetor de capitais.
+#
+def capital_necessario(alvo, cdi, t, i=None, m=1):
+    alvo, cdi, t, m = (np.asarray(v, dtype=np.float64)
+                       for v in (alvo, cdi, t, m))
+    a = year2month(t * cdi / 100) / 100
+    return alvo / liquido(a, aliquotas(i, m), m)
+
+
+## Rentabilidade (% do CDI) com a qual o capital chega ao montante líquido
+# alvo em m meses.
+#
+# @param alvo montante líquido desejado.
+# @param c capital.
+# @param cdi taxa cdi anual.
+# @param i alíquota do imposto de renda; None usa a tabela regressiva.
+# @param m meses (>= 1).
+# @return vetor de rentabilidades (% CDI); NaN se não houver solução (IR de
+#         100%, CDI nulo ou alvo fora do alcance).
+#
+def rentabilidade_necessaria(alvo, c, cdi, i=None, m=1):
+    alvo, c, cdi, m = (np.asarray(v, dtype=np.float64)
+                       for v in (alvo, c, cdi, m))
+    tau = aliquotas(i, m) / 100
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fator_aplicacao = (alvo / c - tau) / (1 - tau)
+        t = 100 * (fator_aplicacao ** (12 / m) - 1) / cdi
+    return np.where((tau < 1) & (cdi > 0) & (fator_aplicacao > 0), t, np.nan)
+
+
+## Menor número de meses em que o capital chega ao montante líquido alvo.
+#
+# @param alvo montante líquido desejado.
+# @param c capital.
+# @param cdi taxa cdi anual.
+# @param t rentabilidade da aplicação em função do CDI.
+# @param i alíquota do imposto de renda; None usa a tabela regressiva.
+# @param max_meses maior prazo considerado.
+# @return vetor de meses (float, >= 1); infinito se o alvo não é atingido
+#         em até max_meses.
+#
+def meses_necessarios(alvo, c, cdi, t, i=None, max_meses: int = MAX_MESES):
+    alvo, c, cdi, t = np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.float64) for v in (alvo, c, cdi, t)))
+    a = year2month(t * cdi / 100) / 100
+    razao = alvo / c
+    if i is None:
+        meses = _meses_bissecao(a, razao, max_meses)
+    else:
+        meses = _meses_fechado(a, razao, np.broadcast_to(
+            np.asarray(i, dtype=np.float64), a.shape), max_meses)
+    # com a <= 0 o montante não cresce: basta o primeiro mês, ou nunca
+    primeiro = liquido(a, aliquotas(i, np.ones(a.shape)), 1) >= razao
+    return np.where(a > 0, meses, np.where(primeiro, 1.0, np.inf))
+
+
+def _meses_fechado(a, razao, i, max_meses):
+    tau = i / 100
+    with np.errstate(divide="ignore", invalid="ignore"):
+        continuo = np.log((razao - tau) / (1 - tau)) / np.log1p(a)
+    continuo = np.where(np.isnan(continuo), 1, continuo)
+    meses = np.clip(np.ceil(continuo), 1, max_meses + 1).astype(np.int64)
+    # o arredondamento de ponto flutuante pode errar por um mês
+    meses = np.where(liquido(a, i, meses) < razao, meses + 1, meses)
+    anterior = np.maximum(meses - 1, 1)
+    meses = np.where((meses > 1) & (liquido(a, i, anterior) >= razao),
+                     anterior, meses)
+    return np.where(meses <= max_meses, meses, np.inf)
+
+
+def _meses_bissecao(a, razao, max_meses):
+    # invariante: g(baixo) < razao e g(alto) >= razao; o mês 0 só serve
+    # de limite inferior e nunca é avaliado
+    baixo = np.zeros(a.shape, dtype=np.int64)
+    alto = np.full(a.shape, max_meses, dtype=np.int64)
+    atinge = liquido(a, aliquotas(None, alto), alto) >= razao
+    while True:
+        ativo = atinge & (alto - baixo > 1)
+        if not ativo.any():
+            break
+        meio = (baixo + alto) // 2
+        acima = liquido(a, aliquotas(None, meio), meio) >= razao
+        alto = np.where(ativo & acima, meio, alto)
+        baixo = np.where(ativo & ~acima, meio, baixo)
+    return np.where(atinge, alto, np.inf)
+
+
+## Função principal: calcula a incógnita que faltar entre capital, meses
+# e rentabilidade para chegar ao montante líquido alvo.
+#   @param v montante líquido alvo.
+#   @param c capital.
+#   @param a taxa CDI anual.
+#   @param t rentabilidade (% CDI).
+#   @param i alíquota de IR ou auto (padrão).
+#   @param m meses.
+#
+def main():
+    try:
+        opts, _ = getopt.getopt(sys.argv[1:], "v:c:a:t:i:m:h",
+                                ["alvo=", "capital=", "aplicacao=",
+                                 "rentabilidade=", "imposto=", "meses=",
+                                 "help"])
+    except getopt.GetoptError as err:
+        print(err)
+        sys.exit(2)
+    alvo = c = cdi = t = i = m = None
+    for o, a in opts:
+        if o in ("-v", "--alvo"):
+            alvo = float(a)
+        elif o in ("-c", "--capital"):
+            c = float(a)
+        elif o in ("-a", "--aplicacao"):
+            cdi = float(a)
+        elif o in ("-t", "--rentabilidade"):
+            t = float(a)
+        elif o in ("-i", "--imposto"):
+            i = None if a == "auto" else float(a)
+        elif o in ("-m", "--meses"):
+            m = int(a)
+        elif o in ("-h", "--help"):
+            alvo = None
+            break
+    if alvo is None or cdi is None or [c, t, m].count(None) != 1:
+        print("Usage: %s -v [alvo] -a [CDI anual] -i [IR|auto] e dois de "
+              "-c [capital] -t [taxa CDI] -m [meses]" % sys.argv[0])
+        sys.exit()
+    if c is None:
+        print("capital: %.2f" % capital_necessario(alvo, cdi, t, i, m))
+    elif t is None:
+        print("rentabilidade: %.2f%% do CDI"
+              % rentabilidade_necessaria(alvo, c, cdi, i, m))
+    else:
+        print("meses: %.0f" % meses_necessarios(alvo, c, cdi, t, i))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_CDI_Tarefa
+#
+# Execução de cálculos longos fora da thread da interface gráfica.
+#
+# Uma Tarefa roda uma função em uma thread separada e devolve progresso,
+# resultado e erros por uma fila. A interface consulta a fila com
+# after() (ver cdigui.py), de modo que o mainloop do Tkinter continua
+# redesenhando a janela durante o cálculo. Este módulo não importa o
+# Tkinter e pode ser usado e testado sem display.
+#
+# @author Luan Bernardo Dias
+# @since 09/10/2022
+# @see https://docs.python.org/3/library/queue.html
+#
+import queue
+import threading
+
+from cdi import evolucao_cdb
+
+## Mensagem de progresso: ("progresso", fração entre 0 e 1).
+PROGRESSO = "progresso"
+
+## Mensagem final com o valor retornado pela função.
+RESULTADO = "resultado"
+
+## Mensagem final com a exceção levantada pela função.
+ERRO = "erro"
+
+## Mensagem final quando a tarefa foi cancelada.
+CANCELADO = "cancelado"
+
+
+## Exceção levantada pelo callback de progresso depois de um pedido de
+# cancelamento, para interromper a função da tarefa.
+#
+class Cancelado(Exception):
+    pass
+
+
+## Função executada em uma thread, com progresso e cancelamento.
+#
+# A função recebe como primeiro argumento um callback progresso(fração),
+# que registra o progresso e levanta Cancelado se cancela() tiver sido
+# chamado; a função deve chamá-lo periodicamente.
+#
+class Tarefa:
+    ##
+    # @param funcao função a executar: funcao(progresso, *args, **kwargs).
+    # @param args argumentos posicionais da função.
+    # @param kwargs argumentos nomeados da função.
+    #
+    def __init__(self, funcao, *args, **kwargs):
+        self.funcao = funcao
+        self.args = args
+        self.kwargs = kwargs
+        self.fila = queue.Queue()
+        self._cancelar = threading.Event()
+        self._thread = threading.Thread(target=self._executa, daemon=True)
+
+    ## Inicia a execução em segundo plano.
+    #
+    # @return a própria tarefa.
+    #
+    def inicia(self) -> "Tarefa":
+        self._thread.start()
+        return self
+
+    ## Pede o cancelamento; a função para na próxima chamada de progresso.
+    #
+    def cancela(self):
+        self._cancelar.set()
+
+    ## Indica se a thread da tarefa já terminou.
+    #
+    @property
+    def terminada(self) -> bool:
+        return self._thread.ident is not None and not self._thread.is_alive()
+
+    ## Aguarda o fim da tarefa.
+    #
+    # @param tempo tempo máximo de espera em segundos (None = sem limite).
+    #
+    def aguarda(self, tempo: float = None):
+        self._thread.join(tempo)
+
+    ## Mensagens pendentes na fila, sem bloquear.
+    #
+    # @return gerador de pares (tipo, valor).
+    #
+    def mensagens(self):
+        while True:
+            try:
+                yield self.fila.get_nowait()
+            except queue.Empty:
+                return
+
+    ## Callback de progresso passado à função.
+    #
+    # @param fracao fração concluída, entre 0 e 1.
+    #
+    def _progresso(self, fracao: float):
+        if self._cancelar.is_set():
+            raise Cancelado()
+        self.fila.put((PROGRESSO, fracao))
+
+    ## Corpo da thread.
+    #
+    def _executa(self):
+        try:
+            resultado = self.funcao(self._progresso, *self.args,
+                                    **self.kwargs)
+        except Cancelado:
+            self.fila.put((CANCELADO, None))
+        except Exception as err:  # pylint: disable=broad-except
+            self.fila.put((ERRO, err))
+        else:
+            self.fila.put((RESULTADO, resultado))
+
+
+## Calcula a evolução mês a mês de cdi.evolucao_cdb em blocos, relatando o
+# progresso ao fim de cada bloco e 1.0 uma única vez, ao final. Própria
+# para rodar em uma Tarefa.
+#
+# @param progresso callback de progresso da Tarefa.
+# @param c capital
+# @param cdi taxa cdi anual
+# @param p taxa poupança anual = 0.70 * selic
+# @param t rentabilidade da aplicação em função do CDI
+# @param i alíquota do imposto de renda (None = tabela regressiva)
+# @param meses horizonte em meses.
+# @param bloco meses calculados entre duas chamadas de progresso.
+# @return lista de cdi.MesCDB.
+#
+def evolucao_em_blocos(progresso, c: float, cdi: float, p: float, t: float,
+                       i: float, meses: int, bloco: int = 120) -> list:
+    linhas = []
+    relatado = 0.0
+    progresso(relatado)
+    for saldo in evolucao_cdb(c, cdi, p, t, i, meses):
+        linhas.append(saldo)
+        if saldo.mes % bloco == 0:
+            relatado = saldo.mes / meses
+            progresso(relatado)
+    # o último bloco já relata 1.0 quando meses é múltiplo de bloco
+    if relatado != 1.0:
+        progresso(1.0)
+    return linhas
@@ -0,0 +1,251 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_CDI_Varredura
+#
+# Varredura (grade cartesiana) das entradas de cdi.CDB.
+#
+# Cada entrada — capital, CDI, Selic, rentabilidade, IR e meses — recebe
+# uma lista de valores e ocupa um eixo de um vetor N-dimensional, na ordem
+# de cdilote.CAMPOS_CENARIO. Os valores são calculados por
+# cdivec.cdb_colunas com as entradas em eixos separados, então cada
+# valor intermediário só é calculado sobre os eixos de que depende: a taxa
+# mensal da aplicação uma vez por CDI × rentabilidade, a da poupança uma vez
+# por Selic, e só os montantes sobre a grade inteira.
+#
+# Grades grandes demais para a memória são calculadas em blocos
+# (varredura_blocos), cortados nos eixos mais externos para que a ordem
+# dos cenários seja a mesma da grade inteira.
+#
+# @author Luan Bernardo Dias
+# @since 09/10/2022
+# @see https://numpy.org/doc/stable/user/basics.broadcasting.html
+#
+import csv
+import getopt
+import math
+import sys
+
+import numpy as np
+
+from cdi import CAMPOS_CDB, DIAS_POR_MES
+from cdilote import CAMPOS_CENARIO
+from cdivec import aliquota_ir, cdb_colunas
+
+## Número máximo de cenários calculados de uma vez por varredura_blocos.
+MAX_CELULAS = 500000
+
+
+## Converte os valores de um eixo em um vetor de uma dimensão.
+#
+# @param valores escalar, lista ou vetor; None no eixo do IR usa a tabela
+#        regressiva pelo prazo.
+# @param tipo tipo dos elementos.
+# @return vetor 1-D ou None.
+#
+def eixo(valores, tipo=np.float64):
+    if valores is None:
+        return None
+    return np.atleast_1d(np.asarray(valores, dtype=tipo)).ravel()
+
+
+## Normaliza os seis eixos.
+#
+# @return lista de vetores 1-D (ou None no IR automático).
+#
+def prepara_eixos(capital, aplicacao, selic, rentabilidade, imposto,
+                  meses=1) -> list:
+    return [eixo(capital), eixo(aplicacao), eixo(selic), eixo(rentabilidade),
+            eixo(imposto), eixo(meses, np.int64)]
+
+
+## Formato da grade.
+#
+# @param eixos lista retornada por prepara_eixos.
+# @return tupla com o tamanho de cada eixo (1 no IR automático).
+#
+def forma_grade(eixos: list) -> tuple:
+    return tuple(1 if e is None else len(e) for e in eixos)
+
+
+## Os eixos prontos para broadcasting: o eixo k com formato
+# (1, ..., n, ..., 1), e o IR automático calculado sobre o eixo dos meses.
+#
+# @param eixos lista retornada por prepara_eixos.
+# @return lista de seis vetores de seis dimensões.
+#
+def eixos_grade(eixos: list) -> list:
+    formatos = []
+    for k, valores in enumerate(eixos):
+        if valores is not None:
+            forma = [1] * len(eixos)
+            forma[k] = -1
+            valores = valores.reshape(forma)
+        formatos.append(valores)
+    if formatos[4] is None:
+        formatos[4] = aliquota_ir(DIAS_POR_MES * formatos[5])
+    return formatos
+
+
+## Calcula a grade inteira.
+#
+# @param capital valores de capital.
+# @param aplicacao valores da taxa CDI anual.
+# @param selic valores da taxa Selic anual.
+# @param rentabilidade valores da rentabilidade (% CDI).
+# @param imposto alíquotas de IR; None usa a tabela regressiva pelo prazo.
+# @param meses prazos em meses.
+# @return dicionário nome -> vetor de formato forma_grade, com as chaves
+#         de cdi.CAMPOS_CDB. Os vetores são visões somente leitura; valores
+#         que não dependem de todos os eixos não são copiados para a grade.
+#
+def varredura(capital, aplicacao, selic, rentabilidade, imposto,
+              meses=1) -> dict:
+    eixos = prepara_eixos(capital, aplicacao, selic, rentabilidade, imposto,
+                          meses)
+    forma = forma_grade(eixos)
+    colunas = cdb_colunas(*eixos_grade(eixos))
+    return {campo: np.broadcast_to(colunas[campo], forma)
+            for campo in CAMPOS_CDB}
+
+
+## Calcula a grade em blocos de no máximo max_celulas cenários.
+#
+# Os blocos cortam o eixo mais externo com mais de um valor; se um só valor
+# desse eixo ainda passar do limite, o corte segue no eixo seguinte.
+# Percorrer os blocos na ordem dada percorre a grade na ordem C.
+#
+# @param max_celulas maior número de cenários por bloco.
+# @return gerador de pares (início, bloco): início é a tupla com a posição
+#         do bloco na grade e bloco o dicionário retornado por varredura.
+#
+def varredura_blocos(capital, aplicacao, selic, rentabilidade, imposto,
+                     meses=1, max_celulas: int = MAX_CELULAS):
+    eixos = prepara_eixos(capital, aplicacao, selic, rentabilidade, imposto,
+                          meses)
+    yield from _blocos(eixos, (0,) * len(eixos), max(1, max_celulas))
+
+
+def _blocos(eixos: list, inicio: tuple, max_celulas: int):
+    tamanhos = forma_grade(eixos)
+    total = math.prod(tamanhos)
+    if total <= max_celulas:
+        yield inicio, varredura(*eixos)
+        return
+    k = next(k for k, n in enumerate(tamanhos) if n > 1)
+    passo = max(1, max_celulas // (total // tamanhos[k]))
+    for a in range(0, tamanhos[k], passo):
+        parte = list(eixos)
+        parte[k] = eixos[k][a:a + passo]
+        deslocado = list(inicio)
+        deslocado[k] += a
+        yield from _blocos(parte, tuple(deslocado), max_celulas)
+
+
+## Escreve a grade em CSV, um cenário por linha, bloco a bloco.
+#
+# @param saida arquivo de texto aberto para escrita.
+# @param eixos lista retornada por prepara_eixos.
+# @param campos campos de cdi.CAMPOS_CDB escritos após as entradas.
+# @param max_celulas maior número de cenários por bloco.
+# @return número de linhas escritas.
+#
+def escreve_csv(saida, eixos: list, campos=CAMPOS_CDB,
+                max_celulas: int = MAX_CELULAS) -> int:
+    escritor = csv.writer(saida, lineterminator="\n")
+    escritor.writerow(CAMPOS_CENARIO + tuple(campos))
+    n = 0
+    for inicio, bloco in varredura_blocos(*eixos, max_celulas=max_celulas):
+        forma = next(iter(bloco.values())).shape
+        partes = [valores if valores is None
+                  else valores[inicio[k]:inicio[k] + forma[k]]
+                  for k, valores in enumerate(eixos)]
+        entradas = [np.broadcast_to(valores, forma).ravel().tolist()
+                    for valores in eixos_grade(partes)]
+        colunas = entradas + [bloco[campo].ravel().tolist()
+                              for campo in campos]
+        escritor.writerows(zip(*colunas))
+        n += len(entradas[0])
+    return n
+
+
+## Lê os valores de um eixo da linha de comando: "x", "x,y,z",
+# "início:fim" (passo 1) ou "início:fim:passo", com o fim incluído, e
+# "auto" no IR.
+#
+# @param texto valor da opção.
+# @return lista de números, ou None para "auto".
+# @exception ValueError se o texto não puder ser lido.
+#
+def le_eixo(texto: str):
+    if texto == "auto":
+        return None
+    if ":" in texto:
+        partes = [float(v) for v in texto.split(":")]
+        inicio, fim = partes[:2]
+        passo = partes[2] if len(partes) > 2 else 1.0
+        if passo <= 0 or fim < inicio:
+            raise ValueError("intervalo inválido: %s" % texto)
+        n = int(math.floor((fim - inicio) / passo + 1e-9)) + 1
+        return np.round(inicio + passo * np.arange(n), 12).tolist()
+    return [float(v) for v in texto.split(",")]
+
+
+## Função principal: escreve a grade em CSV.
+#   @param c capitais.
+#   @param a taxas CDI anuais.
+#   @param s taxas Selic anuais.
+#   @param i alíquotas de IR ou auto.
+#   @param t rentabilidades (% CDI).
+#   @param m meses.
+#   @param o arquivo de saída (padrão: saída padrão).
+#   @param k campos de resultado, separados por vírgula.
+#   @param b maior número de cenários por bloco.
+#
+def main():
+    try:
+        opts, _ = getopt.getopt(sys.argv[1:], "c:a:s:i:t:m:o:k:b:h",
+                                ["capital=", "aplicacao=", "selic=",
+                                 "imposto=", "rentabilidade=", "meses=",
+                                 "saida=", "campos=", "bloco=", "help"])
+    except getopt.GetoptError as err:
+        print(err)
+        sys.exit(2)
+    opcoes = {"-c": 0, "--capital": 0, "-a": 1, "--aplicacao": 1,
+              "-s": 2, "--selic": 2, "-i": 4, "--imposto": 4,
+              "-t": 3, "--rentabilidade": 3, "-m": 5, "--meses": 5}
+    eixos = [None, None, None, None, 0.0, 1]
+    saida = "-"
+    campos = CAMPOS_CDB
+    bloco = MAX_CELULAS
+    for o, a in opts:
+        if o in opcoes:
+            eixos[opcoes[o]] = le_eixo(a)
+        elif o in ("-o", "--saida"):
+            saida = a
+        elif o in ("-k", "--campos"):
+            campos = tuple(a.split(","))
+        elif o in ("-b", "--bloco"):
+            bloco = int(a)
+        elif o in ("-h", "--help"):
+            eixos[0] = None
+            break
+    if any(valores is None for valores in eixos[:4]) or \
+            not set(campos) <= set(CAMPOS_CDB):
+        print("Usage: %s -c [capitais] -a [CDI] -s [Selic] -i [IR|auto] "
+              "-t [rentabilidades] -m [meses] -o [saída.csv] -k [campos] "
+              "-b [cenários por bloco]" % sys.argv[0])
+        print("       valores: x | x,y,z | início:fim[:passo]")
+        sys.exit()
+    arquivo = sys.stdout if saida == "-" else open(saida, "w", newline="",
+                                                     encoding="utf-8")
+    try:
+        n = escreve_csv(arquivo, prepara_eixos(*eixos), campos, bloco)
+    finally:
+        if arquivo is not sys.stdout:
+            arquivo.close()
+    print("%d cenários" % n, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
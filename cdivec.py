@@ -0,0 +1,306 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_CDI_Vetorizado
+#
+# Versão vetorizada (NumPy) do cálculo de CDB de cdi.py. Recebe vetores
+# de capital, CDI, Selic, rentabilidade, alíquota de IR e meses e calcula
+# os mesmos 16 valores retornados por cdi.CDB em uma única passada, sem
+# laços em Python.
+#
+# As fórmulas seguem exatamente as de cdi.py, na mesma ordem de operações,
+# para que os resultados coincidam com a versão escalar.
+#
+# @author Luan Bernardo Dias
+# @since 09/10/2022
+# @see https://numpy.org/doc/stable/user/basics.broadcasting.html
+#
+import numpy as np
+
+from cdi import (CAMPOS_CDB, DIAS_POR_MES, TABELA_IOF, TABELA_IR,
+                 ResultadoAportes, faixas_ir_meses)
+
+## Tabela regressiva do IR por dias corridos (cdi.TABELA_IR) como vetor.
+VETOR_IR = np.array(TABELA_IR, dtype=np.float64)
+
+## Tabela regressiva do IOF por dias corridos, com o zero a partir de 30
+# dias na última posição.
+VETOR_IOF = np.array(TABELA_IOF + (0,), dtype=np.float64)
+
+
+## Juros compostos, aceitando vetores.
+#
+# @param r taxa de juros nominal.
+# @param t período de tempo.
+# @param n frequência de composição.
+# @return juros obtidos no período: (1 + r/n)nt − 1
+#
+def jc(r, t, n=1):
+    return (1 + r / float(n)) ** (n * t) - 1
+
+
+## Converte taxas de juros anuais para mensais, em percentual.
+#
+# @param a vetor de taxas anuais.
+# @return vetor de taxas mensais (%).
+#
+def year2month(a):
+    return 100 * jc(a, 1.0 / 12.0)
+
+
+## Converte taxas de juros mensais para diárias, em percentual.
+#
+# @param m vetor de taxas mensais.
+# @return vetor de taxas diárias (%).
+#
+def month2day(m):
+    return 100 * jc(m, 1.0 / 252)
+
+
+## Taxa anual da poupança para cada taxa Selic do vetor.
+#
+# @param t vetor de taxas Selic.
+# @return vetor de taxas anuais da poupança.
+#
+def jurospoupanca(t):
+    return np.where(t * 100 < 8.5, t * 0.7, 0.061675)
+
+
+## Tempo para dobrar o principal, para cada taxa do vetor.
+# Taxas nulas resultam em infinito, em vez de erro.
+#
+# @param r vetor de taxas de juros.
+# @return vetor de tempos para dobrar o principal.
+#
+def doublePrincipal(r):
+    with np.errstate(divide="ignore"):
+        return np.log(2) / np.log(1 + r)
+
+
+## Alíquotas de IR pela tabela regressiva, por consulta direta à tabela
+# pré-calculada.
+#
+# @param dias vetor de prazos em dias corridos.
+# @return vetor de alíquotas (%).
+#
+def aliquota_ir(dias):
+    return VETOR_IR[np.clip(dias, 0, len(VETOR_IR) - 1)]
+
+
+## Alíquotas do IOF pela tabela regressiva.
+#
+# @param dias vetor de prazos em dias corridos.
+# @return vetor de alíquotas (% do rendimento).
+#
+def aliquota_iof(dias):
+    return VETOR_IOF[np.clip(dias, 0, len(VETOR_IOF) - 1)]
+
+
+## Calcula o CDB para vetores de cenários.
+#
+# Os argumentos seguem a ordem e as unidades de cdi.CDB e podem ser
+# escalares ou vetores de qualquer formato compatível por broadcasting.
+#
+# @param c capital
+# @param cdi taxa cdi anual
+# @param p taxa Selic anual
+# @param t rentabilidade da aplicação em função do CDI
+# @param i alíquota do imposto de renda; None usa a tabela regressiva
+#          para o prazo de cada cenário.
+# @param m meses
+# @return dicionário nome -> vetor, com as chaves de cdi.CAMPOS_CDB.
+#
+def cdb_lote(c, cdi, p, t, i, m=1) -> dict:
+    if i is None:
+        i = aliquota_ir(DIAS_POR_MES * np.asarray(m, dtype=np.int64))
+    return cdb_colunas(*np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.float64) for v in (c, cdi, p, t, i, m))))
+
+
+## Calcula o CDB sem expandir as entradas para um formato comum: cada valor
+# é calculado no formato dos argumentos de que depende. Com as entradas em
+# eixos diferentes (ver cdivarredura), a taxa mensal da aplicação, por
+# exemplo, é calculada uma vez por par CDI × rentabilidade, e não uma vez
+# por cenário da grade.
+#
+# @param c capital
+# @param cdi taxa cdi anual
+# @param p taxa Selic anual
+# @param t rentabilidade da aplicação em função do CDI
+# @param i alíquota do imposto de renda.
+# @param m meses
+# @return dicionário nome -> vetor, com as chaves de cdi.CAMPOS_CDB; cada
+#         vetor tem o formato do broadcasting das entradas usadas nele.
+#
+def cdb_colunas(c, cdi, p, t, i, m) -> dict:
+    c, cdi, p, t, i, m = (np.asarray(v, dtype=np.float64)
+                          for v in (c, cdi, p, t, i, m))
+    cdi_calculado = t * cdi
+    cdi_com_impostos = t - (t * i / 100)
+    cdi_com_impostos_cem_porcento = (1 - (1 * i / 100)) * cdi
+    taxamensal = year2month(cdi_calculado / 100) / 100
+    valor_aplicacao = c * (1 + taxamensal) ** m
+    imposto_val = (valor_aplicacao - c) * i / 100
+    aplicacaocomimposto = valor_aplicacao - imposto_val
+    poupanca_ano = jurospoupanca(p)
+    poupanca_ao_mes = year2month(poupanca_ano)
+    poupanca = c * (1 + poupanca_ao_mes / 100) ** m
+    rent_com_imp = cdi_com_impostos * cdi
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        colunas = (
+            year2month(cdi),
+            month2day(cdi),
+            poupanca_ano * 100,
+            poupanca_ao_mes,
+            cdi_calculado,
+            cdi_com_impostos,
+            rent_com_imp,
+            aplicacaocomimposto,
+            poupanca,
+            aplicacaocomimposto - poupanca,
+            imposto_val,
+            (aplicacaocomimposto - c) / c * 100,
+            (aplicacaocomimposto - poupanca) / c * 100,
+            poupanca_ano * 100 / cdi_com_impostos_cem_porcento,
+            doublePrincipal(poupanca_ano),
+            doublePrincipal(rent_com_imp / 100),
+        )
+    return dict(zip(CAMPOS_CDB, colunas))
+
+
+## Calcula a evolução mês a mês (1..meses) de uma aplicação e da poupança.
+#
+# Equivale a materializar cdi.evolucao_cdb, mas os fatores de todos os
+# meses são obtidos de uma vez por potência acumulada sobre o vetor de
+# meses, sem laço em Python. Os argumentos escalares podem ser vetores
+# de N cenários; o resultado então tem formato (N, meses).
+#
+# @param c capital
+# @param cdi taxa cdi anual
+# @param p taxa Selic anual
+# @param t rentabilidade da aplicação em função do CDI
+# @param i alíquota do imposto de renda; None aplica, em cada mês, a
+#          alíquota da tabela regressiva para aquele prazo.
+# @param meses horizonte em meses.
+# @return dicionário com os vetores mes, aplicacao, poupanca, imposto e
+#         diferenca (os campos de cdi.MesCDB).
+#
+def evolucao(c, cdi, p, t, i, meses: int) -> dict:
+    mes = np.arange(1, meses + 1)
+    if i is None:
+        i = aliquota_ir(DIAS_POR_MES * mes)
+    else:
+        i = np.asarray(i, dtype=np.float64)[..., np.newaxis]
+    c, cdi, p, t = (np.asarray(v, dtype=np.float64)[..., np.newaxis]
+                    for v in (c, cdi, p, t))
+    valor_aplicacao = c * (1 + year2month(t * cdi / 100) / 100) ** mes
+    imposto_val = (valor_aplicacao - c) * i / 100
+    aplicacao_liquida = valor_aplicacao - imposto_val
+    poupanca = c * (1 + year2month(jurospoupanca(p)) / 100) ** mes
+    return {"mes": mes, "aplicacao": aplicacao_liquida, "poupanca": poupanca,
+            "imposto": imposto_val,
+            "diferenca": aplicacao_liquida - poupanca}
+
+
+## Soma da progressão geométrica q^inicio + ... + q^fim, elemento a
+# elemento (0 onde fim < inicio).
+#
+# @param q vetor de razões.
+# @param inicio vetor de primeiros expoentes.
+# @param fim vetor de últimos expoentes.
+# @return vetor de somas.
+#
+def soma_geometrica(q, inicio, fim):
+    n = np.maximum(fim - inicio + 1, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        soma = (q ** (fim + 1) - q ** inicio) / (q - 1)
+    return np.where(n == 0, 0.0, np.where(q == 1, n, soma))
+
+
+## Versão vetorizada de cdi.cdb_aportes: aplicação com aportes (ou
+# resgates) mensais constantes, com imposto por lote, em O(1) por cenário.
+#
+# @param c capital inicial
+# @param aporte valor aportado ao final de cada mês (negativo = resgate)
+# @param cdi taxa cdi anual
+# @param p taxa Selic anual
+# @param t rentabilidade da aplicação em função do CDI
+# @param i alíquota do imposto de renda; None tributa cada aporte pela
+#          tabela regressiva do seu prazo.
+# @param m meses
+# @return dicionário com os campos de cdi.ResultadoAportes.
+#
+def cdb_aportes(c, aporte, cdi, p, t, i, m=1) -> dict:
+    c, aporte, cdi, p, t, m = np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.float64) for v in (c, aporte, cdi, p, t, m)))
+    m = m.astype(np.int64)
+    q = 1 + year2month(t * cdi / 100) / 100
+    q_poupanca = 1 + year2month(jurospoupanca(p)) / 100
+    montante = c * q ** m + aporte * soma_geometrica(q, 0, m - 1)
+    poupanca = (c * q_poupanca ** m
+                + aporte * soma_geometrica(q_poupanca, 0, m - 1))
+    aplicado = c + aporte * m
+    if i is not None:
+        imposto_val = (montante - aplicado) * np.asarray(i) / 100
+    else:
+        imposto_val = (c * q ** m - c) * aliquota_ir(DIAS_POR_MES * m) / 100
+        for inicio, fim, aliquota in faixas_ir_meses():
+            fim = m - 1 if fim is None else np.minimum(fim, m - 1)
+            ganho = aporte * (soma_geometrica(q, inicio, fim)
+                              - np.maximum(fim - inicio + 1, 0))
+            imposto_val = imposto_val + ganho * aliquota / 100
+    aplicacao = montante - imposto_val
+    return dict(zip(ResultadoAportes._fields,
+                    (aplicado, montante, imposto_val, aplicacao, poupanca,
+                     aplicacao - poupanca)))
+
+
+## Aplicação com um fluxo de caixa mensal qualquer, em uma única passada
+# vetorizada.
+#
+# fluxos[..., k] é o valor aplicado (positivo) ou resgatado (negativo) no
+# mês k, k = 0, ..., m; o resultado é avaliado no mês m. Cada lote rende
+# m - k meses e, com i=None, paga a alíquota regressiva do seu prazo;
+# resgates são lotes negativos, como em cdi.imposto_aportes.
+#
+# @param fluxos vetor (ou matriz, um cenário por linha) de fluxos mensais.
+# @param cdi taxa cdi anual
+# @param p taxa Selic anual
+# @param t rentabilidade da aplicação em função do CDI
+# @param i alíquota do imposto de renda ou None.
+# @return dicionário com os campos de cdi.ResultadoAportes.
+#
+def fluxo_caixa(fluxos, cdi, p, t, i=None) -> dict:
+    fluxos = np.asarray(fluxos, dtype=np.float64)
+    prazo = np.arange(fluxos.shape[-1] - 1, -1, -1)
+    cdi, p, t = (np.asarray(v, dtype=np.float64)[..., np.newaxis]
+                 for v in (cdi, p, t))
+    fator = (1 + year2month(t * cdi / 100) / 100) ** prazo
+    fator_poupanca = (1 + year2month(jurospoupanca(p)) / 100) ** prazo
+    if i is None:
+        aliquota = aliquota_ir(DIAS_POR_MES * prazo)
+    else:
+        aliquota = np.asarray(i, dtype=np.float64)[..., np.newaxis]
+    montante = (fluxos * fator).sum(axis=-1)
+    imposto_val = (fluxos * (fator - 1) * aliquota / 100).sum(axis=-1)
+    poupanca = (fluxos * fator_poupanca).sum(axis=-1)
+    aplicacao = montante - imposto_val
+    return dict(zip(ResultadoAportes._fields,
+                    (fluxos.sum(axis=-1), montante, imposto_val, aplicacao,
+                     poupanca, aplicacao - poupanca)))
+
+
+## Converte o dicionário de colunas de cdb_lote em um vetor estruturado
+# unidimensional, com um campo float64 por coluna.
+#
+# @param colunas dicionário retornado por cdb_lote.
+# @return numpy.ndarray estruturado.
+#
+def para_estruturado(colunas: dict) -> np.ndarray:
+    tipo = np.dtype([(nome, np.float64) for nome in colunas])
+    n = np.size(next(iter(colunas.values())))
+    saida = np.empty(n, dtype=tipo)
+    for nome, valores in colunas.items():
+        saida[nome] = np.ravel(valores)
+    return saida
@@ -13,6 +13,11 @@
 
 """ Importa módulos do arquivo a ser testado (cdi.py) e faz o teste das funções """
 from cdi import *
+import contextlib
+import io
+import os
+import subprocess
+import sys
 import unittest
 
 
@@ -77,6 +82,115 @@ class TestCDI(unittest.TestCase):
         self.assertEqual(round(imposto(valorfut, 1000, 22.5), 4), 2.1737)
         self.assertEqual(round(imposto(1032.505467, 1000, 20), 4), 6.5011)
 
+    ## Testa as tabelas regressivas de IR e IOF.
+    #
+    # @param dias prazo em dias corridos.
+    #
+    def test_aliquotas(self):
+        self.assertEqual([aliquota_ir(d) for d in (1, 180, 181, 360, 361,
+                                                   720, 721, 5000)],
+                         [22.5, 22.5, 20.0, 20.0, 17.5, 17.5, 15.0, 15.0])
+        self.assertEqual([aliquota_iof(d) for d in (1, 10, 29, 30, 400)],
+                         [96, 66, 3, 0.0, 0.0])
+        self.assertEqual(calcula_cdb(1000, 0.1365, 0.1375, 100, None, 7),
+                         calcula_cdb(1000, 0.1365, 0.1375, 100, 20.0, 7))
+        evolucao = list(evolucao_cdb(1000, 0.1365, 0.1375, 100, None, 25))
+        for mes in (6, 7, 12, 13, 24, 25):
+            self.assertAlmostEqual(evolucao[mes - 1].aplicacao, calcula_cdb(
+                1000, 0.1365, 0.1375, 100, None, mes).aplicacaocomimposto,
+                places=8)
+
+    ## Testa a fórmula fechada dos aportes contra a soma lote a lote.
+    #
+    def test_cdb_aportes(self):
+        taxa = taxas_cdb(0.1365, 0.1375, 100, 0).taxa_mensal_aplicacao
+        for aporte, meses, ir in ((200, 30, None), (200, 30, 15.0),
+                                  (-10, 8, None), (500, 1, None)):
+            lotes = [(1000, meses)] + [(aporte, meses - k)
+                                       for k in range(1, meses + 1)]
+            montante = sum(v * (1 + taxa) ** j for v, j in lotes)
+            imposto_val = sum(
+                v * ((1 + taxa) ** j - 1) / 100 *
+                (aliquota_ir(DIAS_POR_MES * j) if ir is None else ir)
+                for v, j in lotes)
+            r = cdb_aportes(1000, aporte, 0.1365, 0.1375, 100, ir, meses)
+            self.assertAlmostEqual(r.montante, montante, places=8)
+            self.assertAlmostEqual(r.imposto, imposto_val, places=8)
+            self.assertEqual(r.aplicado, 1000 + aporte * meses)
+        # sem aportes, igual a calcula_cdb
+        r = cdb_aportes(1000, 0, 0.1365, 0.1375, 100, 22.5, 12)
+        esperado = calcula_cdb(1000, 0.1365, 0.1375, 100, 22.5, 12)
+        self.assertAlmostEqual(r.aplicacao, esperado.aplicacaocomimposto,
+                               places=9)
+        self.assertAlmostEqual(r.diferenca, esperado.apl_poup, places=9)
+
+    ## Testa se calcula_cdb não imprime nada e nomeia os valores de CDB.
+    #
+    def test_calcula_cdb(self):
+        saida = io.StringIO()
+        with contextlib.redirect_stdout(saida):
+            r = calcula_cdb(1000, 0.1365, 0.1375, 100, 22.5, 12)
+        self.assertEqual(saida.getvalue(), "")
+        self.assertEqual(round(r.aplicacaocomimposto, 2), 1105.79)
+        self.assertEqual(r.poupanca_ao_ano, 6.1675)
+        with contextlib.redirect_stdout(saida):
+            self.assertEqual(CDB(1000, 0.1365, 0.1375, 100, 22.5, 12), r)
+        self.assertIn("Montante Aplicação = $ 1105.79", saida.getvalue())
+
+    ## Testa se a evolução mês a mês coincide com calcula_cdb em cada mês.
+    #
+    def test_evolucao_cdb(self):
+        evolucao = list(evolucao_cdb(1000, 0.1365, 0.1375, 110, 15, 360))
+        self.assertEqual(len(evolucao), 360)
+        for mes in (1, 12, 120, 360):
+            r = calcula_cdb(1000, 0.1365, 0.1375, 110, 15, mes)
+            saldo = evolucao[mes - 1]
+            self.assertEqual(saldo.mes, mes)
+            self.assertAlmostEqual(saldo.aplicacao, r.aplicacaocomimposto,
+                                   places=6)
+            self.assertAlmostEqual(saldo.poupanca, r.poupanca, places=6)
+            self.assertAlmostEqual(saldo.imposto, r.imposto_val, places=6)
+            self.assertAlmostEqual(saldo.diferenca, r.apl_poup, places=6)
+
+    ## Testa se a evolução sem horizonte pode ser consumida aos poucos.
+    #
+    def test_evolucao_cdb_infinita(self):
+        evolucao = evolucao_cdb(1000, 0.1365, 0.1375, 100, 0)
+        for _ in range(10000):
+            saldo = next(evolucao)
+        self.assertEqual(saldo.mes, 10000)
+
+    ## Testa as estatísticas, o limite e a limpeza do cache de taxas.
+    #
+    def test_cache_taxas(self):
+        configura_cache_taxas(2)
+        try:
+            esperado = calcula_cdb(1000, 0.1365, 0.1375, 100, 22.5, 12)
+            calcula_cdb(5000, 0.1365, 0.1375, 100, 22.5, 24)
+            estatisticas = estatisticas_cache_taxas()
+            self.assertEqual((estatisticas.hits, estatisticas.misses), (1, 1))
+            calcula_cdb(1000, 0.1, 0.1, 100, 15, 12)
+            calcula_cdb(1000, 0.1, 0.1, 110, 15, 12)
+            self.assertEqual(estatisticas_cache_taxas().currsize, 2)
+            limpa_cache_taxas()
+            self.assertEqual(estatisticas_cache_taxas().currsize, 0)
+            configura_cache_taxas(0)
+            self.assertEqual(
+                calcula_cdb(1000, 0.1365, 0.1375, 100, 22.5, 12), esperado)
+        finally:
+            configura_cache_taxas()
+
+    ## Testa se importar o núcleo de cálculo não carrega o Tkinter.
+    #
+    def test_import_sem_tkinter(self):
+        codigo = "import sys, cdi; print('tkinter' in sys.modules)"
+        # cdi.py é importado da pasta dos testes, de onde quer que eles
+        # sejam executados
+        saida = subprocess.run([sys.executable, "-c", codigo],
+                               capture_output=True, text=True, check=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(saida.stdout.strip(), "False")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,125 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_Test_Unit_for_CDI_Cache
+#
+#  Class for testing the persistent sqlite result cache.
+#
+#  @author Luan Bernardo Dias
+#  @since 09/10/2022
+#  @see https://docs.python.org/2/library/unittest.html
+#
+
+
+""" Testa o cache persistente de resultados e seu uso no modo lote """
+import io
+import os
+import tempfile
+import unittest
+
+import cdicache
+from cdi import calcula_cdb
+from cdicache import CacheResultados
+from cdilote import processa_lote
+
+## Cenários com um repetido (mesma chave escrita de outro jeito).
+CENARIOS = [(1000, 0.1365, 0.1375, 100, 22.5, 12),
+            (2000, 0.1365, 0.1375, 110, 20.0, 24),
+            ("1000", 0.1365, 0.1375, 100.0, 22.5, 12)]
+
+
+##
+# Classe para testar consultas, gravações, versões e remoção por tamanho.
+#
+class TestCDICache(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.pasta.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    ## Testa que os resultados voltam idênticos de um novo processo (nova
+    # conexão) e que só os cenários novos são calculados.
+    #
+    def test_persistencia(self):
+        argumentos = [tuple(float(v) for v in a) for a in CENARIOS]
+        with CacheResultados(self.caminho) as cache:
+            self.assertEqual(cache.busca(argumentos), [None] * 3)
+            cache.calcula(argumentos[:2])
+        with CacheResultados(self.caminho) as cache:
+            resultados = cache.busca(argumentos)
+            self.assertEqual(cache.entradas, 2)
+        self.assertEqual(resultados, [calcula_cdb(*a) for a in argumentos])
+
+    ## Testa que outra versão das tabelas não encontra os resultados.
+    #
+    def test_versao(self):
+        with CacheResultados(self.caminho) as cache:
+            cache.calcula([CENARIOS[0]])
+            cache.versao = "outra"
+            self.assertEqual(cache.busca([CENARIOS[0]]), [None])
+
+    ## Testa a remoção das entradas mais antigas.
+    #
+    def test_remocao(self):
+        with CacheResultados(self.caminho, max_entradas=10) as cache:
+            for m in range(1, 31):
+                cache.calcula([(1000, 0.1365, 0.1375, 100, 22.5, m)])
+            self.assertLessEqual(cache.entradas, 10)
+            achados = cache.busca([(1000, 0.1365, 0.1375, 100, 22.5, m)
+                                   for m in range(1, 31)])
+        self.assertIsNone(achados[0])
+        self.assertIsNotNone(achados[-1])
+
+    ## Testa que o lote com cache produz a mesma saída e, na segunda
+    # execução, não calcula nada.
+    #
+    def test_lote(self):
+        texto = ("capital,aplicacao,selic,rentabilidade,imposto,meses\n"
+                 "1000,0.1365,0.1375,100,22.5,12\n"
+                 "mil,0.1365,0.1375,100,22.5,12\n"
+                 "500,0.05,0.06,110,auto,7\n")
+        esperado = io.StringIO()
+        processa_lote(io.StringIO(texto), esperado, erros=io.StringIO())
+        for relato in ("0 acertos, 2 faltas", "2 acertos, 0 faltas"):
+            saida, erros = io.StringIO(), io.StringIO()
+            processa_lote(io.StringIO(texto), saida, erros=erros,
+                          cache=self.caminho)
+            self.assertEqual(saida.getvalue(), esperado.getvalue())
+            self.assertIn("linha 3", erros.getvalue())
+            self.assertIn(relato, erros.getvalue())
+        with CacheResultados(self.caminho) as cache:
+            self.assertEqual(cache.entradas, 2)
+
+    ## Testa que, no modo paralelo, os contadores dos blocos são somados no
+    # processo principal e as entradas são contadas ao final.
+    #
+    def test_lote_paralelo(self):
+        linhas = ["1000,0.1365,0.1375,100,22.5,%d\n" % m for m in range(1, 7)]
+        texto = "capital,aplicacao,selic,rentabilidade,imposto,meses\n" + \
+            "".join(linhas)
+        for relato in ("0 acertos, 6 faltas", "6 acertos, 0 faltas"):
+            erros = io.StringIO()
+            processa_lote(io.StringIO(texto), io.StringIO(), erros=erros,
+                          trabalhadores=2, tamanho_bloco=2,
+                          cache=self.caminho)
+            self.assertIn(relato, erros.getvalue())
+        with CacheResultados(self.caminho, max_entradas=4,
+                             conta=False) as cache:
+            self.assertIsNone(cache.entradas)
+            cache.limita()
+            self.assertLessEqual(cache.entradas, 4)
+
+    ## Testa a normalização da chave.
+    #
+    def test_chave(self):
+        self.assertEqual(cdicache.chave(CENARIOS[0]),
+                         cdicache.chave(CENARIOS[2]))
+        self.assertEqual(cdicache.chave((1, 2, 3, 4, -0.0, 5)),
+                         cdicache.chave((1, 2, 3, 4, 0.0, 5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_Test_Unit_for_CDI_Cenario
+#
+#  Class for testing the incremental scenario against calcula_cdb.
+#
+#  @author Luan Bernardo Dias
+#  @since 09/10/2022
+#  @see https://docs.python.org/2/library/unittest.html
+#
+
+
+""" Compara o cenário incremental com calcula_cdb """
+import unittest
+
+from cdi import calcula_cdb, relatorio_cdb
+from cdicenario import DERIVADOS, Cenario
+
+
+##
+# Classe para testar os valores, a invalidação e os contadores do cenário.
+#
+class TestCDICenario(unittest.TestCase):
+
+    ## Cada mudança de entrada, isolada ou em grupo, dá o mesmo resultado
+    # de calcula_cdb.
+    #
+    def test_resultados(self):
+        cenario = Cenario(1000, 0.1365, 0.1375, 100, None, 12)
+        mudancas = [{"m": 13}, {"i": 15.0}, {"m": 25}, {"p": 0.07},
+                    {"c": 5000, "t": 110}, {"cdi": 0.0765}, {"i": None},
+                    {"m": 1}, {"p": 0.1375, "m": 200}]
+        argumentos = dict(c=1000, cdi=0.1365, p=0.1375, t=100, i=None, m=12)
+        self.assertEqual(cenario.resultado, calcula_cdb(**argumentos))
+        for mudanca in mudancas:
+            cenario.atualiza(**mudanca)
+            argumentos.update(mudanca)
+            self.assertEqual(cenario.resultado, calcula_cdb(**argumentos))
+        self.assertEqual(cenario.relatorio(), relatorio_cdb(
+            5000, 0.0765, 0.1375, 110, 15.0, 200, cenario.resultado))
+
+    ## Mudar os meses só recalcula o resultado, com o IR informado ou com
+    # o IR automático dentro da mesma faixa; na troca de faixa, também a
+    # alíquota e as taxas com imposto.
+    #
+    def test_invalidacao(self):
+        cenario = Cenario(1000, 0.1365, 0.1375, 100, 15.0, 12)
+        cenario.resultado
+        self.assertEqual(sum(cenario.calculados.values()), len(DERIVADOS))
+        cenario.m = 24
+        cenario.resultado
+        self.assertEqual(cenario.calculados["resultado"], 2)
+        self.assertEqual(cenario.calculados["aliquota"], 1)
+        self.assertEqual(cenario.calculados["campos_taxas"], 1)
+        cenario.i = None
+        cenario.resultado
+        self.assertEqual(cenario.calculados["aliquota"], 2)
+        cenario.m = 20
+        cenario.resultado
+        self.assertEqual(cenario.calculados["taxas_imposto"], 2)
+        cenario.m = 25
+        cenario.resultado
+        self.assertEqual(cenario.calculados["aliquota"], 3)
+        self.assertEqual(cenario.calculados["taxas_imposto"], 3)
+        self.assertEqual(cenario.calculados["taxas_poupanca"], 1)
+        self.assertEqual(cenario.calculados["campos_taxas"], 3)
+        self.assertEqual(cenario.calculados["resultado"], 5)
+        # o mesmo valor não descarta nada
+        self.assertEqual(cenario.atualiza(m=25, c=1000.0), 0)
+        with self.assertRaises(TypeError):
+            cenario.atualiza(meses=1)
+        with self.assertRaises(AttributeError):
+            cenario.meses = 1
+
+    ## Cenario.calcula dá o resultado de calcula_cdb numa sequência de
+    # consultas com os meses cruzando as faixas do IR e outras entradas
+    # mudando, e nada é recalculado numa consulta repetida.
+    #
+    def test_calcula(self):
+        consultas = [(1000, 0.1365, 0.1375, t, i, m)
+                     for t in (90, 110) for i in (None, 15.0)
+                     for m in (1, 6, 7, 12, 13, 24, 25, 360)]
+        consultas += [(5000, 0.0765, 0.07, 100, None, 18),
+                      (5000, 0.0765, 0.07, 100, 22.5, 18),
+                      (5000, 0.0765, 0.07, 100, None, 3)]
+        cenario = Cenario(*consultas[0])
+        for argumentos in consultas:
+            self.assertEqual(cenario.calcula(*argumentos),
+                             calcula_cdb(*argumentos))
+        calculados = cenario.estatisticas()["calculados"]
+        cenario.calcula(*consultas[-1])
+        self.assertEqual(cenario.estatisticas()["calculados"], calculados)
+
+    ## Testa a leitura de um campo só, que calcula apenas o seu grupo.
+    #
+    def test_campos(self):
+        cenario = Cenario(1000, 0.1365, 0.1375, 100, 15.0, 12)
+        esperado = calcula_cdb(1000, 0.1365, 0.1375, 100, 15.0, 12)
+        self.assertEqual(cenario.tempo_poup, esperado.tempo_poup)
+        self.assertEqual({grupo: n for grupo, n in cenario.calculados.items()
+                          if n}, {"taxas_poupanca": 1})
+        for campo in esperado._fields:
+            self.assertEqual(getattr(cenario, campo),
+                             getattr(esperado, campo))
+        with self.assertRaises(AttributeError):
+            cenario.inexistente
+
+    ## Testa os contadores de trabalho e um erro de cálculo.
+    #
+    def test_estatisticas(self):
+        cenario = Cenario(1000, 0.1365, 0.1375, 100, None, 1)
+        for m in range(1, 121):
+            cenario.m = m
+            cenario.resultado
+        estatisticas = cenario.estatisticas()
+        self.assertLess(estatisticas["calculados"], 120 * len(DERIVADOS) / 2)
+        self.assertGreater(estatisticas["preservados"],
+                           estatisticas["calculados"])
+        self.assertEqual(estatisticas["guardados"], len(DERIVADOS))
+        cenario.cdi = 0.0
+        with self.assertRaises(ZeroDivisionError):
+            cenario.resultado
+        cenario.cdi = 0.1365
+        self.assertEqual(cenario.resultado,
+                         calcula_cdb(1000, 0.1365, 0.1375, 100, None, 120))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_Test_Unit_for_CDI_Coprocesso
+#
+#  Class for testing the line-in/line-out coprocess mode.
+#
+#  @author Luan Bernardo Dias
+#  @since 09/10/2022
+#  @see https://docs.python.org/2/library/unittest.html
+#
+
+
+""" Testa o modo coprocesso (--serve-stdin) de cdi.py """
+import io
+import json
+import subprocess
+import sys
+import unittest
+
+from cdi import calcula_cdb
+from cdicoprocesso import serve
+
+## Cenário de exemplo em opções da linha de comando.
+LINHA = "-c 1000 -a 0.1365 -s 0.1375 -i 22.5 -t 100 -m 12\n"
+
+
+##
+# Classe para testar as respostas do coprocesso.
+#
+class TestCDICoprocesso(unittest.TestCase):
+
+    ## Testa que cada linha, válida ou não, recebe uma resposta.
+    #
+    def test_serve(self):
+        entrada = io.StringIO(
+            LINHA + "\n--capital 1000 -a x -s 0.1 -i 0 -t 100\n"
+            '{"capital": 1000, "aplicacao": 0.1365, "selic": 0.1375, '
+            '"rentabilidade": 100, "imposto": "auto", "meses": 12}\n')
+        saida = io.StringIO()
+        self.assertEqual(serve(entrada, saida), 4)
+        respostas = [json.loads(linha)
+                     for linha in saida.getvalue().splitlines()]
+        self.assertEqual(respostas[0]["aplicacaocomimposto"], calcula_cdb(
+            1000, 0.1365, 0.1375, 100, 22.5, 12).aplicacaocomimposto)
+        self.assertEqual(respostas[1], {"erro": "linha vazia"})
+        self.assertIn("aplicacao", respostas[2]["erro"])
+        self.assertEqual(respostas[3]["imposto"], 20.0)
+
+    ## Testa que um cenário sem resultado real ou finito recebe um erro e
+    # não encerra o coprocesso.
+    #
+    def test_resultado_invalido(self):
+        entrada = io.StringIO(
+            "-c 1000 -a -2 -s 0.1375 -i 0 -t -100 -m 12\n"
+            "-c nan -a 0.1365 -s 0.1375 -i 0 -t 100 -m 12\n" + LINHA)
+        saida = io.StringIO()
+        self.assertEqual(serve(entrada, saida), 3)
+        respostas = [json.loads(linha)
+                     for linha in saida.getvalue().splitlines()]
+        self.assertIn("erro", respostas[0])
+        self.assertIn("erro", respostas[1])
+        self.assertNotIn("erro", respostas[2])
+
+    ## Testa que o processo responde a cada linha antes do fim da entrada.
+    #
+    def test_pipe(self):
+        processo = subprocess.Popen(
+            [sys.executable, "cdi.py", "--serve-stdin"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        try:
+            for meses in (1, 12):
+                processo.stdin.write(LINHA.replace("-m 12", "-m %d" % meses))
+                processo.stdin.flush()
+                resposta = json.loads(processo.stdout.readline())
+                self.assertEqual(resposta["meses"], meses)
+        finally:
+            processo.stdin.close()
+            processo.stdout.close()
+            processo.wait(10)
+        self.assertEqual(processo.returncode, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_Test_Unit_for_CDI_GUI
+#
+#  Class for testing the display helpers of the GUI without a display.
+#
+#  @author Luan Bernardo Dias
+#  @since 09/10/2022
+#  @see https://docs.python.org/2/library/unittest.html
+#
+
+
+""" Testa as funções auxiliares da tabela virtual e do gráfico """
+import unittest
+
+try:
+    import cdigui
+except ImportError:
+    cdigui = None
+
+
+##
+# Classe para testar a janela de rolagem da tabela e a redução das séries.
+#
+@unittest.skipIf(cdigui is None, "Tkinter não instalado")
+class TestCDIGui(unittest.TestCase):
+
+    ## Testa os limites da primeira linha visível.
+    #
+    def test_limita_primeira(self):
+        self.assertEqual(cdigui.limita_primeira(-5, 20, 1000), 0)
+        self.assertEqual(cdigui.limita_primeira(500, 20, 1000), 500)
+        self.assertEqual(cdigui.limita_primeira(995, 20, 1000), 980)
+        self.assertEqual(cdigui.limita_primeira(3, 20, 10), 0)
+
+    ## Testa que a série reduzida cabe na largura e preserva os extremos.
+    #
+    def test_reduz_serie(self):
+        valores = [float(k % 97) for k in range(100000)]
+        valores[54321] = 1e6
+        pares = cdigui.reduz_serie(valores, 600)
+        self.assertEqual(len(pares), 600)
+        self.assertEqual(min(p[0] for p in pares), 0.0)
+        self.assertEqual(max(p[1] for p in pares), 1e6)
+        self.assertEqual(cdigui.reduz_serie([1.0, 2.0], 600),
+                         [(1.0, 1.0), (2.0, 2.0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_Test_Unit_for_CDI_Lote
+#
+#  Class for testing the CSV/JSONL batch mode.
+#
+#  @author Luan Bernardo Dias
+#  @since 09/10/2022
+#  @see https://docs.python.org/2/library/unittest.html
+#
+
+
+""" Testa a leitura, o cálculo e a escrita de lotes de cenários """
+import csv
+import io
+import json
+import re
+import unittest
+
+from cdi import calcula_cdb
+from cdilote import processa_lote
+
+## Cabeçalho e dois cenários válidos, com uma linha inválida no meio.
+CSV_ENTRADA = ("capital,aplicacao,selic,rentabilidade,imposto,meses\n"
+               "1000,0.1365,0.1375,100,22.5,12\n"
+               "mil,0.1365,0.1375,100,22.5,12\n"
+               "500,0.05,0.06,110,15\n")
+
+
+##
+# Classe para testar o processamento em lote.
+#
+class TestCDILote(unittest.TestCase):
+
+    ## Testa se um CSV é calculado linha a linha e a linha inválida é
+    # relatada sem interromper o lote.
+    #
+    def test_csv(self):
+        saida, erros = io.StringIO(), io.StringIO()
+        ok, falhas = processa_lote(io.StringIO(CSV_ENTRADA), saida,
+                                   erros=erros)
+        self.assertEqual((ok, falhas), (2, 1))
+        self.assertIn("linha 3", erros.getvalue())
+        linhas = list(csv.DictReader(io.StringIO(saida.getvalue())))
+        self.assertEqual(len(linhas), 2)
+        esperado = calcula_cdb(1000, 0.1365, 0.1375, 100, 22.5, 12)
+        self.assertEqual(float(linhas[0]["aplicacaocomimposto"]),
+                         esperado.aplicacaocomimposto)
+        # meses ausente vale 1, como na linha de comando
+        self.assertEqual(linhas[1]["meses"], "1")
+
+    ## Testa a entrada e a saída em JSONL.
+    #
+    def test_jsonl(self):
+        entrada = io.StringIO(
+            '{"capital": 1000, "aplicacao": 0.1365, "selic": 0.1375, '
+            '"rentabilidade": 100, "imposto": 22.5, "meses": 12}\n'
+            '\n'
+            '{"capital": 1000}\n'
+            'não é json\n')
+        saida, erros = io.StringIO(), io.StringIO()
+        ok, falhas = processa_lote(entrada, saida, "jsonl", "jsonl", erros)
+        self.assertEqual((ok, falhas), (1, 2))
+        self.assertIn("linha 3: campo 'aplicacao' ausente", erros.getvalue())
+        registro = json.loads(saida.getvalue())
+        self.assertEqual(registro["poupanca"], calcula_cdb(
+            1000, 0.1365, 0.1375, 100, 22.5, 12).poupanca)
+
+    ## Testa se o modo com processos produz exatamente a mesma saída, na
+    # mesma ordem, que o modo sequencial, inclusive nos erros.
+    #
+    def test_paralelo(self):
+        texto = CSV_ENTRADA + "".join(
+            "%d,0.1,0.09,%d,15,%d\n" % (100 + k, 90 + k % 40, 1 + k % 50)
+            for k in range(50))
+        erros_esperados = io.StringIO()
+        processa_lote(io.StringIO(texto), io.StringIO(),
+                      erros=erros_esperados)
+        for formato in ("csv", "jsonl"):
+            saida, erros = io.StringIO(), io.StringIO()
+            processa_lote(io.StringIO(texto), saida, "csv", formato, erros,
+                          trabalhadores=2, tamanho_bloco=7)
+            sequencial = io.StringIO()
+            processa_lote(io.StringIO(texto), sequencial, "csv", formato,
+                          io.StringIO())
+            self.assertEqual(saida.getvalue(), sequencial.getvalue())
+            self.assertEqual(erros.getvalue(), erros_esperados.getvalue())
+
+    ## Testa o imposto "auto", trocado pela alíquota do prazo.
+    #
+    def test_imposto_automatico(self):
+        saida = io.StringIO()
+        processa_lote(io.StringIO(
+            "capital,aplicacao,selic,rentabilidade,imposto,meses\n"
+            "1000,0.1365,0.1375,100,auto,7\n"
+            "1000,0.1365,0.1375,100,auto,30\n"), saida)
+        linhas = list(csv.DictReader(io.StringIO(saida.getvalue())))
+        self.assertEqual([linha["imposto"] for linha in linhas],
+                         ["20.0", "15.0"])
+
+    ## Testa se um capital nulo é relatado como erro da linha.
+    #
+    def test_capital_nulo(self):
+        erros = io.StringIO()
+        ok, falhas = processa_lote(
+            io.StringIO("capital,aplicacao,selic,rentabilidade,imposto\n"
+                        "0,0.1,0.1,100,15\n"), io.StringIO(), erros=erros)
+        self.assertEqual((ok, falhas), (0, 1))
+        self.assertIn("linha 2", erros.getvalue())
+
+    ## Testa se taxas de -100% ou menos e valores não finitos, que dariam
+    # resultados complexos ou não finitos, são relatados como erro da
+    # linha, nos dois formatos de saída.
+    #
+    def test_fora_do_dominio(self):
+        texto = ("capital,aplicacao,selic,rentabilidade,imposto,meses\n"
+                 "1000,-2,0.1375,-100,0,12\n"
+                 "1000,0.1365,-1,100,15,12\n"
+                 "1000,0.1365,0.1375,-800,15,12\n"
+                 "nan,0.1365,0.1375,100,15,12\n"
+                 "1000,0.1365,0.1375,100,15,12\n")
+        for formato in ("csv", "jsonl"):
+            saida, erros = io.StringIO(), io.StringIO()
+            ok, falhas = processa_lote(io.StringIO(texto), saida, "csv",
+                                       formato, erros)
+            self.assertEqual((ok, falhas), (1, 4))
+            self.assertEqual(re.findall(r"linha (\d+)", erros.getvalue()),
+                             ["2", "3", "4", "5"])
+            self.assertNotIn("j)", saida.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
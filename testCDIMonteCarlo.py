@@ -0,0 +1,108 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_Test_Unit_for_CDI_Monte_Carlo
+#
+#  Class for testing the Monte Carlo simulation of Selic paths.
+#
+#  @author Luan Bernardo Dias
+#  @since 09/10/2022
+#  @see https://docs.python.org/2/library/unittest.html
+#
+
+
+""" Testa a simulação de Monte Carlo dos caminhos da Selic """
+import unittest
+
+from cdi import calcula_cdb
+
+try:
+    import numpy as np
+    import cdimontecarlo
+except ImportError:
+    np = None
+
+
+##
+# Classe para testar os caminhos, o resumo e a reprodutibilidade.
+#
+@unittest.skipIf(np is None, "NumPy não instalado")
+class TestCDIMonteCarlo(unittest.TestCase):
+
+    ## Sem volatilidade e com a média igual à Selic inicial, todos os
+    # caminhos são constantes e o resultado é o de calcula_cdb, nos dois
+    # lados da regra da poupança.
+    #
+    def test_sem_volatilidade(self):
+        for selic in (0.07, 0.1375):
+            esperado = calcula_cdb(1000, 0.1365, selic, 100, None, 24)
+            resumo = cdimontecarlo.monte_carlo(
+                1000, 0.1365, selic, 100, None, 24, caminhos=50,
+                volatilidade=0.0, tamanho_bloco=7)
+            for campo, atributo in (("aplicacao", "aplicacaocomimposto"),
+                                    ("poupanca", "poupanca"),
+                                    ("diferenca", "apl_poup")):
+                np.testing.assert_allclose(resumo[campo]["quantis"],
+                                           getattr(esperado, atributo))
+            self.assertEqual(resumo["prob_supera"], 1.0)
+
+    ## Testa o formato, o primeiro mês e o piso zero dos caminhos.
+    #
+    def test_caminhos(self):
+        selic = cdimontecarlo.caminhos_selic(np.random.default_rng(1), 500,
+                                             36, 0.02, 0.0,
+                                             volatilidade=0.05)
+        self.assertEqual(selic.shape, (500, 36))
+        self.assertTrue((selic[:, 0] == 0.02).all())
+        self.assertTrue((selic >= 0).all())
+        self.assertTrue((selic == 0).any())
+
+    ## A mesma semente dá o mesmo resultado em um processo ou em vários;
+    # os quantis são ordenados.
+    #
+    def test_semente(self):
+        argumentos = (1000, 0.1365, 0.1375, 100, None, 60)
+        opcoes = {"caminhos": 3000, "semente": 7, "tamanho_bloco": 1000}
+        local = cdimontecarlo.monte_carlo(*argumentos, **opcoes)
+        paralelo = cdimontecarlo.monte_carlo(*argumentos, trabalhadores=2,
+                                             **opcoes)
+        outra = cdimontecarlo.monte_carlo(*argumentos, caminhos=3000,
+                                          semente=8, tamanho_bloco=1000)
+        for campo in cdimontecarlo.CAMPOS_MC:
+            np.testing.assert_array_equal(local[campo]["quantis"],
+                                          paralelo[campo]["quantis"])
+            self.assertEqual(local[campo]["media"], paralelo[campo]["media"])
+            self.assertTrue((np.diff(local[campo]["quantis"]) >= 0).all())
+        self.assertNotEqual(local["aplicacao"]["media"],
+                            outra["aplicacao"]["media"])
+
+    ## Os quantis dos resumos juntados ficam perto dos quantis exatos de
+    # todos os valores.
+    #
+    def test_resumos(self):
+        rng = np.random.default_rng(3)
+        blocos = [rng.lognormal(7, 0.2, n) for n in (5000, 5000, 1234)]
+        junto = None
+        for bloco in blocos:
+            junto = cdimontecarlo.junta(junto, cdimontecarlo.resume(bloco))
+        valores = np.concatenate(blocos)
+        self.assertEqual(junto["n"], len(valores))
+        self.assertAlmostEqual(junto["soma"], valores.sum(), places=6)
+        quantis = cdimontecarlo.quantis_ponderados(
+            junto["pontos"], junto["pesos"], cdimontecarlo.QUANTIS)
+        np.testing.assert_allclose(quantis,
+                                   np.quantile(valores, cdimontecarlo.QUANTIS),
+                                   rtol=1e-3)
+
+    ## Prazo ou número de caminhos menor que 1 é rejeitado.
+    #
+    def test_invalidos(self):
+        argumentos = (1000, 0.1365, 0.1375, 100, None)
+        for meses, caminhos in ((0, 100), (-3, 100), (12, 0)):
+            with self.assertRaises(ValueError):
+                cdimontecarlo.monte_carlo(*argumentos, meses,
+                                          caminhos=caminhos)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_Test_Unit_for_CDI_Perfil
+#
+#  Class for testing the opt-in instrumentation of cdi.py and cdilote.py.
+#
+#  @author Luan Bernardo Dias
+#  @since 09/10/2022
+#  @see https://docs.python.org/2/library/unittest.html
+#
+
+
+""" Testa a contagem de chamadas e a restauração das funções """
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import cdi
+import cdilote
+import cdiperfil
+
+
+##
+# Classe para testar a ativação, o resumo e a desativação da instrumentação.
+#
+class TestCDIPerfil(unittest.TestCase):
+
+    def setUp(self):
+        cdiperfil.CONTADORES.clear()
+        cdi.limpa_cache_taxas()
+
+    def tearDown(self):
+        cdiperfil.desativa()
+
+    ## Testa as contagens de CDB e a restauração das funções originais.
+    #
+    def test_contagem(self):
+        original = cdi.jc
+        cdiperfil.ativa("resumo")
+        self.assertIsNot(cdi.jc, original)
+        with contextlib.redirect_stdout(io.StringIO()):
+            cdi.CDB(1000, 0.1365, 0.1375, 100, 22.5, 12)
+            cdi.CDB(2000, 0.1365, 0.1375, 100, 22.5, 6)
+        contadores = cdiperfil.CONTADORES
+        self.assertEqual(contadores["CDB"].chamadas, 2)
+        self.assertEqual(contadores["calcula_cdb"].chamadas, 2)
+        # as taxas vêm do cache na segunda chamada
+        self.assertEqual(contadores["jurospoupanca"].chamadas, 1)
+        self.assertGreaterEqual(contadores["CDB"].total,
+                                contadores["calcula_cdb"].total)
+        saida = io.StringIO()
+        cdiperfil.encerra(saida)
+        self.assertIn("CDB", saida.getvalue())
+        self.assertIs(cdi.jc, original)
+
+    ## Testa as etapas do lote e o arquivo do cProfile.
+    #
+    def test_lote_cprofile(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            destino = os.path.join(pasta, "lote.prof")
+            cdiperfil.ativa(destino)
+            entrada = io.StringIO(
+                "capital,aplicacao,selic,rentabilidade,imposto,meses\n"
+                "1000,0.1365,0.1375,100,22.5,12\n"
+                "2000,0.1365,0.1375,110,20,24\n")
+            cdilote.processa_lote(entrada, io.StringIO())
+            cdiperfil.encerra(io.StringIO())
+            self.assertTrue(os.path.getsize(destino) > 0)
+        contadores = cdiperfil.CONTADORES
+        self.assertEqual(contadores["le_registros"].chamadas, 1)
+        self.assertEqual(contadores["calcula_cdb"].chamadas, 2)
+        self.assertLessEqual(contadores["le_registros"].total,
+                             contadores["calcula_registros"].total)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_Test_Unit_for_CDI_Ranking
+#
+#  Class for testing the top-k offer ranking against calcula_cdb.
+#
+#  @author Luan Bernardo Dias
+#  @since 09/10/2022
+#  @see https://docs.python.org/2/library/unittest.html
+#
+
+
+""" Compara o ranking de ofertas com calcula_cdb """
+import os
+import tempfile
+import unittest
+
+from cdi import DIAS_POR_MES, aliquota_ir, calcula_cdb
+
+try:
+    import numpy as np
+    import cdiranking
+except ImportError:
+    np = None
+
+## Ofertas de um catálogo pequeno: emissor, % CDI, prazo, isento.
+OFERTAS = [("A", 100, 12, False), ("B", 95, 24, True), ("C", 120, 36, False),
+           ("D", 110, 6, False), ("E", 90, 12, True), ("F", 130, 60, False),
+           ("G", 105, 24, False), ("H", 99, 1, True)]
+
+
+##
+# Classe para testar o índice por prazo e as k melhores ofertas.
+#
+@unittest.skipIf(np is None, "NumPy não instalado")
+class TestCDIRanking(unittest.TestCase):
+
+    def setUp(self):
+        self.catalogo = cdiranking.Catalogo(*zip(*OFERTAS))
+
+    ## Com o horizonte igual ao prazo, a diferença de cada oferta é a
+    # Apl - Poup de calcula_cdb, com IR zero nas isentas.
+    #
+    def test_valores(self):
+        for emissor, t, prazo, isento in OFERTAS:
+            (posicao,) = [r for r in self.catalogo.melhores(
+                1000, 0.1365, 0.1375, prazo, len(OFERTAS))
+                if r.emissor == emissor]
+            i = 0.0 if isento else aliquota_ir(DIAS_POR_MES * prazo)
+            esperado = calcula_cdb(1000, 0.1365, 0.1375, t, i, prazo)
+            self.assertAlmostEqual(posicao.liquido,
+                                   esperado.aplicacaocomimposto, places=8)
+            self.assertAlmostEqual(posicao.diferenca, esperado.apl_poup,
+                                   places=8)
+
+    ## Ofertas que vencem depois do horizonte, ou antes do prazo mínimo,
+    # ficam de fora.
+    #
+    def test_elegiveis(self):
+        ranking = self.catalogo.melhores(1000, 0.1365, 0.1375, 24, 10)
+        self.assertEqual(sorted(r.emissor for r in ranking),
+                         ["A", "B", "D", "E", "G", "H"])
+        ranking = self.catalogo.melhores(1000, 0.1365, 0.1375, 24, 10,
+                                         prazo_minimo=12)
+        self.assertEqual(sorted(r.emissor for r in ranking),
+                         ["A", "B", "E", "G"])
+        self.assertEqual(self.catalogo.melhores(1000, 0.1365, 0.1375, 0), [])
+
+    ## As k melhores por argpartition são as primeiras da ordenação
+    # completa.
+    #
+    def test_melhores(self):
+        rng = np.random.default_rng(2022)
+        n = 5000
+        catalogo = cdiranking.Catalogo(
+            ["E%d" % k for k in range(n)], rng.uniform(80, 130, n),
+            rng.integers(1, 121, n), rng.random(n) < 0.3)
+        fatia, valores = catalogo.avalia(1000, 0.1365, 0.1375, 48)
+        ordenadas = np.sort(valores["diferenca"])[::-1]
+        for k in (1, 7, 100, n):
+            ranking = catalogo.melhores(1000, 0.1365, 0.1375, 48, k)
+            self.assertEqual(len(ranking), min(k, fatia.stop - fatia.start))
+            np.testing.assert_array_equal(
+                [r.diferenca for r in ranking], ordenadas[:len(ranking)])
+
+    ## Testa a leitura do catálogo a partir de registros.
+    #
+    def test_registros(self):
+        catalogo = cdiranking.Catalogo.de_registros(
+            [(2, {"emissor": "X", "rentabilidade": "101.5", "prazo": "12",
+                  "isento": "sim"}),
+             (3, {"emissor": "Y", "rentabilidade": "99", "prazo": "3",
+                  "isento": ""})])
+        self.assertEqual(list(catalogo.emissores), ["Y", "X"])
+        self.assertEqual(list(catalogo.isentos), [False, True])
+        with self.assertRaises(ValueError):
+            cdiranking.Catalogo.de_registros(
+                [(1, {"emissor": "Z", "prazo": 1})])
+
+    ## Testa que o erro de um catálogo em CSV traz a linha do arquivo,
+    # contando o cabeçalho.
+    #
+    def test_linha_do_erro(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, "ofertas.csv")
+            with open(caminho, "w", encoding="utf-8") as arquivo:
+                arquivo.write("emissor,rentabilidade,prazo,isento\n"
+                              "X,101.5,12,sim\n"
+                              "Y,noventa,3,\n")
+            with self.assertRaisesRegex(ValueError, "^linha 3: "):
+                cdiranking.le_catalogo(caminho)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_Test_Unit_for_CDI_Serie
+#
+#  Class for testing the daily CDI series and its cumulative index.
+#
+#  @author Luan Bernardo Dias
+#  @since 09/10/2022
+#  @see https://docs.python.org/2/library/unittest.html
+#
+
+
+""" Testa o índice acumulado da série diária de CDI """
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+    import cdiserie
+    from cdiserie import SerieCDI
+except ImportError:
+    np = None
+
+
+##
+# Classe para testar as consultas sobre a série diária.
+#
+@unittest.skipIf(np is None, "NumPy não instalado")
+class TestCDISerie(unittest.TestCase):
+
+    ##
+    # Monta uma série de dias úteis (segunda a sexta) com CDI variável.
+    #
+    def setUp(self):
+        dias = np.arange("2020-01-01", "2024-01-01", dtype="datetime64[D]")
+        self.datas = dias[np.is_busday(dias)]
+        rng = np.random.default_rng(2022)
+        self.cdi = np.round(rng.uniform(0.02, 0.14, len(self.datas)), 4)
+        self.serie = SerieCDI(self.datas, self.cdi)
+
+    ## Testa o fator entre duas datas contra o produto dia a dia.
+    #
+    def test_fator_igual_laco(self):
+        inicio, fim = 10, 600
+        for t in (100, 110):
+            esperado = 1.0
+            for cdi in self.cdi[inicio:fim]:
+                esperado *= 1 + t / 100 * ((1 + cdi) ** (1 / 252) - 1)
+            self.assertAlmostEqual(
+                self.serie.fator(self.datas[inicio], self.datas[fim], t),
+                esperado, places=12)
+        self.assertEqual(self.serie.dias_uteis(self.datas[inicio],
+                                               self.datas[fim]), fim - inicio)
+
+    ## Testa se 252 dias a CDI constante rendem exatamente o CDI anual.
+    #
+    def test_cdi_constante(self):
+        serie = SerieCDI(self.datas[:300], np.full(300, 0.1365))
+        self.assertAlmostEqual(
+            serie.fator(self.datas[0], self.datas[252]), 1.1365, places=12)
+        self.assertAlmostEqual(
+            serie.montante(1000, self.datas[0], self.datas[252], 100, 15),
+            1000 + 136.5 * 0.85, places=8)
+
+    ## Testa o IOF e o IR automáticos pelo prazo em dias corridos.
+    #
+    def test_impostos_automaticos(self):
+        inicio = np.datetime64("2021-03-01")
+        fins = inicio + np.array([10, 100, 800])
+        rendimento = 1000 * (self.serie.fator(inicio, fins) - 1)
+        liquido = self.serie.montante(1000, inicio, fins, 100, None)
+        # 10 dias: IOF de 66% e IR de 22,5% sobre o que sobra
+        esperado = [1000 + rendimento[0] * 0.34 * 0.775,
+                    1000 + rendimento[1] * 0.775,
+                    1000 + rendimento[2] * 0.85]
+        np.testing.assert_allclose(liquido, esperado, rtol=1e-12)
+
+    ## Testa consultas vetorizadas e datas fora dos dias úteis.
+    #
+    def test_vetorizado(self):
+        inicios = np.array(["2020-01-04", "2021-06-01"], dtype="datetime64[D]")
+        fins = np.array(["2020-03-01", "2023-12-29"], dtype="datetime64[D]")
+        fatores = self.serie.fator(inicios, fins, 95)
+        for k in range(2):
+            self.assertEqual(fatores[k],
+                             self.serie.fator(inicios[k], fins[k], 95))
+        # sábado 04/01/2020 começa na segunda 06/01/2020
+        self.assertEqual(self.serie.fator("2020-01-04", "2020-01-07"),
+                         self.serie.fator("2020-01-06", "2020-01-07"))
+
+    ## Testa se datas antes da primeira ou depois da última da série são
+    # recusadas em vez de trocadas pela primeira ou pela última.
+    #
+    def test_fora_da_serie(self):
+        for inicio, fim in (("2019-12-31", "2020-03-02"),
+                            ("2020-01-02", "2023-12-30"),
+                            (["2020-01-02", "2019-06-01"],
+                             ["2020-03-02", "2020-03-02"])):
+            with self.assertRaises(ValueError):
+                self.serie.fator(inicio, fim)
+            with self.assertRaises(ValueError):
+                self.serie.montante(1000, inicio, fim, 100, None)
+        self.assertEqual(self.serie.dias_uteis(self.datas[0],
+                                               self.datas[-1]),
+                         len(self.datas) - 1)
+
+    ## Testa a leitura de um CSV no formato do Banco Central.
+    #
+    def test_carrega_csv(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False,
+                                         encoding="utf-8") as arquivo:
+            arquivo.write("data;cdi;selic\n")
+            for data, cdi in zip(self.datas[:5], self.cdi[:5]):
+                dia = str(data)
+                arquivo.write("%s/%s/%s;%s;13,75\n" % (
+                    dia[8:], dia[5:7], dia[:4],
+                    ("%.2f" % (cdi * 100)).replace(".", ",")))
+        try:
+            serie = SerieCDI.carrega_csv(arquivo.name)
+        finally:
+            os.remove(arquivo.name)
+        np.testing.assert_array_equal(serie.datas, self.datas[:5])
+        np.testing.assert_allclose(serie.cdi, self.cdi[:5])
+        np.testing.assert_allclose(serie.selic, 0.1375)
+
+    ## Testa que os índices guardados são limitados a INDICES_GUARDADOS
+    # percentuais e que um índice guardado é reaproveitado.
+    #
+    def test_indices_limitados(self):
+        primeiro = self.serie.indice(110)
+        self.assertIs(self.serie.indice(110), primeiro)
+        for t in range(cdiserie.INDICES_GUARDADOS + 10):
+            self.serie.indice(50 + t)
+        estatisticas = self.serie.estatisticas_indices()
+        self.assertEqual(estatisticas.currsize, cdiserie.INDICES_GUARDADOS)
+        self.assertEqual(estatisticas.hits, 1)
+
+    ## Testa se a série gravada em binário é reaberta por mapeamento de
+    # memória com os mesmos dados e as mesmas consultas.
+    #
+    def test_binario(self):
+        serie = SerieCDI(self.datas, self.cdi, self.cdi + 0.001)
+        with tempfile.TemporaryDirectory() as diretorio:
+            caminho = os.path.join(diretorio, "cdi.bin")
+            serie.salva_binario(caminho)
+            self.assertEqual(os.path.getsize(caminho),
+                             32 + 8 * (5 * len(serie) + 1))
+            mapeada = SerieCDI.abre_binario(caminho)
+            self.assertIsInstance(mapeada.cdi.base, np.memmap)
+            np.testing.assert_array_equal(mapeada.datas, serie.datas)
+            np.testing.assert_array_equal(mapeada.selic, serie.selic)
+            for t in (100, 120):
+                self.assertEqual(
+                    mapeada.fator("2021-03-01", "2023-03-01", t),
+                    serie.fator("2021-03-01", "2023-03-01", t))
+            del mapeada
+
+    ## Testa se um arquivo que não é uma série é recusado.
+    #
+    def test_binario_invalido(self):
+        with tempfile.NamedTemporaryFile(suffix=".bin", delete=False) as arq:
+            arq.write(b"data,cdi\n" * 10)
+        try:
+            with self.assertRaises(ValueError):
+                SerieCDI.abre_binario(arq.name)
+        finally:
+            os.remove(arq.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
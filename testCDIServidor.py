@@ -0,0 +1,150 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_Test_Unit_for_CDI_Servidor
+#
+#  Class for testing the asyncio server and its request batching.
+#
+#  @author Luan Bernardo Dias
+#  @since 09/10/2022
+#  @see https://docs.python.org/2/library/unittest.html
+#
+
+
+""" Compara as respostas do servidor com calcula_cdb """
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from cargaCDI import conecta, requisicao
+from cdi import CAMPOS_CDB, calcula_cdb
+import cdiservidor
+from cdiservidor import inicia_servidor
+
+## Cenário de exemplo no formato do corpo de POST /cdb.
+CENARIO = {"capital": 1000, "aplicacao": 0.1365, "selic": 0.1375,
+           "rentabilidade": 100, "imposto": 22.5, "meses": 12}
+
+
+##
+# Classe para testar as rotas do servidor e o agrupamento em lotes.
+#
+class TestCDIServidor(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.servidor = await inicia_servidor("127.0.0.1:0", janela=0.05)
+        porta = self.servidor.sockets[0].getsockname()[1]
+        self.endereco = "127.0.0.1:%d" % porta
+
+    async def asyncTearDown(self):
+        self.servidor.close()
+        await self.servidor.wait_closed()
+
+    ## Envia uma requisição em uma conexão nova.
+    #
+    async def pede(self, metodo, caminho, corpo=None, endereco=None):
+        leitor, escritor = await conecta(endereco or self.endereco)
+        try:
+            return await requisicao(leitor, escritor, metodo, caminho, corpo)
+        finally:
+            escritor.close()
+
+    ## Testa que requisições simultâneas formam um só lote e que os
+    # resultados são os de calcula_cdb.
+    #
+    async def test_lote(self):
+        cenarios = [dict(CENARIO, meses=m) for m in range(1, 21)]
+        respostas = await asyncio.gather(*(self.pede("POST", "/cdb", c)
+                                           for c in cenarios))
+        for cenario, (status, resposta) in zip(cenarios, respostas):
+            self.assertEqual(status, 200)
+            esperado = calcula_cdb(1000, 0.1365, 0.1375, 100, 22.5,
+                                   cenario["meses"])
+            for campo in CAMPOS_CDB:
+                self.assertAlmostEqual(resposta[campo],
+                                       getattr(esperado, campo), places=6)
+        _, estatisticas = await self.pede("GET", "/estatisticas")
+        self.assertEqual(estatisticas["requisicoes"], 20)
+        self.assertEqual(estatisticas["lotes"], 1)
+
+    ## Testa uma lista de cenários, um cenário inválido e uma rota
+    # inexistente.
+    #
+    async def test_lista_e_erros(self):
+        status, resposta = await self.pede("POST", "/cdb",
+                                           [CENARIO, dict(CENARIO,
+                                                          imposto="auto")])
+        self.assertEqual(status, 200)
+        self.assertEqual([r["imposto"] for r in resposta], [22.5, 20.0])
+        status, resposta = await self.pede("POST", "/cdb",
+                                           {"capital": 1000})
+        self.assertEqual(status, 400)
+        self.assertIn("aplicacao", resposta["erro"])
+        status, _ = await self.pede("GET", "/nada")
+        self.assertEqual(status, 404)
+
+    ## Testa que um resultado não finito (capital zero) é rejeitado com 400
+    # em vez de NaN no corpo.
+    #
+    async def test_nao_finito(self):
+        status, resposta = await self.pede("POST", "/cdb",
+                                           [CENARIO, dict(CENARIO,
+                                                          capital=0)])
+        self.assertEqual(status, 400)
+        self.assertIn("cenário 2", resposta["erro"])
+
+    ## Testa que um cenário com resultado complexo (taxa abaixo de -100%)
+    # recebe 400, com e sem o NumPy, e o servidor continua atendendo.
+    #
+    async def test_fora_do_dominio(self):
+        for cdivec in (cdiservidor.cdivec, None):
+            with self.subTest(cdivec=cdivec), \
+                    mock.patch.object(cdiservidor, "cdivec", cdivec):
+                status, resposta = await self.pede(
+                    "POST", "/cdb", dict(CENARIO, aplicacao=-2, imposto=0,
+                                         rentabilidade=-100))
+                self.assertEqual(status, 400)
+                self.assertIn("aplicacao", resposta["erro"])
+                status, _ = await self.pede("POST", "/cdb", CENARIO)
+                self.assertEqual(status, 200)
+
+    ## Testa que um cenário que falha no cálculo, em um lote com outros,
+    # só faz falhar a sua requisição, com e sem o NumPy.
+    #
+    async def test_erro_no_lote(self):
+        for cdivec in (cdiservidor.cdivec, None):
+            with self.subTest(cdivec=cdivec), \
+                    mock.patch.object(cdiservidor, "cdivec", cdivec):
+                cenarios = [dict(CENARIO, meses=m) for m in range(1, 6)]
+                cenarios.insert(2, dict(CENARIO, capital=0))
+                respostas = await asyncio.gather(
+                    *(self.pede("POST", "/cdb", c) for c in cenarios))
+                status = [s for s, _ in respostas]
+                self.assertEqual(status, [200, 200, 400, 200, 200, 200])
+                self.assertIn("cenário 1", respostas[2][1]["erro"])
+                self.assertEqual([r["meses"] for s, r in respostas
+                                  if s == 200], [1, 2, 3, 4, 5])
+
+    ## Testa o servidor em um socket Unix.
+    #
+    @unittest.skipUnless(hasattr(asyncio, "start_unix_server"),
+                         "sem sockets Unix")
+    async def test_socket_unix(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            endereco = "unix:" + os.path.join(pasta, "cdi.sock")
+            servidor = await inicia_servidor(endereco)
+            try:
+                status, resposta = await self.pede("POST", "/cdb", CENARIO,
+                                                   endereco)
+            finally:
+                servidor.close()
+                await servidor.wait_closed()
+        self.assertEqual(status, 200)
+        self.assertAlmostEqual(resposta["aplicacaocomimposto"], 1105.79,
+                               places=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
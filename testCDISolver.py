@@ -0,0 +1,126 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_Test_Unit_for_CDI_Solver
+#
+#  Class for testing the break-even and inverse solvers against calcula_cdb.
+#
+#  @author Luan Bernardo Dias
+#  @since 09/10/2022
+#  @see https://docs.python.org/2/library/unittest.html
+#
+
+
+""" Compara os pontos de equilíbrio e os solvers inversos com calcula_cdb """
+import unittest
+
+from cdi import calcula_cdb
+
+try:
+    import numpy as np
+    import cdisolver
+except ImportError:
+    np = None
+
+
+##
+# Classe para testar os pontos de equilíbrio entre aplicação e poupança.
+#
+@unittest.skipIf(np is None, "NumPy não instalado")
+class TestCDISolver(unittest.TestCase):
+
+    ##
+    # Sorteia ofertas nos dois regimes da poupança e em todas as alíquotas.
+    #
+    def setUp(self):
+        rng = np.random.default_rng(2022)
+        n = 150
+        self.cdi = rng.uniform(0.02, 0.15, n)
+        self.p = rng.uniform(0.02, 0.15, n)
+        self.t = rng.uniform(50, 130, n)
+        self.i = rng.choice([0, 15, 17.5, 20, 22.5], n)
+
+    ## Testa se Apl - Poup troca de sinal na rentabilidade mínima.
+    #
+    def test_rentabilidade_minima(self):
+        meses = np.arange(len(self.cdi)) % 120 + 1
+        t_min = cdisolver.rentabilidade_minima(self.cdi, self.p, self.i,
+                                               meses)
+        for k in range(len(t_min)):
+            argumentos = (1000, self.cdi[k], self.p[k])
+            acima = calcula_cdb(*argumentos, t_min[k] * (1 + 1e-8),
+                                self.i[k], int(meses[k]))
+            abaixo = calcula_cdb(*argumentos, t_min[k] * (1 - 1e-8),
+                                 self.i[k], int(meses[k]))
+            self.assertGreater(acima.apl_poup, 0)
+            self.assertLess(abaixo.apl_poup, 0)
+
+    ## Testa o prazo mínimo contra a varredura mês a mês.
+    #
+    def test_meses_minimos(self):
+        meses = cdisolver.meses_minimos(self.cdi, self.p, self.t, self.i,
+                                        360)
+        for k in range(len(meses)):
+            esperado = np.inf
+            for m in range(1, 361):
+                if calcula_cdb(1000, self.cdi[k], self.p[k], self.t[k],
+                               self.i[k], m).apl_poup > 0:
+                    esperado = m
+                    break
+            self.assertEqual(meses[k], esperado)
+
+    ## Testa os casos sem solução.
+    #
+    def test_sem_solucao(self):
+        self.assertEqual(cdisolver.rentabilidade_minima(0.1365, 0.1375, 100,
+                                                        12), np.inf)
+        self.assertEqual(cdisolver.meses_minimos(0.1365, 0.1375, 40, 0),
+                         np.inf)
+
+    ## Testa o capital e a rentabilidade necessários: calcula_cdb com eles
+    # chega ao alvo, com alíquota fixa e pela tabela regressiva.
+    #
+    def test_capital_e_rentabilidade(self):
+        meses = np.arange(len(self.cdi)) % 120 + 1
+        alvo = np.linspace(1100, 50000, len(self.cdi))
+        for i in (self.i, None):
+            capital = cdisolver.capital_necessario(alvo, self.cdi, self.t, i,
+                                                   meses)
+            t = cdisolver.rentabilidade_necessaria(alvo, 1000, self.cdi, i,
+                                                   meses)
+            for k in range(len(alvo)):
+                ir = None if i is None else i[k]
+                resultado = calcula_cdb(capital[k], self.cdi[k], self.p[k],
+                                        self.t[k], ir, int(meses[k]))
+                self.assertAlmostEqual(resultado.aplicacaocomimposto / alvo[k],
+                                       1, places=10)
+                resultado = calcula_cdb(1000, self.cdi[k], self.p[k], t[k],
+                                        ir, int(meses[k]))
+                self.assertAlmostEqual(resultado.aplicacaocomimposto / alvo[k],
+                                       1, places=10)
+
+    ## Testa o prazo necessário contra a varredura mês a mês, com alíquota
+    # fixa (fórmula fechada) e pela tabela regressiva (bisseção).
+    #
+    def test_meses_necessarios(self):
+        alvo = np.linspace(1000, 4000, len(self.cdi))
+        for i in (self.i, None):
+            meses = cdisolver.meses_necessarios(alvo, 1000, self.cdi, self.t,
+                                                i, 360)
+            for k in range(len(meses)):
+                ir = None if i is None else i[k]
+                esperado = np.inf
+                for m in range(1, 361):
+                    if calcula_cdb(1000, self.cdi[k], self.p[k], self.t[k],
+                                   ir, m).aplicacaocomimposto >= alvo[k]:
+                        esperado = m
+                        break
+                self.assertEqual(meses[k], esperado)
+        self.assertEqual(cdisolver.meses_necessarios(2000, 1000, 0.1, 100, 0,
+                                                     12), np.inf)
+        self.assertTrue(np.isnan(cdisolver.rentabilidade_necessaria(
+            2000, 1000, 0.1, 100, 12)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_Test_Unit_for_CDI_Tarefa
+#
+#  Class for testing the background tasks used by the GUI.
+#
+#  @author Luan Bernardo Dias
+#  @since 09/10/2022
+#  @see https://docs.python.org/2/library/unittest.html
+#
+
+
+""" Testa as tarefas em segundo plano sem abrir a interface gráfica """
+import threading
+import unittest
+
+from cdi import evolucao_cdb
+from cditarefa import (CANCELADO, ERRO, PROGRESSO, RESULTADO, Tarefa,
+                       evolucao_em_blocos)
+
+
+##
+# Classe para testar a execução, o cancelamento e os erros de uma Tarefa.
+#
+class TestCDITarefa(unittest.TestCase):
+
+    ## Executa a tarefa até o fim e devolve todas as mensagens.
+    #
+    def mensagens(self, tarefa):
+        tarefa.aguarda(10)
+        self.assertTrue(tarefa.terminada)
+        return list(tarefa.mensagens())
+
+    ## Testa o progresso e o resultado da evolução em blocos; 1.0 é relatado
+    # uma única vez, com ou sem um bloco terminando no último mês.
+    #
+    def test_evolucao(self):
+        tarefa = Tarefa(evolucao_em_blocos, 1000, 0.1365, 0.1375, 100, None,
+                        600, bloco=100).inicia()
+        mensagens = self.mensagens(tarefa)
+        progresso = [valor for tipo, valor in mensagens if tipo == PROGRESSO]
+        self.assertEqual(progresso, [0.0, 1 / 6, 2 / 6, 3 / 6, 4 / 6, 5 / 6,
+                                     1.0])
+        self.assertEqual(mensagens[-1],
+                         (RESULTADO, list(evolucao_cdb(1000, 0.1365, 0.1375,
+                                                       100, None, 600))))
+        tarefa = Tarefa(evolucao_em_blocos, 1000, 0.1365, 0.1375, 100, None,
+                        250, bloco=100).inicia()
+        progresso = [valor for tipo, valor in self.mensagens(tarefa)
+                     if tipo == PROGRESSO]
+        self.assertEqual(progresso, [0.0, 0.4, 0.8, 1.0])
+        self.assertEqual(progresso.count(1.0), 1)
+
+    ## Testa que o cancelamento interrompe a função no próximo progresso.
+    #
+    def test_cancela(self):
+        liberado = threading.Event()
+
+        def trabalho(progresso):
+            liberado.wait(10)
+            progresso(0.5)
+            return "não deveria terminar"
+
+        tarefa = Tarefa(trabalho).inicia()
+        tarefa.cancela()
+        liberado.set()
+        self.assertEqual(self.mensagens(tarefa), [(CANCELADO, None)])
+
+    ## Testa que uma exceção da função chega como mensagem de erro.
+    #
+    def test_erro(self):
+        tarefa = Tarefa(lambda progresso: 1 / 0).inicia()
+        tipo, valor = self.mensagens(tarefa)[-1]
+        self.assertEqual(tipo, ERRO)
+        self.assertIsInstance(valor, ZeroDivisionError)
+
+
+if __name__ == '__main__':
+    unittest.main()
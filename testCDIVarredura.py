@@ -0,0 +1,93 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_Test_Unit_for_CDI_Varredura
+#
+#  Class for testing the grid sweep against calcula_cdb.
+#
+#  @author Luan Bernardo Dias
+#  @since 09/10/2022
+#  @see https://docs.python.org/2/library/unittest.html
+#
+
+
+""" Compara a varredura em grade com calcula_cdb """
+import csv
+import io
+import itertools
+import unittest
+
+from cdi import CAMPOS_CDB, DIAS_POR_MES, aliquota_ir, calcula_cdb
+
+try:
+    import numpy as np
+    import cdivarredura
+except ImportError:
+    np = None
+
+## Eixos de uma grade pequena, com o IR automático.
+EIXOS = ([1000, 5000], [0.1365, 0.0765], [0.06, 0.1375], [90, 100, 110],
+         None, [1, 7, 13, 25])
+
+
+##
+# Classe para testar a grade, os blocos e a saída em CSV.
+#
+@unittest.skipIf(np is None, "NumPy não instalado")
+class TestCDIVarredura(unittest.TestCase):
+
+    ## Testa cada célula da grade contra calcula_cdb.
+    #
+    def test_grade(self):
+        grade = cdivarredura.varredura(*EIXOS)
+        eixos = list(EIXOS)
+        eixos[4] = [None]
+        for indice in itertools.product(*(range(len(e)) for e in eixos)):
+            c, cdi, p, t, _, m = (e[k] for e, k in zip(eixos, indice))
+            esperado = calcula_cdb(c, cdi, p, t,
+                                   aliquota_ir(DIAS_POR_MES * m), m)
+            for campo in CAMPOS_CDB:
+                self.assertAlmostEqual(grade[campo][indice],
+                                       getattr(esperado, campo), places=8)
+
+    ## Testa que os valores por eixo não são expandidos para a grade.
+    #
+    def test_por_eixo(self):
+        grade = cdivarredura.varredura(*EIXOS)
+        self.assertEqual(grade["poupanca_ao_mes"].shape, (2, 2, 2, 3, 1, 4))
+        self.assertEqual(grade["poupanca_ao_mes"].strides[2], 8)
+        self.assertEqual(grade["poupanca_ao_mes"].strides[3], 0)
+
+    ## Testa que os blocos, remontados, dão a grade inteira.
+    #
+    def test_blocos(self):
+        grade = cdivarredura.varredura(*EIXOS)
+        remontada = np.full(grade["apl_poup"].shape, np.nan)
+        for inicio, bloco in cdivarredura.varredura_blocos(*EIXOS,
+                                                           max_celulas=5):
+            valores = bloco["apl_poup"]
+            self.assertLessEqual(valores.size, 5)
+            fatias = tuple(slice(a, a + n)
+                           for a, n in zip(inicio, valores.shape))
+            remontada[fatias] = valores
+        np.testing.assert_array_equal(remontada, grade["apl_poup"])
+
+    ## Testa a saída em CSV e a leitura dos intervalos.
+    #
+    def test_csv(self):
+        self.assertEqual(cdivarredura.le_eixo("80:100:10"), [80, 90, 100])
+        self.assertEqual(cdivarredura.le_eixo("0.1,0.2"), [0.1, 0.2])
+        self.assertIsNone(cdivarredura.le_eixo("auto"))
+        saida = io.StringIO()
+        n = cdivarredura.escreve_csv(
+            saida, cdivarredura.prepara_eixos(*EIXOS), ("apl_poup",), 7)
+        linhas = list(csv.DictReader(io.StringIO(saida.getvalue())))
+        self.assertEqual(n, len(linhas))
+        self.assertEqual(n, 2 * 2 * 2 * 3 * 4)
+        self.assertEqual(linhas[-1]["imposto"], "15.0")
+        self.assertEqual(float(linhas[-1]["apl_poup"]), cdivarredura.varredura(
+            *EIXOS)["apl_poup"][-1, -1, -1, -1, -1, -1])
+
+
+if __name__ == '__main__':
+    unittest.main()
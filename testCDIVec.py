@@ -0,0 +1,155 @@
+# !/usr/bin/env python
+# coding: UTF-8
+#
+## @package AD2_Test_Unit_for_CDI_Vetorizado
+#
+#  Class for testing the vectorized CDB engine against the scalar one.
+#
+#  @author Luan Bernardo Dias
+#  @since 09/10/2022
+#  @see https://docs.python.org/2/library/unittest.html
+#
+
+
+""" Compara cdivec.cdb_lote com cdi.CDB cenário a cenário """
+import contextlib
+import io
+import unittest
+
+from cdi import (CDB, CAMPOS_CDB, DIAS_POR_MES, aliquota_iof, aliquota_ir,
+                 calcula_cdb, cdb_aportes, evolucao_cdb)
+
+try:
+    import numpy as np
+    import cdivec
+except ImportError:
+    np = None
+
+
+## Executa cdi.CDB descartando o relatório impresso.
+#
+def cdb_silencioso(*args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return CDB(*args)
+
+
+##
+# Classe para testar se o cálculo vetorizado coincide com o escalar.
+#
+@unittest.skipIf(np is None, "NumPy não instalado")
+class TestCDIVec(unittest.TestCase):
+
+    ##
+    # Gera uma grade de cenários cobrindo os dois regimes da poupança e
+    # todas as alíquotas de IR.
+    #
+    def setUp(self):
+        rng = np.random.default_rng(2022)
+        n = 200
+        self.c = rng.uniform(100, 1e6, n)
+        self.cdi = rng.uniform(0.02, 0.15, n)
+        self.p = rng.uniform(0.02, 0.15, n)
+        self.t = rng.uniform(80, 130, n)
+        self.i = rng.choice([0, 15, 17.5, 20, 22.5], n)
+        self.m = rng.integers(1, 361, n)
+
+    ## Testa se todos os 16 campos coincidem com cdi.CDB.
+    #
+    def test_igual_escalar(self):
+        colunas = cdivec.cdb_lote(self.c, self.cdi, self.p, self.t, self.i,
+                                  self.m)
+        self.assertEqual(tuple(colunas), CAMPOS_CDB)
+        for k in range(len(self.c)):
+            esperado = cdb_silencioso(
+                self.c[k], self.cdi[k], self.p[k], self.t[k], self.i[k],
+                int(self.m[k]))
+            for nome, valor in zip(CAMPOS_CDB, esperado):
+                self.assertAlmostEqual(
+                    colunas[nome][k], valor, delta=1e-9 * max(1, abs(valor)),
+                    msg=nome)
+
+    ## Testa o broadcasting de escalares contra vetores.
+    #
+    def test_broadcasting(self):
+        colunas = cdivec.cdb_lote(1000, 0.1365, 0.1375, 100, 22.5,
+                                  np.arange(1, 13))
+        self.assertEqual(colunas["aplicacaocomimposto"].shape, (12,))
+        esperado = cdb_silencioso(1000, 0.1365, 0.1375, 100, 22.5, 12)
+        self.assertAlmostEqual(colunas["aplicacaocomimposto"][-1],
+                               esperado[7], places=9)
+
+    ## Testa a conversão para vetor estruturado.
+    #
+    def test_estruturado(self):
+        colunas = cdivec.cdb_lote(self.c, self.cdi, self.p, self.t, self.i,
+                                  self.m)
+        tabela = cdivec.para_estruturado(colunas)
+        self.assertEqual(tabela.dtype.names, CAMPOS_CDB)
+        np.testing.assert_array_equal(tabela["poupanca"], colunas["poupanca"])
+
+    ## Testa se a evolução vetorizada coincide com a versão geradora.
+    #
+    def test_evolucao(self):
+        colunas = cdivec.evolucao(self.c[:3], self.cdi[:3], self.p[:3],
+                                  self.t[:3], self.i[:3], 240)
+        self.assertEqual(colunas["aplicacao"].shape, (3, 240))
+        for k in range(3):
+            esperado = list(evolucao_cdb(self.c[k], self.cdi[k], self.p[k],
+                                         self.t[k], self.i[k], 240))
+            for nome in ("aplicacao", "poupanca", "imposto", "diferenca"):
+                np.testing.assert_allclose(
+                    colunas[nome][k], [getattr(s, nome) for s in esperado],
+                    rtol=1e-10, atol=1e-9)
+
+    ## Testa as tabelas vetorizadas de IR e IOF e o IR automático.
+    #
+    def test_aliquota_automatica(self):
+        dias = np.arange(0, 800)
+        np.testing.assert_array_equal(cdivec.aliquota_ir(dias),
+                                      [aliquota_ir(d) for d in dias])
+        np.testing.assert_array_equal(cdivec.aliquota_iof(dias),
+                                      [aliquota_iof(d) for d in dias])
+        colunas = cdivec.cdb_lote(self.c, self.cdi, self.p, self.t, None,
+                                  self.m)
+        for k in range(0, len(self.c), 10):
+            esperado = calcula_cdb(self.c[k], self.cdi[k], self.p[k],
+                                   self.t[k], None, int(self.m[k]))
+            self.assertAlmostEqual(
+                colunas["imposto_val"][k], esperado.imposto_val,
+                delta=1e-9 * max(1, esperado.imposto_val))
+            self.assertEqual(colunas["cdi_com_impostos"][k],
+                             self.t[k] - self.t[k] * aliquota_ir(
+                                 DIAS_POR_MES * int(self.m[k])) / 100)
+
+    ## Testa os aportes vetorizados e o fluxo de caixa irregular contra a
+    # fórmula fechada escalar.
+    #
+    def test_aportes(self):
+        aportes = np.linspace(-20, 500, len(self.c))
+        for ir in (None, 17.5):
+            colunas = cdivec.cdb_aportes(self.c, aportes, self.cdi, self.p,
+                                         self.t, ir, self.m)
+            for k in range(0, len(self.c), 25):
+                esperado = cdb_aportes(self.c[k], aportes[k], self.cdi[k],
+                                       self.p[k], self.t[k], ir,
+                                       int(self.m[k]))
+                for nome, valor in esperado._asdict().items():
+                    self.assertAlmostEqual(
+                        colunas[nome][k], valor,
+                        delta=1e-9 * max(1, abs(valor)), msg=nome)
+        fluxos = np.zeros((2, 61))
+        fluxos[:, 0] = [1000, 5000]
+        fluxos[:, 1:] = [[100], [-30]]
+        colunas = cdivec.fluxo_caixa(fluxos, self.cdi[:2], self.p[:2],
+                                     self.t[:2])
+        for k, aporte in enumerate((100, -30)):
+            esperado = cdb_aportes(fluxos[k, 0], aporte, self.cdi[k],
+                                   self.p[k], self.t[k], None, 60)
+            self.assertAlmostEqual(colunas["aplicacao"][k],
+                                   esperado.aplicacao, places=7)
+            self.assertAlmostEqual(colunas["poupanca"][k],
+                                   esperado.poupanca, places=7)
+
+
+if __name__ == '__main__':
+    unittest.main()